@@ -0,0 +1,456 @@
+"""
+核心功能性能基准脚本
+对解析、提取、比较等热点路径做微基准测试，数据均为合成数据，无需测试目录
+"""
+
+import sys
+import os
+import timeit
+import difflib
+import tracemalloc
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+# 添加项目根目录到路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from core.yaml_parser import (YAMLParser, compile_key_path, extract_by_steps,
+                              _tokenize_key_path)
+from core.key_path_trie import KeyPathTrie
+from core.merkle import build_merkle_tree
+from core.deep_diff import deep_diff
+from core.seq_diff import align_sequences
+from core.text_diff import diff_text
+from core.rename_detector import RenameDetector, content_features
+from core.yaml_comparator import YAMLComparator
+from models.resource import Resource, ComparisonResult
+from config import LIST_MERGE_KEYS
+
+
+def print_section(title):
+    """打印分隔线"""
+    print("\n" + "="*60)
+    print(f"  {title}")
+    print("="*60)
+
+
+def make_application(index: int) -> dict:
+    """生成一个合成的Application资源"""
+    return {
+        'apiVersion': 'apps/v1',
+        'kind': 'Application',
+        'metadata': {
+            'name': f'app-{index}',
+            'namespace': f'ns-{index % 20}',
+            'labels': {'app': f'app-{index}', 'tier': 'backend'},
+            'annotations': {'app.cebpaas.io/last-replicas': str(index % 5)},
+        },
+        'spec': {
+            'replicas': index % 7,
+            'image': f'registry.local/app-{index}:1.{index % 10}',
+            'template': {
+                'spec': {
+                    'containers': [
+                        {
+                            'name': 'main',
+                            'image': f'registry.local/app-{index}:1.{index % 10}',
+                            'env': [{'name': f'ENV_{i}', 'value': str(i)} for i in range(10)],
+                            'ports': [{'containerPort': 8080 + i} for i in range(3)],
+                            'resources': {'limits': {'cpu': '500m', 'memory': '512Mi'}},
+                        },
+                        {'name': 'sidecar', 'image': 'envoy:1.0'},
+                    ],
+                },
+            },
+        },
+    }
+
+
+def bench_key_path_access():
+    """基准1: 键路径提取（逐字符解析 vs 编译缓存）"""
+    print_section("基准1: 键路径提取")
+
+    parser = YAMLParser(workers=1)
+    docs = [make_application(i) for i in range(1000)]
+    key_paths = [
+        "spec.replicas",
+        "spec.template.spec.containers[0].image",
+        "spec.template.spec.containers[0].resources.limits.cpu",
+        "metadata.annotations.'app.cebpaas.io/last-replicas'",
+    ]
+
+    def legacy_path():
+        # 每次调用都重新逐字符解析路径（优化前的行为）
+        for doc in docs:
+            for key_path in key_paths:
+                extract_by_steps(doc, _tokenize_key_path(key_path))
+
+    def compiled_path():
+        for doc in docs:
+            for key_path in key_paths:
+                parser.extract_value_by_path(doc, key_path)
+
+    for doc in docs[:10]:
+        for key_path in key_paths:
+            assert extract_by_steps(doc, _tokenize_key_path(key_path)) == \
+                parser.extract_value_by_path(doc, key_path)
+
+    calls = len(docs) * len(key_paths)
+    legacy = min(timeit.repeat(legacy_path, number=5, repeat=3)) / 5
+    compiled = min(timeit.repeat(compiled_path, number=5, repeat=3)) / 5
+
+    print(f"提取次数: {calls}")
+    print(f"  逐字符解析: {legacy * 1000:8.2f} ms  ({legacy / calls * 1e6:.2f} µs/次)")
+    print(f"  编译缓存:   {compiled * 1000:8.2f} ms  ({compiled / calls * 1e6:.2f} µs/次)")
+    print(f"  加速比: {legacy / compiled:.1f}x")
+    print(f"  缓存状态: {compile_key_path.cache_info()}")
+
+
+def bench_trie_extraction():
+    """基准2: 多路径提取（逐路径 vs 前缀树一次遍历）"""
+    print_section("基准2: 多路径前缀树提取")
+
+    parser = YAMLParser(workers=1)
+    docs = [make_application(i) for i in range(1000)]
+    container = "spec.template.spec.containers[0]"
+    key_paths = (
+        [f"{container}.env[{i}].value" for i in range(10)]
+        + [f"{container}.ports[{i}].containerPort" for i in range(3)]
+        + [f"{container}.image", f"{container}.name",
+           f"{container}.resources.limits.cpu", f"{container}.resources.limits.memory",
+           "spec.template.spec.containers[1].image", "spec.replicas", "spec.image",
+           "metadata.labels.app", "metadata.labels.tier", "metadata.name"]
+    )
+    trie = KeyPathTrie(key_paths)
+
+    for doc in docs[:10]:
+        expected = {k: parser.extract_value_by_path(doc, k) for k in key_paths}
+        assert trie.extract_all(doc) == expected
+
+    def per_path():
+        for doc in docs:
+            for key_path in key_paths:
+                parser.extract_value_by_path(doc, key_path)
+
+    def one_pass():
+        for doc in docs:
+            trie.extract_all(doc)
+
+    per_path_time = min(timeit.repeat(per_path, number=3, repeat=3)) / 3
+    trie_time = min(timeit.repeat(one_pass, number=3, repeat=3)) / 3
+
+    print(f"资源数: {len(docs)}，每个资源键路径数: {len(key_paths)}")
+    print(f"  逐路径提取: {per_path_time * 1000:8.2f} ms")
+    print(f"  前缀树提取: {trie_time * 1000:8.2f} ms")
+    print(f"  加速比: {per_path_time / trie_time:.1f}x")
+
+
+@dataclass
+class LegacyResource:
+    """优化前的资源模型（普通dataclass），仅用于内存对比"""
+    kind: str
+    name: str
+    namespace: str
+    cluster: str
+    file_path: str
+    yaml_content: Dict[str, Any]
+    abs_file_path: str = ""
+    resource_type_folder: str = ""
+
+
+@dataclass
+class LegacyComparisonResult:
+    """优化前的比较结果模型（差异项为字典），仅用于内存对比"""
+    resource_left: Any
+    resource_right: Optional[Any]
+    differences: list = field(default_factory=list)
+
+    def add_difference(self, key_path: str, left_value: Any, right_value: Any):
+        self.differences.append({
+            'key_path': key_path,
+            'left_value': left_value,
+            'right_value': right_value
+        })
+
+
+def measure_bytes(factory, count: int) -> float:
+    """用tracemalloc测量创建count个对象的平均内存占用（字节/个）"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects = [factory(i) for i in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / count
+
+
+def bench_model_memory():
+    """基准3: 资源与比较结果模型内存占用"""
+    print_section("基准3: 模型内存占用")
+
+    count = 100_000
+    content = {}  # 所有资源共享同一内容，只测量模型本身
+
+    def identity(i):
+        # 模拟解析：每个资源的标识字符串都是新建的对象
+        ns = i % 20
+        return ("".join(["Appli", "cation"]), f"app-{i}", f"ns-{ns}", "".join(["clus", "ter-a"]),
+                f"ns-{ns}/Application/app-{i // 4}.yaml",
+                f"/data/cluster-a/ns-{ns}/Application/app-{i // 4}.yaml",
+                "".join(["Appli", "cation"]))
+
+    def make_legacy(i):
+        kind, name, ns, cluster, rel, abs_path, folder = identity(i)
+        return LegacyResource(kind, name, ns, cluster, rel, content, abs_path, folder)
+
+    def make_slotted(i):
+        kind, name, ns, cluster, rel, abs_path, folder = identity(i)
+        return Resource(kind, name, ns, cluster, rel, content, abs_path, folder)
+
+    legacy = measure_bytes(make_legacy, count)
+    slotted = measure_bytes(make_slotted, count)
+
+    print(f"资源数: {count}（合成集群，每4个资源共享一个文件）")
+    print(f"  dataclass资源:       {legacy:8.1f} 字节/资源")
+    print(f"  __slots__+字符串驻留: {slotted:8.1f} 字节/资源")
+    print(f"  节省: {(1 - slotted / legacy) * 100:.1f}%")
+
+    def make_legacy_result(i):
+        result = LegacyComparisonResult(None, None)
+        for key in ("spec.replicas", "spec.image", "metadata.labels.app"):
+            result.add_difference("".join([key]), i, i + 1)
+        return result
+
+    def make_slotted_result(i):
+        result = ComparisonResult(None, None)
+        for key in ("spec.replicas", "spec.image", "metadata.labels.app"):
+            result.add_difference("".join([key]), i, i + 1)
+        return result
+
+    legacy_result = measure_bytes(make_legacy_result, count)
+    slotted_result = measure_bytes(make_slotted_result, count)
+
+    print(f"比较结果数: {count}（每个结果3个差异项）")
+    print(f"  dataclass+字典差异项:    {legacy_result:8.1f} 字节/结果")
+    print(f"  __slots__+元组差异项:    {slotted_result:8.1f} 字节/结果")
+    print(f"  节省: {(1 - slotted_result / legacy_result) * 100:.1f}%")
+
+
+def naive_diff(left: Any, right: Any, path: str = "") -> list:
+    """不剪枝的递归全量比较，仅作为全量比较的对照"""
+    if isinstance(left, dict) and isinstance(right, dict):
+        differences = []
+        for key in left.keys() | right.keys():
+            child_path = f"{path}.{key}" if path else str(key)
+            differences.extend(naive_diff(left.get(key), right.get(key), child_path))
+        return differences
+    if isinstance(left, list) and isinstance(right, list):
+        differences = []
+        for index in range(max(len(left), len(right))):
+            differences.extend(naive_diff(
+                left[index] if index < len(left) else None,
+                right[index] if index < len(right) else None,
+                f"{path}[{index}]"))
+        return differences
+    return [] if left == right else [(path, left, right)]
+
+
+def bench_deep_diff():
+    """基准4: 全量结构比较（逐叶子递归 vs 迭代+剪枝 vs Merkle剪枝）"""
+    print_section("基准4: 全量结构比较")
+
+    count = 2000
+    lefts = [make_application(i) for i in range(count)]
+    rights = [make_application(i) for i in range(count)]
+    # 每10个资源修改一处深层的值，模拟少量漂移
+    for i in range(0, count, 10):
+        rights[i]['spec']['template']['spec']['containers'][0]['env'][3]['value'] = 'changed'
+
+    build_start = timeit.default_timer()
+    left_trees = [build_merkle_tree(doc) for doc in lefts]
+    right_trees = [build_merkle_tree(doc) for doc in rights]
+    build_time = (timeit.default_timer() - build_start) / 2
+
+    pairs = list(zip(lefts, rights))
+    tree_pairs = list(zip(left_trees, right_trees))
+    assert sum(len(deep_diff(l, r)) for l, r in pairs) == count // 10
+
+    def naive():
+        for left, right in pairs:
+            naive_diff(left, right)
+
+    def pruned():
+        for left, right in pairs:
+            deep_diff(left, right)
+
+    def merkle():
+        for (left, right), (tree1, tree2) in zip(pairs, tree_pairs):
+            deep_diff(left, right, (), tree1, tree2)
+
+    naive_time = min(timeit.repeat(naive, number=1, repeat=3))
+    pruned_time = min(timeit.repeat(pruned, number=1, repeat=3))
+    merkle_time = min(timeit.repeat(merkle, number=1, repeat=3))
+
+    print(f"资源对数: {count}（{count // 10} 对各有一处差异）")
+    print(f"  递归逐叶子比较:     {naive_time * 1000:8.2f} ms")
+    print(f"  迭代+相等剪枝:      {pruned_time * 1000:8.2f} ms")
+    print(f"  Merkle剪枝:         {merkle_time * 1000:8.2f} ms")
+    print(f"  （Merkle树在解析时计算，每个集群约 {build_time * 1000:.2f} ms）")
+    print(f"  加速比: {naive_time / pruned_time:.1f}x / {naive_time / merkle_time:.1f}x")
+
+
+def bench_compare_scaling():
+    """基准5: 资源配对比较的进程数扩展性（全量比较，无Merkle树）"""
+    print_section("基准5: 并行比较扩展性")
+
+    count = 8000
+    pairs = []
+    for i in range(count):
+        left = make_application(i)
+        right = make_application(i)
+        right['spec']['template']['spec']['containers'][0]['env'][i % 10]['value'] = 'changed'
+        pairs.append((
+            Resource(kind='Application', name=f'app-{i}', namespace='ns', cluster='c1',
+                     file_path='a.yaml', yaml_content=left),
+            Resource(kind='Application', name=f'app-{i}', namespace='ns', cluster='c2',
+                     file_path='a.yaml', yaml_content=right),
+        ))
+
+    print(f"资源对数: {count}，CPU核数: {os.cpu_count()}")
+    if (os.cpu_count() or 1) < 8:
+        print("  注意: CPU核数少于最大进程数，超出核数的结果只反映进程池开销，不代表多核上的扩展性")
+    baseline = None
+    for workers in (1, 2, 4, 8):
+        comparator = YAMLComparator(workers=workers)
+        comparator.deep_diff = True
+        comparator.engine.parallel_min_pairs = 0
+        start = timeit.default_timer()
+        results = comparator.engine.compare_pairs(comparator, pairs, [])
+        elapsed = timeit.default_timer() - start
+        assert sum(len(result.differences) for result in results) == count
+        baseline = baseline or elapsed
+        print(f"  {workers} 进程: {elapsed * 1000:8.2f} ms（加速比 {baseline / elapsed:.2f}x）")
+
+
+def bench_list_matching():
+    """基准6: 长列表按元素匹配（插入一个元素后的差异项数与耗时）"""
+    print_section("基准6: 列表元素匹配")
+
+    for size in (1000, 10000, 50000):
+        left = {'env': [{'name': f'VAR_{i}', 'value': str(i)} for i in range(size)],
+                'args': [f'--flag-{i}' for i in range(size)]}
+        right = {'env': list(left['env']), 'args': list(left['args'])}
+        # 在开头插入一个元素、中间修改一个元素
+        right['env'].insert(0, {'name': 'NEW', 'value': 'x'})
+        right['env'][size // 2] = {'name': right['env'][size // 2]['name'], 'value': 'changed'}
+        right['args'].insert(0, '--new')
+        right['args'][size // 2] = '--changed'
+
+        start = timeit.default_timer()
+        by_index = deep_diff(left, right)
+        index_time = timeit.default_timer() - start
+        start = timeit.default_timer()
+        matched = deep_diff(left, right, list_keys=LIST_MERGE_KEYS)
+        matched_time = timeit.default_timer() - start
+        print(f"  {size:6d} 个元素: 按下标 {len(by_index):6d} 项 {index_time * 1000:8.2f} ms，"
+              f"按元素匹配 {len(matched)} 项 {matched_time * 1000:8.2f} ms")
+
+    lines1 = [f"line {i}" for i in range(200000)]
+    lines2 = list(lines1)
+    for i in range(0, len(lines2), 20000):
+        lines2[i] = "edited"
+    start = timeit.default_timer()
+    opcodes = align_sequences(lines1, lines2)
+    elapsed = timeit.default_timer() - start
+    print(f"  序列对齐 {len(lines1)} 项（{len(lines1) // 20000} 处修改）: "
+          f"{elapsed * 1000:.2f} ms，{len(opcodes)} 个操作")
+
+
+def bench_text_diff():
+    """基准7: 大文本文件按行比较（50000行，少量修改）"""
+    print_section("基准7: 文本按行比较")
+
+    lines = [f"app.setting.{i:05d}=value-{i}" for i in range(50000)]
+    changed = list(lines)
+    for i in range(0, len(changed), 5000):
+        changed[i] = changed[i] + "-changed"
+    changed.insert(25000, "app.setting.new=1")
+    text1 = "\n".join(lines) + "\n"
+    text2 = "\n".join(changed) + "\n"
+
+    def ours():
+        return diff_text(text1, text2)
+
+    def reference():
+        return list(difflib.unified_diff(text1.splitlines(), text2.splitlines(), lineterm="", n=3))
+
+    ours_time = min(timeit.repeat(ours, number=1, repeat=3))
+    reference_time = min(timeit.repeat(reference, number=1, repeat=1))
+    result = ours()
+    stored = sum(len(hunk.header) + len(hunk.body) for hunk in result.hunks)
+    print(f"文件: {len(lines)} 行，{len(text1) / 1024 / 1024:.2f} MB，"
+          f"{len(result.hunks)} 个差异块")
+    print(f"  Myers按行比较:      {ours_time * 1000:8.2f} ms")
+    print(f"  difflib.unified_diff: {reference_time * 1000:8.2f} ms")
+    print(f"  保存的差异内容: {stored} 个字符（整体比较需保存两侧全文 {len(text1) + len(text2)} 个字符）")
+
+
+def bench_rename_detection():
+    """基准8: 重命名检测（仅一侧存在的资源，LSH候选对与两两比较）"""
+    print_section("基准8: 重命名检测")
+
+    size = 3000
+    left = []
+    right = []
+    for i in range(size):
+        doc = make_application(i)
+        left.append(Resource(kind="Application", name=f"app-{i}", namespace="ns", cluster="",
+                             file_path="", yaml_content=doc))
+        renamed = dict(doc, metadata=dict(doc['metadata'], name=f"app-{i}-renamed"))
+        if i % 2:
+            # 一半资源改名的同时修改了副本数
+            renamed['spec'] = dict(doc['spec'], replicas=99)
+        right.append(Resource(kind="Application", name=f"app-{i}-renamed", namespace="ns", cluster="",
+                              file_path="", yaml_content=renamed))
+
+    detector = RenameDetector()
+    start = timeit.default_timer()
+    matches = detector.detect(left, right)
+    elapsed = timeit.default_timer() - start
+    correct = sum(1 for m in matches if m.resource_right.name == f"{m.resource_left.name}-renamed")
+
+    # 两两比较的耗时按抽样估算
+    features_left = [content_features(r.yaml_content) for r in left[:100]]
+    features_right = [content_features(r.yaml_content) for r in right[:100]]
+    start = timeit.default_timer()
+    for a in features_left:
+        for b in features_right:
+            len(a & b) / len(a | b)
+    pair_time = (timeit.default_timer() - start) / (len(features_left) * len(features_right))
+
+    print(f"资源: 左右各 {size} 个，检测到 {len(matches)} 个重命名（正确 {correct} 个）")
+    print(f"  MinHash/LSH: {elapsed * 1000:8.2f} ms，候选对 {detector.candidate_pairs} 个")
+    print(f"  两两比较:    约 {pair_time * size * size * 1000:8.2f} ms（不含特征提取），"
+          f"{size * size} 对")
+
+
+def main():
+    """主函数"""
+    print("\n" + "="*60)
+    print("  K8s YAML管理工具 - 性能基准")
+    print("="*60)
+
+    bench_key_path_access()
+    bench_trie_extraction()
+    bench_model_memory()
+    bench_deep_diff()
+    bench_compare_scaling()
+    bench_list_matching()
+    bench_text_diff()
+    bench_rename_detection()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,8 @@
 包含应用程序的全局配置
 """
 
+import os
+
 # 应用程序信息
 APP_NAME = "K8s YAML管理工具"
 APP_VERSION = "1.0.0"
@@ -48,6 +50,62 @@ DEPLOY_ORDER = [
 # YAML文件扩展名
 YAML_EXTENSIONS = [".yaml", ".yml"]
 
+# 目录扫描配置
+SCAN_EXCLUDE_DIRS = [".*", "*.bak", "*~"]  # 任意层级都不进入的文件夹（如.git、备份文件夹）
+SCAN_THREADS = 1  # 并发扫描目录的线程数，网络文件系统上可调大
+
+# 解析相关配置
+PARSE_WORKERS = 0  # 并行解析进程数，0表示使用CPU核数，1表示串行解析
+PARSE_PARALLEL_MIN_FILES = 200  # 文件数少于该值时使用串行解析（进程启动开销大于收益）
+PARSE_CHUNKS_PER_WORKER = 4  # 每个进程分配的任务块数量，用于平衡负载
+LARGE_FILE_PARALLEL_BYTES = 64 * 1024 * 1024  # 单个多文档文件超过该大小时按文档并行解析
+KEY_PATH_CACHE_SIZE = 4096  # 编译后键路径的LRU缓存容量
+FANOUT_BATCH_SIZE = 256  # 通配键路径（如containers[*].image）批量求值的资源数
+MERKLE_TREE_DEPTH = 4  # Merkle树逐层保留子树哈希的最大深度，更深的子树只计算整体哈希
+COMPARE_WORKERS = 1  # 资源配对比较的进程数，0表示使用CPU核数，1表示在当前进程中比较
+# 单核环境下2~8个进程比串行慢3~7倍，多核上的加速比尚未测量，调大前先运行benchmark_core.py的基准5
+COMPARE_PARALLEL_MIN_PAIRS = 2000  # 需要比较的资源对少于该值时不使用进程池
+DEEP_DIFF_IGNORE_PATHS = [  # 全量比较时默认忽略的路径（由集群自动维护的字段）
+    "metadata.managedFields",
+    "metadata.resourceVersion",
+    "metadata.uid",
+    "metadata.generation",
+    "metadata.creationTimestamp",
+    "status",
+]
+LIST_MERGE_KEYS = {  # 列表按元素匹配时各字段的候选合并键，未配置的列表按元素摘要对齐
+    "containers": ("name",),
+    "initContainers": ("name",),
+    "env": ("name",),
+    "volumes": ("name",),
+    "volumeMounts": ("mountPath", "name"),
+    "ports": ("containerPort", "port", "name"),
+}
+SEQ_DIFF_MAX_COST = 2000  # 列表/文本对齐的编辑距离上限，超出时差异部分整体作为替换
+TEXT_DIFF_CONTEXT = 3  # text类型文件按行比较时差异行前后保留的上下文行数
+TEXT_DIFF_MAX_CHARS = 32000  # 一个文件的差异块内容总长度上限（Excel单元格最多32767个字符）
+RENAME_SIMILARITY_THRESHOLD = 0.7  # 重命名检测的内容相似度阈值（Jaccard系数）
+RENAME_MINHASH_PERMUTATIONS = 64  # 重命名检测的MinHash签名长度
+RENAME_LSH_BANDS = 16  # 签名分段数，段数越多越容易召回相似度较低的资源对
+RENAME_MAX_BUCKET_SIZE = 50  # LSH桶内资源数超过此值时视为公共内容，不产生候选对
+EMBEDDED_FILE_CACHE_SIZE = 1024  # 一次比较/提取中缓存的ConfigMap/Secret内嵌文件解析结果数
+
+# 解析缓存配置
+PARSE_CACHE_ENABLED = True  # 图形界面是否启用解析缓存
+PARSE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".yaml_tools", "parse_cache")
+PARSE_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 缓存大小预算，超出后按LRU淘汰
+PARSE_CACHE_VERIFY_HASH = False  # 命中时是否额外校验文件内容哈希
+
+# 增量比较配置
+COMPARE_STATE_ENABLED = True  # 图形界面是否保存比较状态，再次比较时只重新比较内容变化的资源
+COMPARE_STATE_DIR = os.path.join(os.path.expanduser("~"), ".yaml_tools", "compare_state")
+
+# 集群快照配置
+SNAPSHOT_EXTENSION = ".ysnap"  # 集群快照文件扩展名
+
+# 资源目录配置
+CATALOG_DB_PATH = os.path.join(os.path.expanduser("~"), ".yaml_tools", "catalog.sqlite")
+
 # Excel相关配置
 MAX_SHEETS_PER_FILE = 250  # Excel单文件最大Sheet数量限制
 
@@ -0,0 +1,355 @@
+"""
+集群快照模块
+将解析后的集群（全部资源、解析错误、文件指纹）保存为一个带版本号的二进制文件，
+再次加载时无需重新解析YAML，资源内容在首次访问时才解码。
+快照可能来自他人，解码时只允许内置容器、标量和日期时间类型，不会执行任意代码
+"""
+
+import io
+import os
+import mmap
+import zlib
+import time
+import pickle
+import struct
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from models.resource import Resource
+from core.merkle import build_merkle_tree
+
+# 文件格式:
+#   MAGIC | 资源内容块... | 索引块 | 索引偏移(8字节) | 索引长度(8字节) | MAGIC
+# 资源内容块和索引块均为zlib压缩的pickle，索引放在末尾，写入时可逐个资源流式追加
+SNAPSHOT_MAGIC = b"YTSNAP01"
+SNAPSHOT_FORMAT_VERSION = 5
+_FOOTER = struct.Struct("<QQ")
+_FOOTER_SIZE = _FOOTER.size + len(SNAPSHOT_MAGIC)
+# 解码时允许引用的类，对应YAML的时间戳类型
+_ALLOWED_CLASSES = {
+    ('datetime', 'date'), ('datetime', 'datetime'), ('datetime', 'time'),
+    ('datetime', 'timedelta'), ('datetime', 'timezone'),
+}
+
+
+class _SnapshotUnpickler(pickle.Unpickler):
+    """只允许_ALLOWED_CLASSES中的类，其他全局引用（函数、任意类）一律拒绝"""
+
+    def find_class(self, module: str, name: str):
+        if (module, name) in _ALLOWED_CLASSES:
+            return super().find_class(module, name)
+        raise pickle.UnpicklingError(f"快照中包含不允许的类型: {module}.{name}")
+
+
+def _decode(data: bytes) -> Any:
+    """
+    解压并反序列化快照中的一个数据块
+
+    Raises:
+        ValueError: 数据损坏或包含不允许的类型
+    """
+    try:
+        return _SnapshotUnpickler(io.BytesIO(zlib.decompress(data))).load()
+    except Exception as e:
+        raise ValueError(str(e) or type(e).__name__) from e
+
+
+def is_snapshot_file(path: str) -> bool:
+    """
+    判断路径是否为集群快照文件（检查文件头）
+
+    Args:
+        path: 文件路径
+
+    Returns:
+        是否为快照文件
+    """
+    if not os.path.isfile(path):
+        return False
+    try:
+        with open(path, 'rb') as f:
+            return f.read(len(SNAPSHOT_MAGIC)) == SNAPSHOT_MAGIC
+    except OSError:
+        return False
+
+
+class SnapshotResource(Resource):
+    """
+    从快照加载的资源
+    yaml_content在首次访问时才从快照数据中解压和反序列化；
+    内容损坏时记录到快照的decode_errors中，内容视为空文档
+    """
+    __slots__ = ('_snapshot', '_span', '_content')
+
+    def __init__(self, kind: str, name: str, namespace: str, cluster: str,
+                 file_path: str, abs_file_path: str, resource_type_folder: str,
+                 content_digest: str, snapshot: "ClusterSnapshot", span: Tuple[int, int],
+                 merkle_tree: Optional[tuple] = None):
+        self._snapshot = snapshot
+        self._span = span
+        super().__init__(
+            kind=kind,
+            name=name,
+            namespace=namespace,
+            cluster=cluster,
+            file_path=file_path,
+            yaml_content=None,
+            abs_file_path=abs_file_path,
+            resource_type_folder=resource_type_folder,
+            content_digest=content_digest,
+            merkle_tree=merkle_tree
+        )
+
+    @property
+    def yaml_content(self) -> Dict[str, Any]:
+        """资源内容，首次访问时解码"""
+        if self._content is None:
+            try:
+                self._content = self._snapshot.read_body(*self._span)
+            except ValueError as e:
+                self._snapshot.decode_errors.append(
+                    f"解码快照资源失败 {self.namespace}/{self.kind}/{self.name}: {str(e)}")
+                self._content = {}
+        return self._content
+
+    @yaml_content.setter
+    def yaml_content(self, value: Dict[str, Any]):
+        self._content = value
+
+    def release_content(self):
+        """释放已解码的内容，下次访问时重新从快照解码"""
+        self._content = None
+
+    def __reduce__(self):
+        # 序列化时转为普通Resource，不携带快照数据
+        return (Resource, (self.kind, self.name, self.namespace, self.cluster,
+                           self.file_path, self.yaml_content, self.abs_file_path,
+                           self.resource_type_folder, self.content_digest, self.merkle_tree))
+
+
+class SnapshotWriter:
+    """
+    快照写入器
+    资源内容逐个写入文件，只在内存中保留索引，适合直接消费流式解析结果
+    """
+
+    def __init__(self, output_path: str, store_trees: bool = True):
+        """
+        Args:
+            output_path: 快照文件路径，写入完成前使用临时文件，完成后原子替换
+            store_trees: 是否在索引中保存Merkle树；不保存时只保存根摘要，索引占用内存更少
+        """
+        self.output_path = output_path
+        self.store_trees = store_trees
+        self._tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        self._file = open(self._tmp_path, 'wb')
+        self._file.write(SNAPSHOT_MAGIC)
+        self._offset = len(SNAPSHOT_MAGIC)
+        self._entries = []
+
+    def add(self, resource: Resource):
+        """
+        写入一个资源
+
+        Args:
+            resource: 资源对象
+        """
+        body = zlib.compress(pickle.dumps(resource.yaml_content, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        # 保存内容摘要和Merkle树，加载后比较时无需解码即可判断内容或子树是否一致
+        tree = resource.merkle_tree or build_merkle_tree(resource.yaml_content)
+        digest = resource.content_digest or tree[0].hex()
+        self._file.write(body)
+        self._entries.append((
+            resource.kind, resource.name, resource.namespace, resource.cluster,
+            resource.file_path, resource.abs_file_path, resource.resource_type_folder,
+            digest, tree if self.store_trees else None, self._offset, len(body)
+        ))
+        self._offset += len(body)
+
+    def close(self, cluster_name: str = "", source_path: str = "",
+              errors: Optional[List[str]] = None,
+              fingerprints: Optional[Dict[str, Tuple[int, int]]] = None) -> int:
+        """
+        写入索引并完成快照
+
+        Args:
+            cluster_name: 集群名
+            source_path: 集群文件夹路径
+            errors: 解析错误列表
+            fingerprints: 文件指纹 {文件路径: (大小, mtime_ns)}
+
+        Returns:
+            写入的资源数量
+        """
+        index = {
+            'version': SNAPSHOT_FORMAT_VERSION,
+            'cluster_name': cluster_name,
+            'source_path': source_path,
+            'created_at': time.time(),
+            'errors': list(errors or []),
+            'fingerprints': dict(fingerprints or {}),
+            'resources': self._entries,
+        }
+        data = zlib.compress(pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        self._file.write(data)
+        self._file.write(_FOOTER.pack(self._offset, len(data)))
+        self._file.write(SNAPSHOT_MAGIC)
+        self._file.close()
+        os.replace(self._tmp_path, self.output_path)
+        return len(self._entries)
+
+    def abort(self):
+        """放弃写入并删除临时文件"""
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class ClusterSnapshot:
+    """
+    已加载的集群快照
+    加载时只解码索引，资源内容在访问SnapshotResource.yaml_content时才解码
+    """
+
+    def __init__(self, path: str, use_mmap: bool = False):
+        """
+        Args:
+            path: 快照文件路径
+            use_mmap: 是否以内存映射方式读取，资源内容只在解码时按需读入，
+                      映射期间文件不能被替换，用完后需调用close()
+
+        Raises:
+            ValueError: 文件不是快照、版本不兼容或索引损坏
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            if use_mmap and os.fstat(f.fileno()).st_size > 0:
+                self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self._data = f.read()
+
+        try:
+            self._load_index(self._data)
+        except ValueError:
+            self.close()
+            raise
+
+    def _load_index(self, data):
+        """
+        解码并校验索引，任何结构错误都转为ValueError
+
+        Raises:
+            ValueError: 文件不是快照、版本不兼容或索引损坏
+        """
+        path = self.path
+        if (len(data) < len(SNAPSHOT_MAGIC) + _FOOTER_SIZE
+                or data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC
+                or data[-len(SNAPSHOT_MAGIC):] != SNAPSHOT_MAGIC):
+            raise ValueError(f"不是有效的集群快照文件: {path}")
+
+        index_offset, index_length = _FOOTER.unpack_from(data, len(data) - _FOOTER_SIZE)
+        try:
+            index = _decode(data[index_offset:index_offset + index_length])
+        except ValueError as e:
+            raise ValueError(f"集群快照索引损坏: {path}: {str(e)}")
+
+        if not isinstance(index, dict):
+            raise ValueError(f"集群快照索引损坏: {path}: 索引类型为 {type(index).__name__}")
+        if index.get('version') != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"集群快照版本不兼容: {index.get('version')}，"
+                             f"当前版本: {SNAPSHOT_FORMAT_VERSION}")
+
+        try:
+            self.cluster_name = index['cluster_name']
+            self.source_path = index['source_path']
+            self.created_at = index['created_at']
+            self.errors = list(index['errors'])
+            self.decode_errors = []  # 访问资源内容时解码失败的错误
+            self.fingerprints = dict(index['fingerprints'])
+            self.resources = [
+                SnapshotResource(kind, name, namespace, cluster, file_path, abs_file_path,
+                                 type_folder, digest, self, (offset, length), tree)
+                for (kind, name, namespace, cluster, file_path, abs_file_path,
+                     type_folder, digest, tree, offset, length) in index['resources']
+            ]
+        except (KeyError, TypeError, ValueError) as e:
+            # 缺少字段、字段类型不对或资源条目字段数不对
+            raise ValueError(f"集群快照索引损坏: {path}: {type(e).__name__}: {str(e)}")
+
+    def read_body(self, offset: int, length: int) -> Dict[str, Any]:
+        """
+        解码一个资源的内容
+
+        Raises:
+            ValueError: 内容损坏或包含不允许的类型
+        """
+        try:
+            return _decode(self._data[offset:offset + length])
+        except ValueError as e:
+            raise ValueError(f"集群快照资源内容损坏: {self.path}: {str(e)}")
+
+    def take_decode_errors(self) -> List[str]:
+        """取出并清空解码失败的错误"""
+        errors, self.decode_errors = self.decode_errors, []
+        return errors
+
+    def close(self):
+        """释放内存映射，之后不能再解码资源内容"""
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+
+
+def write_snapshot(resources: Iterable[Resource], output_path: str,
+                   cluster_name: str = "", source_path: str = "",
+                   errors: Optional[List[str]] = None,
+                   fingerprints: Optional[Dict[str, Tuple[int, int]]] = None) -> int:
+    """
+    将资源写入快照文件
+
+    Args:
+        resources: 资源列表或资源迭代器
+        output_path: 快照文件路径
+        cluster_name: 集群名
+        source_path: 集群文件夹路径
+        errors: 解析错误列表
+        fingerprints: 文件指纹 {文件路径: (大小, mtime_ns)}
+
+    Returns:
+        写入的资源数量
+    """
+    writer = SnapshotWriter(output_path)
+    try:
+        for resource in resources:
+            writer.add(resource)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close(cluster_name, source_path, errors, fingerprints)
+
+
+def create_snapshot(parser, cluster_path: str, output_path: str, scan_filter=None) -> int:
+    """
+    流式解析集群文件夹并写入快照，解析过程中不在内存中保留全部资源
+
+    Args:
+        parser: YAMLParser对象
+        cluster_path: 集群文件夹路径
+        output_path: 快照文件路径（建议使用config.SNAPSHOT_EXTENSION扩展名）
+        scan_filter: 目录扫描过滤条件
+
+    Returns:
+        写入的资源数量
+    """
+    writer = SnapshotWriter(output_path)
+    try:
+        for resource in parser.iter_cluster_resources(cluster_path, scan_filter=scan_filter):
+            writer.add(resource)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close(
+        os.path.basename(cluster_path), os.path.abspath(cluster_path),
+        parser.get_errors(), parser.file_fingerprints
+    )
+
@@ -3,8 +3,9 @@
 负责生成Kubernetes资源的部署和删除命令
 """
 
-from typing import List
+from typing import List, Iterable, Callable
 from models.resource import Resource
+from core.resource_index import ResourceIndex
 from config import DELETE_ORDER, DEPLOY_ORDER, RESOURCE_TYPE_MAPPING
 
 
@@ -14,32 +15,22 @@ class CommandGenerator:
     def __init__(self):
         self.errors = []
     
-    def generate_delete_commands(self, resources: List[Resource]) -> List[str]:
+    def generate_delete_commands(self, resources: Iterable[Resource]) -> List[str]:
         """
         生成删除命令
         顺序: Service → Application → ConfigMap → Secret → PersistentVolumeClaim
         注意: Deployment不包含在删除命令中
         
         Args:
-            resources: 资源列表
+            resources: 资源列表、资源迭代器（如YAMLParser.iter_cluster_resources）或ResourceIndex
             
         Returns:
             命令字符串列表
         """
-        commands = []
-        
-        # 按删除顺序分组
-        grouped_resources = self._group_resources_by_order(resources, DELETE_ORDER)
-        
-        # 按顺序生成命令
-        for kind in DELETE_ORDER:
-            if kind in grouped_resources:
-                for resource in grouped_resources[kind]:
-                    cmd = self._generate_single_delete_command(resource)
-                    if cmd:
-                        commands.append(cmd)
-        
-        return commands
+        # 按删除顺序分组生成命令
+        return self._generate_commands_by_order(
+            resources, DELETE_ORDER, self._generate_single_delete_command
+        )
     
     def _generate_single_delete_command(self, resource: Resource) -> str:
         """
@@ -58,31 +49,21 @@ class CommandGenerator:
         
         return cmd
     
-    def generate_deploy_commands(self, resources: List[Resource]) -> List[str]:
+    def generate_deploy_commands(self, resources: Iterable[Resource]) -> List[str]:
         """
         生成部署命令
         顺序: PersistentVolumeClaim → Secret → ConfigMap → Application → Service
         
         Args:
-            resources: 资源列表
+            resources: 资源列表、资源迭代器（如YAMLParser.iter_cluster_resources）或ResourceIndex
             
         Returns:
             命令字符串列表
         """
-        commands = []
-        
-        # 按部署顺序分组
-        grouped_resources = self._group_resources_by_order(resources, DEPLOY_ORDER)
-        
-        # 按顺序生成命令
-        for kind in DEPLOY_ORDER:
-            if kind in grouped_resources:
-                for resource in grouped_resources[kind]:
-                    cmd = self._generate_single_deploy_command(resource)
-                    if cmd:
-                        commands.append(cmd)
-        
-        return commands
+        # 按部署顺序分组生成命令
+        return self._generate_commands_by_order(
+            resources, DEPLOY_ORDER, self._generate_single_deploy_command
+        )
     
     def _generate_single_deploy_command(self, resource: Resource) -> str:
         """
@@ -98,24 +79,45 @@ class CommandGenerator:
         
         return cmd
     
-    def _group_resources_by_order(self, resources: List[Resource], order: List[str]) -> dict:
+    def _generate_commands_by_order(self, resources: Iterable[Resource], order: List[str],
+                                    build_command: Callable[[Resource], str]) -> List[str]:
         """
-        按指定顺序分组资源
+        按指定顺序分组生成命令
+        只遍历一次资源，分组中只保存命令字符串而不保存资源，
+        因此可直接消费流式解析结果；传入ResourceIndex时直接使用按类型的倒排表
         
         Args:
-            resources: 资源列表
+            resources: 资源列表、资源迭代器或ResourceIndex
             order: 顺序列表
+            build_command: 单个资源的命令生成函数
             
         Returns:
-            分组后的资源字典
+            按顺序排列的命令字符串列表
         """
+        if isinstance(resources, ResourceIndex):
+            commands = []
+            for kind in order:
+                for resource in resources.by_kind(kind):
+                    cmd = build_command(resource)
+                    if cmd:
+                        commands.append(cmd)
+            return commands
+        
         grouped = {kind: [] for kind in order}
         
         for resource in resources:
-            if resource.kind in grouped:
-                grouped[resource.kind].append(resource)
+            kind_commands = grouped.get(resource.kind)
+            if kind_commands is None:
+                continue
+            cmd = build_command(resource)
+            if cmd:
+                kind_commands.append(cmd)
+        
+        commands = []
+        for kind in order:
+            commands.extend(grouped[kind])
         
-        return grouped
+        return commands
     
     def save_commands_to_file(self, commands: List[str], output_path: str) -> bool:
         """
@@ -143,20 +145,23 @@ class CommandGenerator:
             self.errors.append(f"保存命令文件失败: {str(e)}")
             return False
     
-    def filter_resources_by_types(self, resources: List[Resource], 
+    def filter_resources_by_types(self, resources: Iterable[Resource], 
                                   selected_types: List[str]) -> List[Resource]:
         """
         根据资源类型过滤资源
         
         Args:
-            resources: 资源列表
+            resources: 资源列表、资源迭代器或ResourceIndex
             selected_types: 选中的资源类型列表
             
         Returns:
             过滤后的资源列表
         """
         if not selected_types:
-            return resources
+            return list(resources)
+        
+        if isinstance(resources, ResourceIndex):
+            return resources.query(kinds=selected_types)
         
         return [r for r in resources if r.kind in selected_types]
     
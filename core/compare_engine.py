@@ -0,0 +1,263 @@
+"""
+并行比较引擎模块
+将已配对的资源分块交给进程池比较：进程间只传递比较所需的子树（投影），
+不传递完整的Resource对象，结果按配对顺序合并
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+from models.resource import Resource, ComparisonResult
+from core.yaml_parser import split_by_weight
+from config import COMPARE_WORKERS, COMPARE_PARALLEL_MIN_PAIRS, PARSE_CHUNKS_PER_WORKER
+
+
+def project_document(doc: Any, anchors: List[Tuple]) -> Any:
+    """
+    按子树位置投影文档，只保留这些位置的子树及其路径
+    列表中不需要的元素以None占位，保证下标不变；
+    按原路径提取投影后的文档，得到的值与提取原文档相同
+
+    Args:
+        doc: YAML文档
+        anchors: 子树位置列表（key_anchor的结果）
+
+    Returns:
+        投影后的文档；包含 () 时返回原文档
+    """
+    if () in anchors or not isinstance(doc, dict):
+        return doc
+
+    projected = {}
+    # 较短的位置先放入，被其覆盖的较长位置不再重复处理
+    placed = []
+    for steps in sorted(set(anchors), key=len):
+        if any(steps[:len(prefix)] == prefix for prefix in placed):
+            continue
+        found, value = _resolve(doc, steps)
+        if not found:
+            continue
+        _place(projected, steps, value)
+        placed.append(steps)
+    return projected
+
+
+def _resolve(doc: Any, steps: Tuple) -> Tuple[bool, Any]:
+    """沿步骤查找子树，返回 (是否存在, 值)"""
+    node = doc
+    for step in steps:
+        if type(step) is int:
+            if not isinstance(node, list) or not 0 <= step < len(node):
+                return False, None
+        elif not isinstance(node, dict) or step not in node:
+            return False, None
+        node = node[step]
+    return True, node
+
+
+def _place(projected: dict, steps: Tuple, value: Any):
+    """将子树放到投影文档的对应位置，按需创建中间的映射和列表"""
+    node = projected
+    for position, step in enumerate(steps[:-1]):
+        container = [] if type(steps[position + 1]) is int else {}
+        if type(step) is int:
+            if len(node) <= step:
+                node.extend([None] * (step + 1 - len(node)))
+            if node[step] is None:
+                node[step] = container
+        elif step not in node:
+            node[step] = container
+        node = node[step]
+
+    last = steps[-1]
+    if type(last) is int:
+        if len(node) <= last:
+            node.extend([None] * (last + 1 - len(node)))
+    node[last] = value
+
+
+class CompareEngine:
+    """
+    资源配对比较引擎
+    内容一致和子树哈希一致的判断在主进程中完成（无需传递任何内容），
+    其余配对投影后分块交给进程池比较；配对数量较少或进程池不可用时在当前进程中比较
+    """
+
+    def __init__(self, workers: Optional[int] = None):
+        """
+        Args:
+            workers: 比较进程数，None表示使用配置值，0表示使用CPU核数，1表示串行
+        """
+        self.errors = []
+        self.workers = COMPARE_WORKERS if workers is None else workers
+        self.parallel_min_pairs = COMPARE_PARALLEL_MIN_PAIRS
+        self.failed_positions = set()  # 最近一次比较中产生了错误的配对序号
+
+    def compare_pairs(self, comparator, pairs: List[Tuple[Resource, Resource]],
+                      compare_keys: List[Dict[str, Any]]) -> List[ComparisonResult]:
+        """
+        比较已配对的资源
+
+        Args:
+            comparator: YAMLComparator对象，提供比较选项、统计和串行比较逻辑
+            pairs: [(左侧资源, 右侧资源), ...]
+            compare_keys: 比较key配置列表
+
+        Returns:
+            与pairs一一对应的比较结果列表（包括没有差异的结果）
+        """
+        results = [ComparisonResult(resource_left=r1, resource_right=r2) for r1, r2 in pairs]
+        self.failed_positions = set()
+
+        worker_count = self.workers if self.workers > 0 else (os.cpu_count() or 1)
+        if worker_count <= 1 or len(pairs) < max(self.parallel_min_pairs, 2):
+            for position, ((r1, r2), result) in enumerate(zip(pairs, results)):
+                self._compare_serial(comparator, position, r1, r2, compare_keys, result)
+            return results
+
+        tasks = self._build_tasks(comparator, pairs, compare_keys)
+        self._run_tasks(comparator, tasks, compare_keys, pairs, results, worker_count)
+        return results
+
+    def _build_tasks(self, comparator, pairs: List[Tuple[Resource, Resource]],
+                     compare_keys: List[Dict[str, Any]]) -> List[tuple]:
+        """
+        在主进程中跳过内容一致和子树哈希一致的部分，其余配对投影为任务
+
+        Returns:
+            [(配对序号, 需要比较的key序号元组, (命名空间, 类型, 名称), 左侧投影, 右侧投影), ...]
+        """
+        if comparator.deep_diff:
+            # 全量比较不使用key配置，整个文档即为一个比较单元
+            plan = None
+            key_indices_all = (0,)
+            anchors = [()]
+        else:
+            plan = comparator._plan_for(compare_keys)
+            key_indices_all = tuple(range(len(plan.steps)))
+            anchors = [step.anchor for step in plan.steps]
+
+        tasks = []
+        for position, (r1, r2) in enumerate(pairs):
+            if r1.content_digest and r1.content_digest == r2.content_digest:
+                comparator.identical_pairs += 1
+                continue
+
+            key_indices = key_indices_all
+            if plan is not None:
+                key_indices = plan.pending_steps(r1.merkle_tree, r2.merkle_tree)
+                comparator.skipped_keys += len(key_indices_all) - len(key_indices)
+                if not key_indices:
+                    continue
+
+            needed = [anchors[i] for i in key_indices if anchors[i] is not None]
+            tasks.append((
+                position, key_indices, (r1.namespace, r1.kind, r1.name),
+                project_document(r1.yaml_content, needed),
+                project_document(r2.yaml_content, needed)
+            ))
+        return tasks
+
+    def _run_tasks(self, comparator, tasks: List[tuple], compare_keys: List[Dict[str, Any]],
+                   pairs: List[Tuple[Resource, Resource]], results: List[ComparisonResult],
+                   worker_count: int):
+        """
+        分块提交任务，按提交顺序合并结果；进程池不可用时剩余任务回退到串行比较
+        """
+        if not tasks:
+            return
+
+        chunk_count = min(len(tasks), worker_count * PARSE_CHUNKS_PER_WORKER)
+        chunks = split_by_weight(tasks, [1] * len(tasks), chunk_count)
+        options = (compare_keys, comparator.compare_options())
+        max_pending = worker_count * 2
+
+        submitted = 0
+        finished = 0
+        try:
+            with ProcessPoolExecutor(max_workers=worker_count) as executor:
+                pending = deque()
+                try:
+                    while finished < len(chunks):
+                        while submitted < len(chunks) and len(pending) < max_pending:
+                            pending.append(executor.submit(
+                                _compare_tasks_worker, chunks[submitted], *options
+                            ))
+                            submitted += 1
+
+                        chunk_results, chunk_errors, embedded_counters = pending.popleft().result()
+                        finished += 1
+                        comparator.errors.extend(chunk_errors)
+                        comparator.embedded_cache.hits += embedded_counters[0]
+                        comparator.embedded_cache.misses += embedded_counters[1]
+                        for position, differences, failed in chunk_results:
+                            if failed:
+                                self.failed_positions.add(position)
+                            result = results[position]
+                            for difference in differences:
+                                result.add_difference(*difference)
+                finally:
+                    for future in pending:
+                        future.cancel()
+        except (OSError, BrokenProcessPool) as e:
+            self.errors.append(f"并行比较失败，剩余资源回退到串行比较: {str(e)}")
+            for chunk in chunks[finished:]:
+                for position, key_indices, _, _, _ in chunk:
+                    r1, r2 = pairs[position]
+                    result = results[position]
+                    result.differences = []
+                    self.failed_positions.discard(position)
+                    self._compare_serial(comparator, position, r1, r2, compare_keys, result,
+                                         None if comparator.deep_diff else key_indices)
+
+    def _compare_serial(self, comparator, position: int, r1: Resource, r2: Resource,
+                        compare_keys: List[Dict[str, Any]], result: ComparisonResult,
+                        key_indices: Optional[Tuple[int, ...]] = None):
+        """在当前进程中比较一个配对，产生错误时记录配对序号"""
+        error_count = len(comparator.errors)
+        comparator._compare_resources(r1, r2, compare_keys, result, key_indices)
+        if len(comparator.errors) > error_count:
+            self.failed_positions.add(position)
+
+    def get_errors(self) -> List[str]:
+        """获取比较过程中的错误"""
+        return self.errors
+
+    def clear_errors(self):
+        """清除错误列表"""
+        self.errors = []
+
+
+def _compare_tasks_worker(tasks: List[tuple], compare_keys: List[Dict[str, Any]],
+                          options: Dict[str, Any]) -> tuple:
+    """
+    进程池任务：比较一个任务块中的投影配对
+
+    Returns:
+        ([(配对序号, [差异元组, ...], 是否产生错误), ...], 错误列表, (内嵌文件缓存命中数, 未命中数))
+    """
+    # 比较器模块依赖本模块，在子进程中按需导入
+    from core.yaml_comparator import YAMLComparator
+
+    comparator = YAMLComparator(workers=1)
+    for option, value in options.items():
+        setattr(comparator, option, value)
+    deep_diff = comparator.deep_diff
+
+    chunk_results = []
+    for position, key_indices, (namespace, kind, name), projected1, projected2 in tasks:
+        r1 = Resource(kind=kind, name=name, namespace=namespace, cluster="", file_path="",
+                      yaml_content=projected1)
+        r2 = Resource(kind=kind, name=name, namespace=namespace, cluster="", file_path="",
+                      yaml_content=projected2)
+        result = ComparisonResult(resource_left=r1, resource_right=r2)
+        error_count = len(comparator.errors)
+        comparator._compare_resources(r1, r2, compare_keys, result,
+                                      None if deep_diff else key_indices)
+        chunk_results.append((position, [tuple(difference) for difference in result.differences],
+                              len(comparator.errors) > error_count))
+
+    cache = comparator.embedded_cache
+    return chunk_results, comparator.get_errors(), (cache.hits, cache.misses)
@@ -0,0 +1,205 @@
+"""
+比较/提取计划模块
+每次比较或提取前将key配置编译为执行计划：键路径预先编译，普通key合并为一棵前缀树，
+ConfigMap/Secret的key按 (文件key, 文件类型) 分组，每个内嵌文件每个资源只读取和解析一次，
+组内所有文件内key一次提取
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from core.yaml_parser import (compile_key_path, is_wildcard_path, extract_by_steps,
+                              extract_fanout_batch, ANY_INDEX, ANY_KEY)
+from core.key_path_trie import KeyPathTrie
+from core.merkle import subtrees_match
+
+# 计划步骤类型
+OP_PLAIN = "plain"  # 普通key
+OP_FANOUT = "fanout"  # 含通配的key
+OP_FILE = "file"  # ConfigMap/Secret内嵌文件
+
+# 需要解析的内嵌文件类型，其他类型（text、json等）按原始内容比较和提取
+PARSED_FILE_TYPES = ('yaml', 'properties')
+
+
+def key_anchor(key_config: Dict[str, Any], deep_diff: bool = False) -> Optional[Tuple]:
+    """
+    比较一个key需要的子树位置
+
+    Args:
+        key_config: 比较key配置
+        deep_diff: 是否为全量比较
+
+    Returns:
+        子树的步骤元组：普通key为完整路径，通配key为第一个通配之前的路径，
+        ConfigMap文件为 ('data', 文件key)，全量比较为 ()（整个文档）；
+        不需要任何内容时返回None
+    """
+    if deep_diff:
+        return ()
+    if key_config.get('is_configmap_file', False):
+        return ('data', key_config.get('file_key', ''))
+    key_path = key_config.get('key_path', '')
+    if not key_path:
+        return None
+    steps = compile_key_path(key_path)
+    for position, step in enumerate(steps):
+        if step is ANY_INDEX or step is ANY_KEY:
+            return steps[:position]
+    return steps
+
+
+class PlanStep(NamedTuple):
+    """计划中的一步，与一个key配置对应"""
+    op: str  # OP_PLAIN / OP_FANOUT / OP_FILE
+    key_path: str  # 键路径（内嵌文件为空）
+    alias: str  # 别名（仅提取时使用）
+    anchor: Optional[Tuple]  # 值所在子树的位置，用于Merkle哈希跳过
+    group: int  # 内嵌文件组序号，非内嵌文件为-1
+    inner_key: str  # 文件内容中的key，为空表示整个文件
+
+
+class FileGroup(NamedTuple):
+    """同一内嵌文件（相同文件key和文件类型）的所有key"""
+    file_key: str
+    file_type: str  # 'yaml'、'properties'、'text'（其他类型按text处理）
+    inner_keys: Tuple[str, ...]  # 组内所有非空的文件内key
+    trie: Optional[KeyPathTrie]  # 文件内普通key的前缀树
+
+
+class FileContent(NamedTuple):
+    """一个资源中内嵌文件的读取结果"""
+    raw: Any  # data中的原始内容
+    parsed: Any  # 解析结果（text类型为原始内容）
+    values: Dict[str, Any]  # {文件内key: 值}
+    error: Optional[Exception]  # 解析失败时的异常
+
+
+class KeyPlan:
+    """
+    编译后的key配置
+    steps与配置一一对应、顺序相同，执行结果的顺序与逐个解释配置时一致
+    """
+
+    def __init__(self, key_configs: List[Dict[str, Any]], inner_key_field: str = 'compare_key'):
+        """
+        Args:
+            key_configs: 比较或提取配置列表
+            inner_key_field: 文件内key的配置字段：比较为'compare_key'，提取为'extract_key'
+        """
+        self.source = key_configs
+        self.steps = []
+        self.file_groups = []
+
+        plain_paths = []
+        group_index = {}  # (文件key, 文件类型) -> 组序号
+        group_keys = []  # 各组的文件内key
+
+        for config in key_configs:
+            alias = config.get('alias', '')
+            if config.get('is_configmap_file', False):
+                file_key = config.get('file_key', '')
+                file_type = config.get('file_type', 'text')
+                if file_type not in PARSED_FILE_TYPES:
+                    file_type = 'text'
+                inner_key = config.get(inner_key_field, '') if file_type != 'text' else ''
+                group = group_index.get((file_key, file_type))
+                if group is None:
+                    group = group_index[(file_key, file_type)] = len(group_keys)
+                    group_keys.append([])
+                if inner_key and inner_key not in group_keys[group]:
+                    group_keys[group].append(inner_key)
+                self.steps.append(PlanStep(OP_FILE, '', alias, key_anchor(config),
+                                           group, inner_key))
+                continue
+
+            key_path = config.get('key_path', '')
+            op = OP_FANOUT if is_wildcard_path(key_path) else OP_PLAIN
+            if op == OP_PLAIN and key_path:
+                plain_paths.append(key_path)
+            self.steps.append(PlanStep(op, key_path, alias, key_anchor(config), -1, ''))
+
+        for (file_key, file_type), group in group_index.items():
+            inner_keys = tuple(group_keys[group])
+            plain_inner = [key for key in inner_keys if not is_wildcard_path(key)]
+            self.file_groups.append(FileGroup(
+                file_key, file_type, inner_keys,
+                KeyPathTrie(plain_inner) if plain_inner else None
+            ))
+
+        self.plain_paths = tuple(dict.fromkeys(plain_paths))
+        # 只有一个普通key时直接按步骤提取，多个时合并为前缀树一次遍历
+        self._plain_trie = KeyPathTrie(list(self.plain_paths)) if len(self.plain_paths) > 1 else None
+        self._single_steps = compile_key_path(self.plain_paths[0]) if len(self.plain_paths) == 1 else None
+
+    def extract_plain(self, yaml_obj: Any) -> Dict[str, Any]:
+        """
+        提取所有普通key的值
+
+        Returns:
+            {键路径: 值}，空键路径不包含在内（值为None）
+        """
+        if self._plain_trie is not None:
+            return self._plain_trie.extract_all(yaml_obj)
+        if self._single_steps is not None:
+            return {self.plain_paths[0]: extract_by_steps(yaml_obj, self._single_steps)}
+        return {}
+
+    def read_file(self, yaml_obj: Dict[str, Any], group: int, embedded_cache) -> FileContent:
+        """
+        读取并解析资源中的一个内嵌文件，一次提取组内所有文件内key
+
+        Args:
+            yaml_obj: 资源内容
+            group: 文件组序号
+            embedded_cache: EmbeddedFileCache对象
+
+        Returns:
+            FileContent；yaml解析失败时error为异常，values为空
+        """
+        file_group = self.file_groups[group]
+        data = yaml_obj.get('data', {})
+        raw = data.get(file_group.file_key, '')
+
+        if file_group.file_type == 'yaml':
+            try:
+                parsed = embedded_cache.parse(raw, 'yaml')
+            except Exception as e:
+                return FileContent(raw, None, {}, e)
+        elif file_group.file_type == 'properties':
+            parsed = embedded_cache.parse(raw, 'properties')
+        else:
+            return FileContent(raw, raw, {}, None)
+
+        values = file_group.trie.extract_all(parsed) if file_group.trie is not None else {}
+        for inner_key in file_group.inner_keys:
+            if inner_key not in values:
+                # 含通配的文件内key，按通配展开
+                values[inner_key] = extract_fanout_batch([parsed], inner_key)[0]
+        return FileContent(raw, parsed, values, None)
+
+    def step_unchanged(self, position: int, tree1: Optional[tuple], tree2: Optional[tuple]) -> bool:
+        """
+        根据Merkle树判断一步对应的子树在两个资源中是否一定相同
+
+        Args:
+            position: 步骤序号
+            tree1: 资源1的Merkle树
+            tree2: 资源2的Merkle树
+        """
+        anchor = self.steps[position].anchor
+        if anchor is None or tree1 is None or tree2 is None:
+            return False
+        return subtrees_match(tree1, tree2, anchor)
+
+    def pending_steps(self, tree1: Optional[tuple], tree2: Optional[tuple]) -> Tuple[int, ...]:
+        """
+        需要实际比较的步骤序号（子树哈希不同或无法判断的步骤）
+
+        Args:
+            tree1: 资源1的Merkle树，None表示不跳过任何步骤
+            tree2: 资源2的Merkle树
+        """
+        if tree1 is None or tree2 is None:
+            return tuple(range(len(self.steps)))
+        return tuple(position for position in range(len(self.steps))
+                     if not self.step_unchanged(position, tree1, tree2))
+
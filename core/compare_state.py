@@ -0,0 +1,153 @@
+"""
+比较状态模块
+保存上一次集群比较的状态（两侧资源的内容摘要、比较配置哈希和各资源对的差异），
+再次比较同一对集群时，两侧内容都未变化的资源对直接复用上次的差异
+"""
+
+import os
+import json
+import zlib
+import pickle
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+from config import COMPARE_STATE_DIR, LIST_MERGE_KEYS, TEXT_DIFF_MAX_CHARS
+
+# 状态格式版本，结构或比较逻辑变化时递增，旧状态自动失效
+STATE_FORMAT_VERSION = 2
+STATE_ENTRY_SUFFIX = ".state"
+
+
+def compare_config_hash(compare_keys: List[Dict[str, Any]], options: Dict[str, Any]) -> str:
+    """
+    计算比较配置的哈希，配置不同时上次的差异不能复用
+
+    Args:
+        compare_keys: 比较key配置列表
+        options: 比较选项（YAMLComparator.compare_options的返回值）
+
+    Returns:
+        十六进制哈希字符串
+    """
+    config = dict(options)
+    if not config.get('deep_diff'):
+        # 按key比较时忽略路径不影响结果
+        config['ignore_paths'] = []
+    config['version'] = STATE_FORMAT_VERSION
+    config['compare_keys'] = compare_keys
+    # 影响比较结果的全局配置
+    config['list_merge_keys'] = LIST_MERGE_KEYS if config.get('list_matching') else {}
+    config['text_diff_max_chars'] = TEXT_DIFF_MAX_CHARS if config.get('text_diff') else 0
+    data = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+class CompareStateStore:
+    """
+    比较状态磁盘存储
+    每对集群路径对应一个状态文件，内容为
+    {(命名空间, 类型, 名称): (左侧内容摘要, 右侧内容摘要, [差异元组, ...])}
+    """
+
+    def __init__(self, state_dir: Optional[str] = None):
+        """
+        Args:
+            state_dir: 状态目录，None表示使用配置值
+        """
+        self.state_dir = state_dir or COMPARE_STATE_DIR
+        self.errors = []
+
+    def load(self, cluster1_path: str, cluster2_path: str,
+             config_hash: str) -> Dict[Tuple[str, str, str], tuple]:
+        """
+        读取上一次比较的状态
+
+        Args:
+            cluster1_path: 集群1路径
+            cluster2_path: 集群2路径
+            config_hash: 本次比较配置的哈希（compare_config_hash）
+
+        Returns:
+            资源对状态字典；没有状态、状态损坏或比较配置不同时返回空字典
+        """
+        entry_path = self._entry_path(cluster1_path, cluster2_path)
+        try:
+            with open(entry_path, 'rb') as f:
+                payload = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError, ValueError):
+            return {}
+
+        if (not isinstance(payload, dict)
+                or payload.get('version') != STATE_FORMAT_VERSION
+                or payload.get('config_hash') != config_hash):
+            return {}
+        return payload.get('pairs', {})
+
+    def save(self, cluster1_path: str, cluster2_path: str, config_hash: str,
+             pairs: Dict[Tuple[str, str, str], tuple]) -> bool:
+        """
+        保存本次比较的状态，覆盖上一次的状态
+
+        Args:
+            cluster1_path: 集群1路径
+            cluster2_path: 集群2路径
+            config_hash: 比较配置的哈希
+            pairs: 资源对状态字典，格式同load的返回值
+
+        Returns:
+            是否成功
+        """
+        entry_path = self._entry_path(cluster1_path, cluster2_path)
+        payload = {
+            'version': STATE_FORMAT_VERSION,
+            'clusters': (os.path.abspath(cluster1_path), os.path.abspath(cluster2_path)),
+            'config_hash': config_hash,
+            'pairs': pairs,
+        }
+        try:
+            data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+            os.makedirs(self.state_dir, exist_ok=True)
+            # 先写临时文件再替换，避免中断时留下半个状态文件
+            tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, entry_path)
+            return True
+        except Exception as e:
+            self.errors.append(f"保存比较状态失败: {str(e)}")
+            return False
+
+    def clear(self) -> int:
+        """
+        删除所有比较状态
+
+        Returns:
+            删除的状态文件数
+        """
+        removed = 0
+        try:
+            with os.scandir(self.state_dir) as it:
+                for entry in it:
+                    if entry.name.endswith(STATE_ENTRY_SUFFIX):
+                        try:
+                            os.remove(entry.path)
+                            removed += 1
+                        except OSError:
+                            pass
+        except OSError:
+            pass
+        return removed
+
+    def _entry_path(self, cluster1_path: str, cluster2_path: str) -> str:
+        """根据两个集群的绝对路径计算状态文件路径"""
+        key = "\0".join((os.path.abspath(cluster1_path), os.path.abspath(cluster2_path)))
+        name = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.state_dir, name + STATE_ENTRY_SUFFIX)
+
+    def get_errors(self) -> List[str]:
+        """获取错误列表"""
+        return self.errors
+
+    def clear_errors(self):
+        """清除错误列表"""
+        self.errors = []
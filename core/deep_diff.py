@@ -0,0 +1,201 @@
+"""
+全量结构比较模块
+不依赖比较key配置，逐层比较两个YAML对象，找出所有变化、新增和删除的路径
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from core.yaml_parser import compile_key_path, format_key_path, ANY_INDEX, ANY_KEY
+from core.seq_diff import match_list_items, list_merge_keys
+from models.resource import DIFF_CHANGED, DIFF_ADDED, DIFF_REMOVED
+
+# 忽略规则前缀树中标记完整路径的键
+_IGNORE_END = object()
+
+
+@lru_cache(maxsize=64)
+def compile_ignore_paths(ignore_paths: Tuple[str, ...]) -> dict:
+    """
+    将忽略路径编译为前缀树，支持通配（如 metadata.annotations.* 、 spec.containers[*].env）
+
+    Args:
+        ignore_paths: 忽略的键路径元组
+
+    Returns:
+        前缀树 {步骤: 子树}，完整路径的终点带有 _IGNORE_END 标记
+    """
+    root = {}
+    for key_path in ignore_paths:
+        if not key_path:
+            continue
+        node = root
+        for step in compile_key_path(key_path):
+            node = node.setdefault(step, {})
+        node[_IGNORE_END] = True
+    return root
+
+
+def advance_ignore(nodes: tuple, step: Any, is_index: bool) -> Optional[tuple]:
+    """
+    沿步骤推进忽略规则
+
+    Returns:
+        下一层仍然有效的规则节点；路径被忽略时返回None
+    """
+    if not nodes:
+        return nodes
+    wildcard = ANY_INDEX if is_index else ANY_KEY
+    next_nodes = []
+    for node in nodes:
+        for child in (node.get(step), node.get(wildcard)):
+            if child is not None:
+                if _IGNORE_END in child:
+                    return None
+                next_nodes.append(child)
+    return tuple(next_nodes)
+
+
+def deep_diff(left: Any, right: Any, ignore_paths: Sequence[str] = (),
+              left_tree: Optional[tuple] = None,
+              right_tree: Optional[tuple] = None,
+              list_keys: Optional[Dict[str, Sequence[str]]] = None,
+              base_steps: Tuple = ()) -> List[Tuple[str, Any, Any, str]]:
+    """
+    比较两个YAML对象的全部内容
+    使用显式栈迭代遍历，嵌套再深也不会超出递归限制；
+    提供Merkle树时摘要相同的子树直接跳过，超出树深度的部分用相等比较剪枝。
+    一侧不存在的子树作为一个整体报告，不再展开到叶子。
+    列表默认按下标比较；提供list_keys时按元素匹配：配置了合并键的列表按键值匹配
+    （路径形如 containers[name=web].image），其余列表按元素摘要对齐，
+    插入一个元素只报告一个新增项，不会使后面的元素全部错位
+
+    Args:
+        left: 左侧对象
+        right: 右侧对象
+        ignore_paths: 忽略的键路径（含其下所有内容），支持通配
+        left_tree: 左侧对象的Merkle树（core.merkle），None表示不使用
+        right_tree: 右侧对象的Merkle树
+        list_keys: 列表按元素匹配时 {列表字段名: 候选合并键}（如config.LIST_MERGE_KEYS），
+                   None表示按下标比较
+        base_steps: 两个对象在文档中的位置（编译后的键路径），报告的路径以此为前缀，
+                    忽略路径仍从两个对象本身开始匹配
+
+    Returns:
+        [(键路径, 左侧值, 右侧值, 变化类型), ...]，按文档顺序排列；
+        变化类型为 DIFF_CHANGED / DIFF_ADDED / DIFF_REMOVED
+    """
+    differences = []
+    ignore_root = compile_ignore_paths(tuple(ignore_paths))
+    stack = [(tuple(base_steps), left, right, left_tree, right_tree,
+              (ignore_root,) if ignore_root else ())]
+
+    while stack:
+        item = stack.pop()
+        if len(item) == 4:
+            # 已确定的新增/删除项，按入栈顺序输出
+            differences.append(item)
+            continue
+        steps, value1, value2, tree1, tree2, ignore_nodes = item
+
+        if tree1 is not None and tree2 is not None:
+            if tree1[0] == tree2[0]:
+                continue
+        else:
+            try:
+                if value1 == value2:
+                    continue
+            except RecursionError:
+                # 嵌套过深，内置相等比较无法完成时逐层展开比较
+                pass
+
+        children = []
+        if isinstance(value1, dict) and isinstance(value2, dict):
+            nodes1 = tree1[1] if tree1 is not None and tree1[1] is not None else None
+            nodes2 = tree2[1] if tree2 is not None and tree2[1] is not None else None
+            for key, child1 in value1.items():
+                child_ignore = advance_ignore(ignore_nodes, key, False)
+                if child_ignore is None:
+                    continue
+                child_steps = steps + (key,)
+                if key not in value2:
+                    children.append((format_key_path(child_steps), child1, None, DIFF_REMOVED))
+                    continue
+                children.append((
+                    child_steps, child1, value2[key],
+                    nodes1[key] if nodes1 is not None else None,
+                    nodes2[key] if nodes2 is not None else None,
+                    child_ignore
+                ))
+            for key, child2 in value2.items():
+                if key in value1 or advance_ignore(ignore_nodes, key, False) is None:
+                    continue
+                children.append((format_key_path(steps + (key,)), None, child2, DIFF_ADDED))
+
+        elif isinstance(value1, list) and isinstance(value2, list):
+            nodes1 = tree1[1] if tree1 is not None and tree1[1] is not None else None
+            nodes2 = tree2[1] if tree2 is not None and tree2[1] is not None else None
+            if list_keys is not None:
+                children.extend(_matched_list_children(
+                    steps, value1, value2, nodes1, nodes2, ignore_nodes, list_keys))
+                stack.extend(reversed(children))
+                continue
+            common = min(len(value1), len(value2))
+            for index in range(max(len(value1), len(value2))):
+                child_ignore = advance_ignore(ignore_nodes, index, True)
+                if child_ignore is None:
+                    continue
+                child_steps = steps + (index,)
+                if index >= common:
+                    if index < len(value1):
+                        children.append((format_key_path(child_steps), value1[index], None, DIFF_REMOVED))
+                    else:
+                        children.append((format_key_path(child_steps), None, value2[index], DIFF_ADDED))
+                    continue
+                children.append((
+                    child_steps, value1[index], value2[index],
+                    nodes1[index] if nodes1 is not None else None,
+                    nodes2[index] if nodes2 is not None else None,
+                    child_ignore
+                ))
+
+        elif value1 != value2:
+            # 标量变化或类型不同
+            differences.append((format_key_path(steps), value1, value2, DIFF_CHANGED))
+
+        # 逆序入栈，出栈顺序与文档顺序一致
+        stack.extend(reversed(children))
+
+    return differences
+
+
+def _matched_list_children(steps: tuple, value1: list, value2: list,
+                           nodes1: Optional[list], nodes2: Optional[list],
+                           ignore_nodes: tuple, list_keys: Dict[str, Sequence[str]]) -> list:
+    """按元素匹配两个列表，返回待入栈的子项（已确定的新增/删除项和待展开的配对）"""
+    # 同一位置的Merkle节点深度相同，两侧都有节点时才能直接使用节点摘要
+    use_nodes = nodes1 is not None and nodes2 is not None
+    matched = match_list_items(
+        value1, value2, list_merge_keys(steps[-1] if steps else None, list_keys),
+        [node[0] for node in nodes1] if use_nodes else None,
+        [node[0] for node in nodes2] if use_nodes else None
+    )
+
+    children = []
+    for index1, index2, label in matched:
+        # 忽略规则按下标匹配（仅右侧存在时使用右侧下标）
+        child_ignore = advance_ignore(ignore_nodes, index1 if index1 is not None else index2, True)
+        if child_ignore is None:
+            continue
+        child_steps = steps + (label,)
+        if index2 is None:
+            children.append((format_key_path(child_steps), value1[index1], None, DIFF_REMOVED))
+        elif index1 is None:
+            children.append((format_key_path(child_steps), None, value2[index2], DIFF_ADDED))
+        else:
+            children.append((
+                child_steps, value1[index1], value2[index2],
+                nodes1[index1] if use_nodes else None,
+                nodes2[index2] if use_nodes else None,
+                child_ignore
+            ))
+    return children
@@ -0,0 +1,78 @@
+"""
+文档存储模块
+按内容寻址保存解析后的YAML文档：内容相同的文档共享同一个对象，
+比较时通过摘要即可判断两个资源内容完全一致
+"""
+
+from typing import Any, Dict, Optional, Tuple
+from core.merkle import MerkleNode, build_merkle_tree
+
+
+class DocumentStore:
+    """
+    内容寻址的文档存储
+    以文档的Merkle根摘要为键，多个集群中内容相同的文档只保留一份，
+    所有引用共享同一个文档对象和Merkle树，因此共享的文档不应被调用方修改。
+    摘要相同时还要求内容相等才共享，不依赖哈希不碰撞
+    """
+
+    def __init__(self):
+        self._documents = {}  # 摘要 -> (文档对象, Merkle树)
+        self.total = 0  # 加入的文档总数
+        self.collisions = 0  # 摘要相同但内容不同、未共享的文档数
+
+    def add(self, doc: Any, tree: Optional[MerkleNode] = None) -> Tuple[str, Any, MerkleNode]:
+        """
+        加入一个文档
+
+        Args:
+            doc: YAML文档对象
+            tree: 已计算的Merkle树，None表示在此计算
+
+        Returns:
+            (摘要, 共享的文档对象, 共享的Merkle树)；已存在相同内容时返回已有对象。
+            摘要与已有文档相同而内容不同时不共享，摘要返回空字符串，
+            比较时不会按摘要判断为内容一致
+        """
+        if tree is None:
+            tree = build_merkle_tree(doc)
+        digest = tree[0].hex()
+        self.total += 1
+        entry = self._documents.get(digest)
+        if entry is None:
+            self._documents[digest] = (doc, tree)
+            return digest, doc, tree
+        shared_doc, shared_tree = entry
+        if shared_doc is doc or shared_doc == doc:
+            return digest, shared_doc, shared_tree
+        self.collisions += 1
+        return '', doc, tree
+
+    def get(self, digest: str) -> Any:
+        """按摘要获取文档，不存在返回None"""
+        entry = self._documents.get(digest)
+        return None if entry is None else entry[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取去重统计
+
+        Returns:
+            {'documents': 加入的文档总数, 'unique_documents': 不同内容的文档数,
+             'dedup_ratio': 被去重的文档比例（0~1）}
+        """
+        unique = len(self._documents) + self.collisions
+        return {
+            'documents': self.total,
+            'unique_documents': unique,
+            'dedup_ratio': (1 - unique / self.total) if self.total else 0.0,
+        }
+
+    def clear(self):
+        """清空存储"""
+        self._documents = {}
+        self.total = 0
+        self.collisions = 0
+
+    def __len__(self) -> int:
+        return len(self._documents)
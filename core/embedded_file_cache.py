@@ -0,0 +1,90 @@
+"""
+内嵌文件解析缓存模块
+ConfigMap/Secret的data中内嵌的配置文件（yaml、properties）在一次比较或提取中
+按内容和文件类型只解析一次，多个key配置共用解析结果
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict
+from core.yaml_parser import load_yaml, parse_properties_content
+from config import EMBEDDED_FILE_CACHE_SIZE
+
+
+class EmbeddedFileCache:
+    """
+    内嵌文件解析结果缓存（内存，按最近使用淘汰）
+    以 (文件类型, 文件内容) 为键：字符串的哈希值由字符串对象自身缓存，
+    同一文档对象重复查询时无需重新计算哈希。
+    返回的解析结果被多个调用方共享，不应被修改。
+    """
+
+    def __init__(self, max_entries: int = EMBEDDED_FILE_CACHE_SIZE):
+        """
+        Args:
+            max_entries: 最多缓存的文件数
+        """
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def parse(self, content: Any, file_type: str) -> Any:
+        """
+        解析内嵌文件内容
+
+        Args:
+            content: 文件内容
+            file_type: 文件类型: 'yaml' 或 'properties'
+
+        Returns:
+            yaml: 解析后的对象（内容为空时为{}）；properties: {key: value}
+
+        Raises:
+            yaml.YAMLError: YAML格式错误（错误同样会被缓存）
+        """
+        try:
+            key = (file_type, content)
+            entry = self._entries.get(key)
+        except TypeError:
+            # 内容不可哈希（非字符串），不缓存
+            self.misses += 1
+            return self._parse(content, file_type)
+
+        if entry is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+        else:
+            self.misses += 1
+            try:
+                entry = (True, self._parse(content, file_type))
+            except Exception as e:
+                entry = (False, e)
+            self._entries[key] = entry
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        ok, value = entry
+        if not ok:
+            raise value
+        return value
+
+    def _parse(self, content: Any, file_type: str) -> Any:
+        """实际解析"""
+        if file_type == 'properties':
+            return parse_properties_content(content)
+        return load_yaml(content) if content else {}
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        获取缓存统计
+
+        Returns:
+            {'entries', 'hits', 'misses'}
+        """
+        return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        """清空缓存和计数"""
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
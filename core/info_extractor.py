@@ -3,25 +3,36 @@
 负责从YAML资源中提取指定的信息
 """
 
-import yaml
 import os
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Iterable, Optional
 from models.resource import Resource, ExtractionResult
-from core.yaml_parser import YAMLParser, parse_properties_content
+from core.yaml_parser import (YAMLParser, extract_fanout_batch,
+                              compile_key_path, format_key_path)
+from config import FANOUT_BATCH_SIZE
+from core.compare_plan import KeyPlan, FileContent, OP_FILE, OP_FANOUT
+from core.cluster_snapshot import ClusterSnapshot, SnapshotResource, is_snapshot_file
+from core.resource_catalog import matches_key_pattern
+from core.embedded_file_cache import EmbeddedFileCache
 
 
 class InfoExtractor:
     """信息提取器"""
     
-    def __init__(self):
-        self.parser = YAMLParser()
+    def __init__(self, cache=None):
+        """
+        Args:
+            cache: 解析缓存（ParseCache），None表示不使用缓存
+        """
+        self.parser = YAMLParser(cache=cache)
         self.errors = []
+        self.embedded_cache = EmbeddedFileCache()  # ConfigMap/Secret内嵌文件解析缓存
     
     def extract_from_path(self, path: str, 
-                         extract_configs: List[Dict[str, Any]]) -> List[ExtractionResult]:
+                         extract_configs: List[Dict[str, Any]],
+                         keep_content: bool = True) -> List[ExtractionResult]:
         """
         从指定路径提取信息
-        支持: 集群文件夹、命名空间文件夹、资源类型文件夹、单个YAML文件
+        支持: 集群文件夹、命名空间文件夹、资源类型文件夹、单个YAML文件、集群快照文件
         
         Args:
             path: 文件或文件夹路径
@@ -33,109 +44,229 @@ class InfoExtractor:
                                'file_key': str,  # 文件名key
                                'file_type': str,  # 文件类型
                            }
+            keep_content: 结果中的资源是否保留yaml_content
             
         Returns:
             提取结果列表
         """
-        extraction_results = []
+        return list(self.iter_extract_from_path(path, extract_configs, keep_content))
+    
+    def iter_extract_from_path(self, path: str, 
+                               extract_configs: List[Dict[str, Any]],
+                               keep_content: bool = False) -> Iterator[ExtractionResult]:
+        """
+        流式提取信息，每解析出一个资源就产出其提取结果
+        默认不在结果中保留yaml_content，整个提取过程内存占用与集群大小无关
         
+        Args:
+            path: 文件或文件夹路径
+            extract_configs: 提取配置列表，格式同extract_from_path
+            keep_content: 结果中的资源是否保留yaml_content
+            
+        Yields:
+            提取结果
+        """
         if not os.path.exists(path):
             self.errors.append(f"路径不存在: {path}")
-            return extraction_results
+            return
+        
+        # 每次提取使用新的内嵌文件缓存
+        self.embedded_cache = EmbeddedFileCache()
         
-        if os.path.isfile(path):
+        snapshot = None
+        if is_snapshot_file(path):
+            # 集群快照，无需重新解析YAML
+            try:
+                snapshot = ClusterSnapshot(path)
+            except (OSError, ValueError) as e:
+                self.errors.append(f"加载集群快照失败 {path}: {str(e)}")
+                return
+            self.errors.extend(snapshot.errors)
+            resources = snapshot.resources
+        elif os.path.isfile(path):
             # 单个文件
             resources = self.parser.parse_yaml_file(path)
         else:
             # 文件夹
-            resources = self.parser.parse_cluster_folder(path)
+            resources = self.parser.iter_cluster_resources(path)
         
-        # 提取每个资源的信息
-        for resource in resources:
-            result = self._extract_from_resource(resource, extract_configs)
-            extraction_results.append(result)
+        # 提取配置只编译一次，所有资源共用
+        plan = KeyPlan(extract_configs, 'extract_key')
+        wildcard_paths = list(dict.fromkeys(
+            step.key_path for step in plan.steps if step.op == OP_FANOUT
+        ))
         
-        return extraction_results
+        # 含通配key时按批处理，每个通配路径对整批资源统一求值
+        batch_size = FANOUT_BATCH_SIZE if wildcard_paths else 1
+        for batch in self._iter_batches(resources, batch_size):
+            batch_fanout = {
+                key_path: extract_fanout_batch([r.yaml_content for r in batch], key_path)
+                for key_path in wildcard_paths
+            }
+            
+            # 提取每个资源的信息
+            for idx, resource in enumerate(batch):
+                fanout_values = {key_path: values[idx] for key_path, values in batch_fanout.items()}
+                result = self._extract_from_resource(resource, extract_configs, fanout_values, plan)
+                if not keep_content:
+                    result.resource = resource.without_content()
+                    if isinstance(resource, SnapshotResource):
+                        resource.release_content()
+                yield result
+        
+        if snapshot is not None:
+            self.errors.extend(snapshot.take_decode_errors())
+    
+    def extract_from_catalog(self, catalog, extract_configs: List[Dict[str, Any]],
+                             **filters) -> List[ExtractionResult]:
+        """
+        从资源目录（ResourceCatalog）提取信息，不读取YAML文件
+        只能提取导入目录时保存过的键路径；ConfigMap/Secret文件内容需保存了对应的data键
+        
+        Args:
+            catalog: ResourceCatalog对象
+            extract_configs: 提取配置列表，格式同extract_from_path
+            **filters: 传给ResourceCatalog.query的过滤条件（clusters、kinds、conditions等）
+            
+        Returns:
+            提取结果列表，结果中的资源不含yaml_content，可直接交给ExcelExporter导出
+        """
+        results = []
+        self.embedded_cache = EmbeddedFileCache()
+        plan = KeyPlan(extract_configs, 'extract_key')
+        
+        for record in catalog.query(**filters):
+            values = record['values']
+            resource = Resource(
+                kind=record['kind'],
+                name=record['name'],
+                namespace=record['namespace'],
+                cluster=record['cluster'],
+                file_path=record['file_path'],
+                yaml_content={},
+                abs_file_path=record['abs_file_path'],
+                resource_type_folder=record['resource_type_folder']
+            )
+            result = ExtractionResult(resource=resource)
+            
+            # 用保存的文件内容还原data字段，复用文件内容提取逻辑
+            resource.yaml_content = {'data': {
+                file_group.file_key: values.get(format_key_path(('data', file_group.file_key)), '')
+                for file_group in plan.file_groups
+            }}
+            files = {}
+            for step in plan.steps:
+                if step.op == OP_FILE:
+                    self._extract_file_step(resource, plan, step, files, result)
+                elif step.op == OP_FANOUT:
+                    for concrete_path, value in values.items():
+                        if matches_key_pattern(concrete_path, step.key_path):
+                            result.add_value(concrete_path, value, step.alias)
+                elif step.key_path:
+                    result.add_value(step.key_path,
+                                     values.get(format_key_path(compile_key_path(step.key_path))),
+                                     step.alias)
+                else:
+                    result.add_value(step.key_path, None, step.alias)
+            resource.yaml_content = {}
+            
+            results.append(result)
+        
+        return results
+    
+    def _iter_batches(self, resources: Iterable[Resource], batch_size: int) -> Iterator[List[Resource]]:
+        """将资源流切分为批次"""
+        batch = []
+        for resource in resources:
+            batch.append(resource)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
     
     def _extract_from_resource(self, resource: Resource, 
-                               extract_configs: List[Dict[str, Any]]) -> ExtractionResult:
-        """从单个资源提取信息"""
+                               extract_configs: List[Dict[str, Any]],
+                               fanout_values: Optional[Dict[str, list]] = None,
+                               plan: Optional[KeyPlan] = None) -> ExtractionResult:
+        """
+        从单个资源提取信息
+        
+        Args:
+            resource: 资源对象
+            extract_configs: 提取配置列表
+            fanout_values: 已批量求值的通配key结果 {键路径: [(具体路径, 值), ...]}
+            plan: 提取配置的执行计划，None表示临时编译
+        """
+        if plan is None:
+            plan = KeyPlan(extract_configs, 'extract_key')
         result = ExtractionResult(resource=resource)
         
-        for config in extract_configs:
-            key_path = config.get('key_path', '')
-            alias = config.get('alias', '')
-            is_configmap_file = config.get('is_configmap_file', False)
-            
-            if is_configmap_file:
+        # 所有普通key一次提取
+        plain_values = plan.extract_plain(resource.yaml_content) if plan.plain_paths else {}
+        files = {}
+        
+        for step in plan.steps:
+            if step.op == OP_FILE:
                 # ConfigMap/Secret特殊处理
-                self._extract_configmap_file(resource, config, result)
+                self._extract_file_step(resource, plan, step, files, result)
+            elif step.op == OP_FANOUT:
+                # 通配key展开为多列，每个具体路径一列
+                if fanout_values is not None and step.key_path in fanout_values:
+                    pairs = fanout_values[step.key_path]
+                else:
+                    pairs = self.parser.extract_value_by_path(resource.yaml_content, step.key_path)
+                for concrete_path, value in pairs:
+                    result.add_value(concrete_path, value, step.alias)
             else:
                 # 普通key提取
-                value = self.parser.extract_value_by_path(resource.yaml_content, key_path)
-                result.add_value(key_path, value, alias)
+                result.add_value(step.key_path, plain_values.get(step.key_path), step.alias)
         
         return result
     
-    def _extract_configmap_file(self, resource: Resource, 
-                               config: Dict[str, Any], 
-                               result: ExtractionResult):
+    def _extract_file_step(self, resource: Resource, plan: KeyPlan, step,
+                           files: Dict[int, FileContent], result: ExtractionResult):
         """
         从ConfigMap/Secret中提取文件内容
+        同一文件的所有提取key共用一次读取和解析的结果
         
         Args:
             resource: 资源对象
-            config: 提取配置
+            plan: 执行计划
+            step: 内嵌文件步骤
+            files: 本资源已读取的文件 {文件组序号: 读取结果}
             result: 提取结果
         """
-        file_key = config.get('file_key', '')
-        file_type = config.get('file_type', 'text')
-        extract_key = config.get('extract_key', '')  # 文件内容中要提取的key
-        alias = config.get('alias', '')
-        
-        # 提取data字段
-        data = resource.yaml_content.get('data', {})
+        file_group = plan.file_groups[step.group]
+        full_path = f"data.{file_group.file_key}"
+        content = files.get(step.group)
+        if content is None:
+            content = files[step.group] = plan.read_file(
+                resource.yaml_content, step.group, self.embedded_cache)
+            if content.error is not None:
+                self.errors.append(f"解析YAML文件内容失败: {str(content.error)}")
         
-        # 获取文件内容
-        file_content = data.get(file_key, '')
-        
-        if file_type == 'text':
-            # 直接文本提取
-            full_path = f"data.{file_key}"
-            result.add_value(full_path, file_content, alias)
-        
-        elif file_type == 'yaml':
-            # 解析YAML内容
-            try:
-                yaml_obj = yaml.safe_load(file_content) if file_content else {}
-                
-                if extract_key:
-                    # 提取指定key
-                    value = self.parser.extract_value_by_path(yaml_obj, extract_key)
-                    full_path = f"data.{file_key}.{extract_key}"
-                    result.add_value(full_path, value, alias)
-                else:
-                    # 提取整个YAML对象
-                    full_path = f"data.{file_key}"
-                    result.add_value(full_path, yaml_obj, alias)
-            
-            except Exception as e:
-                self.errors.append(f"解析YAML文件内容失败: {str(e)}")
-                result.add_value(f"data.{file_key}", f"解析失败: {str(e)}", alias)
+        if content.error is not None:
+            result.add_value(full_path, f"解析失败: {str(content.error)}", step.alias)
+        elif step.inner_key:
+            # 提取指定key
+            result.add_value(f"{full_path}.{step.inner_key}",
+                             content.values.get(step.inner_key), step.alias)
+        else:
+            # 提取整个文件（text为原始内容，yaml为解析后的对象，properties为所有属性）
+            result.add_value(full_path, content.parsed, step.alias)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取最近一次提取的统计信息
         
-        elif file_type == 'properties':
-            # 解析properties内容
-            props = parse_properties_content(file_content)
-            
-            if extract_key:
-                # 提取指定key
-                value = self.parser.extract_value_by_path(props, extract_key)
-                full_path = f"data.{file_key}.{extract_key}"
-                result.add_value(full_path, value, alias)
-            else:
-                # 提取所有属性
-                full_path = f"data.{file_key}"
-                result.add_value(full_path, props, alias)
+        Returns:
+            解析统计及'embedded_hits'/'embedded_misses'（内嵌文件解析缓存命中/未命中次数）
+        """
+        stats = self.parser.get_stats()
+        stats['embedded_hits'] = self.embedded_cache.hits
+        stats['embedded_misses'] = self.embedded_cache.misses
+        return stats
     
     def get_errors(self) -> List[str]:
         """获取错误列表"""
@@ -0,0 +1,161 @@
+"""
+键路径前缀树模块
+将多个键路径合并为前缀树，一次遍历提取所有路径的值
+"""
+
+from typing import Any, Dict, List
+from core.yaml_parser import compile_key_path, is_wildcard_path
+
+# 生成专用提取函数时允许的最大路径深度，过深的路径使用栈遍历
+MAX_COMPILED_DEPTH = 40
+
+
+class _TrieNode:
+    """前缀树节点"""
+    __slots__ = ('children', 'terminals')
+
+    def __init__(self):
+        self.children = {}  # 步骤 -> 子节点
+        self.terminals = []  # 在此节点结束的键路径
+
+
+class KeyPathTrie:
+    """
+    键路径前缀树
+    例如 spec.template.spec.containers[0].image 和
+    spec.template.spec.containers[0].name 共享前缀，共享部分只访问一次
+    """
+
+    def __init__(self, key_paths: List[str]):
+        """
+        Args:
+            key_paths: 键路径列表，空路径、含通配或负下标的路径会被忽略（提取结果为None）
+        """
+        self.key_paths = list(dict.fromkeys(key_paths))
+        self.root = _TrieNode()
+
+        for key_path in self.key_paths:
+            if not key_path or is_wildcard_path(key_path):
+                continue
+            steps = compile_key_path(key_path)
+            if any(type(step) is int and step < 0 for step in steps):
+                # 负下标按extract_by_steps的语义永远取不到值，不入树，结果保持None
+                continue
+            node = self.root
+            for step in steps:
+                child = node.children.get(step)
+                if child is None:
+                    child = _TrieNode()
+                    node.children[step] = child
+                node = child
+            node.terminals.append(key_path)
+
+        self._compiled = self._compile()
+
+    def extract_all(self, yaml_obj: Any) -> Dict[str, Any]:
+        """
+        一次遍历提取所有键路径的值，语义与YAMLParser.extract_value_by_path一致
+
+        Args:
+            yaml_obj: YAML对象
+
+        Returns:
+            {键路径: 值}，路径不存在时值为None
+        """
+        if self._compiled is not None:
+            return self._compiled(yaml_obj)
+        return self._walk(yaml_obj)
+
+    def _walk(self, yaml_obj: Any) -> Dict[str, Any]:
+        """用显式栈遍历前缀树，用于路径过深无法生成专用函数的情况"""
+        results = dict.fromkeys(self.key_paths)
+
+        stack = [(self.root, yaml_obj)]
+        while stack:
+            node, current = stack.pop()
+
+            for key_path in node.terminals:
+                results[key_path] = current
+
+            if not node.children:
+                continue
+
+            if isinstance(current, dict):
+                for step, child in node.children.items():
+                    if type(step) is int:
+                        continue
+                    value = current.get(step)
+                    if value is not None:
+                        stack.append((child, value))
+            elif isinstance(current, list):
+                size = len(current)
+                for step, child in node.children.items():
+                    if type(step) is int and 0 <= step < size:
+                        stack.append((child, current[step]))
+
+        return results
+
+    def _compile(self):
+        """
+        将前缀树生成为专用的提取函数：共享前缀对应共享的if分支，
+        避免解释执行时的栈操作和循环开销
+
+        Returns:
+            提取函数，路径过深时返回None
+        """
+        if self._depth(self.root) > MAX_COMPILED_DEPTH:
+            return None
+
+        terminal_vars = {key_path: f"r{idx}" for idx, key_path in enumerate(self.key_paths)}
+        lines = ["def _extract(v0):"]
+        for var in terminal_vars.values():
+            lines.append(f"    {var} = None")
+
+        counter = [0]
+
+        def emit(node, var, indent):
+            pad = "    " * indent
+            for key_path in node.terminals:
+                lines.append(f"{pad}{terminal_vars[key_path]} = {var}")
+
+            dict_children = [(s, c) for s, c in node.children.items() if type(s) is not int]
+            list_children = [(s, c) for s, c in node.children.items()
+                             if type(s) is int and s >= 0]
+
+            if dict_children:
+                lines.append(f"{pad}if isinstance({var}, dict):")
+                for step, child in dict_children:
+                    counter[0] += 1
+                    child_var = f"v{counter[0]}"
+                    lines.append(f"{pad}    {child_var} = {var}.get({step!r})")
+                    lines.append(f"{pad}    if {child_var} is not None:")
+                    emit(child, child_var, indent + 2)
+            if list_children:
+                keyword = "elif" if dict_children else "if"
+                lines.append(f"{pad}{keyword} isinstance({var}, list):")
+                for step, child in list_children:
+                    counter[0] += 1
+                    child_var = f"v{counter[0]}"
+                    lines.append(f"{pad}    if len({var}) > {step}:")
+                    lines.append(f"{pad}        {child_var} = {var}[{step}]")
+                    emit(child, child_var, indent + 2)
+
+        emit(self.root, "v0", 1)
+
+        items = ", ".join(f"{key_path!r}: {var}" for key_path, var in terminal_vars.items())
+        lines.append(f"    return {{{items}}}")
+
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        return namespace["_extract"]
+
+    def _depth(self, node) -> int:
+        """计算前缀树深度"""
+        depth = 0
+        stack = [(node, 0)]
+        while stack:
+            current, level = stack.pop()
+            depth = max(depth, level)
+            for child in current.children.values():
+                stack.append((child, level + 1))
+        return depth
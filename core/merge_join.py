@@ -0,0 +1,132 @@
+"""
+流式归并比较模块
+两侧集群的资源按 (命名空间, 类型, 名称) 排序后归并配对，
+资源内容保存在磁盘上的快照中，只在比较该配对时解码，内存占用不随集群规模增长
+"""
+
+import os
+import tempfile
+from typing import Iterator, Optional, Tuple
+from models.resource import Resource
+from core.resource_index import resource_key
+from core.cluster_snapshot import (ClusterSnapshot, SnapshotResource, SnapshotWriter,
+                                   is_snapshot_file)
+from config import SNAPSHOT_EXTENSION
+
+
+class SortedCluster:
+    """
+    按标识排序的集群资源流
+    集群文件夹先流式解析并写入临时快照（边解析边写入，内存中只保留索引），
+    再以内存映射方式加载；快照文件直接加载。用完后需调用close()（或使用with语句）
+    """
+
+    def __init__(self, parser, cluster_path: str, scan_filter=None):
+        """
+        Args:
+            parser: YAMLParser对象，解析错误记录在parser.errors中
+            cluster_path: 集群文件夹或快照文件路径
+            scan_filter: 目录扫描过滤条件（仅文件夹有效）
+        """
+        self.cluster_path = cluster_path
+        self.errors = []
+        self._tmp_path = None
+
+        if is_snapshot_file(cluster_path):
+            self.snapshot = ClusterSnapshot(cluster_path, use_mmap=True)
+        else:
+            fd, self._tmp_path = tempfile.mkstemp(suffix=SNAPSHOT_EXTENSION, prefix="yaml_tools_")
+            os.close(fd)
+            # 索引中不保存Merkle树，每个资源只保留标识、摘要和偏移
+            writer = SnapshotWriter(self._tmp_path, store_trees=False)
+            try:
+                for resource in parser.iter_cluster_resources(cluster_path, scan_filter=scan_filter):
+                    writer.add(resource)
+            except BaseException:
+                writer.abort()
+                self._remove_tmp()
+                raise
+            writer.close(os.path.basename(cluster_path), os.path.abspath(cluster_path),
+                         parser.get_errors(), parser.file_fingerprints)
+            try:
+                self.snapshot = ClusterSnapshot(self._tmp_path, use_mmap=True)
+            except BaseException:
+                self._remove_tmp()
+                raise
+
+        self.errors.extend(self.snapshot.errors)
+
+    def __iter__(self) -> Iterator[SnapshotResource]:
+        """
+        按 (命名空间, 类型, 名称) 顺序产出资源
+        标识重复时只产出最后出现的资源（与ResourceIndex一致），并记录错误
+        """
+        ordered = sorted(self.snapshot.resources, key=resource_key)
+        for position, resource in enumerate(ordered):
+            key = resource_key(resource)
+            if position + 1 < len(ordered) and resource_key(ordered[position + 1]) == key:
+                self.errors.append(
+                    f"{self.cluster_path} 中存在重复资源 {'/'.join(key)}，"
+                    f"以最后一个为准，忽略: {resource.file_path}"
+                )
+                continue
+            yield resource
+
+    def close(self):
+        """释放快照映射并删除临时快照，解码资源内容时的错误并入errors"""
+        self.errors.extend(self.snapshot.take_decode_errors())
+        self.snapshot.close()
+        self._remove_tmp()
+
+    def _remove_tmp(self):
+        if self._tmp_path is not None:
+            try:
+                os.remove(self._tmp_path)
+            except OSError:
+                pass
+            self._tmp_path = None
+
+    def __enter__(self) -> "SortedCluster":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def merge_join(left: Iterator[Resource],
+               right: Iterator[Resource]) -> Iterator[Tuple[Optional[Resource], Optional[Resource]]]:
+    """
+    归并两个按 (命名空间, 类型, 名称) 排序且标识不重复的资源流
+
+    Args:
+        left: 左侧资源流
+        right: 右侧资源流
+
+    Returns:
+        (左侧资源, 右侧资源) 迭代器，按标识顺序产出；仅一侧存在时另一侧为None
+    """
+    left = iter(left)
+    right = iter(right)
+    r1 = next(left, None)
+    r2 = next(right, None)
+
+    while r1 is not None or r2 is not None:
+        if r2 is None:
+            yield r1, None
+            r1 = next(left, None)
+        elif r1 is None:
+            yield None, r2
+            r2 = next(right, None)
+        else:
+            key1 = resource_key(r1)
+            key2 = resource_key(r2)
+            if key1 == key2:
+                yield r1, r2
+                r1 = next(left, None)
+                r2 = next(right, None)
+            elif key1 < key2:
+                yield r1, None
+                r1 = next(left, None)
+            else:
+                yield None, r2
+                r2 = next(right, None)
@@ -0,0 +1,180 @@
+"""
+Merkle哈希模块
+为YAML文档的子树计算哈希：映射的键按规范顺序排列，子节点哈希参与父节点哈希，
+两个文档的某个子树哈希相同即说明该子树内容完全一致
+"""
+
+import json
+import hashlib
+from typing import Any, Dict, Optional, Tuple
+from config import MERKLE_TREE_DEPTH
+
+# 树节点: (摘要, 子节点)
+#   映射: 子节点为 {键: 节点}
+#   列表: 子节点为 [节点]
+#   标量和达到最大深度的映射/列表: 子节点为None，只保留整个值的摘要
+MerkleNode = Tuple[bytes, Any]
+
+_DIGEST_SIZE = 16
+
+
+def _encode_special(value: Any) -> Dict[str, str]:
+    """JSON无法直接表示的值（如YAML日期）按类型名和字符串形式编码，避免与同名字符串混淆"""
+    return {'__yaml_type__': type(value).__name__, 'value': str(value)}
+
+
+def _canonical(value: Any) -> Any:
+    """
+    转换为带类型标记的规范结构：映射的键按 (类型名, repr) 排序，
+    int/bool键与同名字符串键、YAML日期与同名字符串都不会混淆
+    """
+    if isinstance(value, dict):
+        items = [(type(k).__name__, repr(k), _canonical(v)) for k, v in value.items()]
+        items.sort(key=lambda item: (item[0], item[1]))
+        return {'__yaml_map__': items}
+    if isinstance(value, list):
+        return [_canonical(item) for item in value]
+    return value
+
+
+def canonical_bytes(value: Any) -> bytes:
+    """
+    将值序列化为规范形式：键排序、键和特殊值带类型标记、无多余空白，
+    只有内容（含类型）相同的值才得到相同的字节串
+
+    Args:
+        value: YAML对象
+
+    Returns:
+        规范化后的字节串
+    """
+    text = json.dumps(_canonical(value), separators=(',', ':'),
+                      ensure_ascii=False, default=_encode_special)
+    return text.encode('utf-8', 'surrogatepass')
+
+
+def _digest(data: bytes) -> bytes:
+    return hashlib.blake2b(data, digest_size=_DIGEST_SIZE).digest()
+
+
+def _scalar_bytes(value: Any) -> bytes:
+    """
+    标量的规范编码，带类型前缀（1、1.0、True、"1"互不相同）
+    常见类型直接编码，其余类型（如YAML日期）使用canonical_bytes
+    """
+    value_type = type(value)
+    if value_type is str:
+        return b's' + value.encode('utf-8', 'surrogatepass')
+    if value_type is bool:
+        return b'b1' if value else b'b0'
+    if value_type is int:
+        return b'i' + str(value).encode()
+    if value is None:
+        return b'n'
+    if value_type is float:
+        return b'f' + repr(value).encode()
+    return b'j' + canonical_bytes(value)
+
+
+def build_merkle_tree(doc: Any, max_depth: int = MERKLE_TREE_DEPTH) -> MerkleNode:
+    """
+    计算文档的Merkle树
+    深度不超过max_depth的值逐层计算哈希并保留子节点，
+    更深的子树整体序列化后计算一次哈希，控制计算量和内存占用
+
+    Args:
+        doc: YAML文档对象
+        max_depth: 保留子节点哈希的最大深度
+
+    Returns:
+        根节点 (摘要, 子节点)
+    """
+    return _build_node(doc, 0, max_depth)
+
+
+def _build_node(value: Any, depth: int, max_depth: int) -> MerkleNode:
+    """计算一个节点"""
+    if isinstance(value, dict) and depth < max_depth:
+        children = {}
+        parts = []
+        for key, child in value.items():
+            node = _build_node(child, depth + 1, max_depth)
+            children[key] = node
+            key_bytes = _scalar_bytes(key)
+            # 键带长度前缀，任意键内容都不会与后面的摘要混淆
+            parts.append(b'%d:' % len(key_bytes) + key_bytes + node[0])
+        parts.sort()
+        return (_digest(b'{' + b''.join(parts)), children)
+
+    if isinstance(value, list) and depth < max_depth:
+        children = [_build_node(child, depth + 1, max_depth) for child in value]
+        return (_digest(b'[' + b''.join(node[0] for node in children)), children)
+
+    if isinstance(value, (dict, list)):
+        # 超出最大深度的子树整体序列化
+        return (_digest(b'=' + canonical_bytes(value)), None)
+    return (_digest(b'.' + _scalar_bytes(value)), None)
+
+
+def merkle_digest(doc: Any) -> str:
+    """
+    计算文档的Merkle根摘要
+
+    Args:
+        doc: YAML文档对象
+
+    Returns:
+        十六进制摘要字符串
+    """
+    return build_merkle_tree(doc)[0].hex()
+
+
+def subtrees_match(tree1: Optional[MerkleNode], tree2: Optional[MerkleNode], steps: Tuple) -> bool:
+    """
+    沿键路径向下比较两棵Merkle树，判断该路径的值是否一定相同
+    路径上任一层（含目标节点）摘要相同，或两侧都不存在该路径时返回True；
+    无法判断（如路径超出保留深度）时返回False，由调用方提取值比较
+
+    Args:
+        tree1: 文档1的Merkle树
+        tree2: 文档2的Merkle树
+        steps: 编译后的键路径步骤（compile_key_path的结果，不含通配）
+
+    Returns:
+        是否可以确定值相同
+    """
+    node1, node2 = tree1, tree2
+    for step in steps:
+        if node1[0] == node2[0]:
+            return True
+
+        children1, children2 = node1[1], node2[1]
+        if children1 is None or children2 is None:
+            return False
+
+        node1 = _child(children1, step)
+        node2 = _child(children2, step)
+        if node1 is _MISSING and node2 is _MISSING:
+            # 两侧都不存在该路径，提取结果均为None
+            return True
+        if node1 is _MISSING or node2 is _MISSING:
+            return False
+
+    return node1[0] == node2[0]
+
+
+_MISSING = object()
+
+
+def _child(children: Any, step: Any) -> Any:
+    """
+    获取子节点
+    返回 _MISSING 表示该路径在文档中不存在（提取结果必为None）
+    """
+    if isinstance(children, dict):
+        if type(step) is int:
+            return _MISSING
+        return children.get(step, _MISSING)
+    if type(step) is not int or not 0 <= step < len(children):
+        return _MISSING
+    return children[step]
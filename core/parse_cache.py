@@ -0,0 +1,255 @@
+"""
+解析缓存模块
+将已解析并验证过的YAML文档持久化到磁盘，文件未变化时直接复用
+"""
+
+import os
+import zlib
+import pickle
+import hashlib
+from typing import Any, Dict, List, Optional, Tuple
+from config import PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES, PARSE_CACHE_VERIFY_HASH
+
+# 缓存格式版本，结构变化时递增，旧条目自动失效
+CACHE_FORMAT_VERSION = 4
+CACHE_ENTRY_SUFFIX = ".bin"
+
+
+class ParseCache:
+    """
+    YAML解析结果磁盘缓存
+    每个源文件对应一个缓存条目，以绝对路径 + (文件大小, mtime_ns) 作为有效性判断，
+    可选地再校验文件内容哈希。条目使用pickle序列化并zlib压缩。
+    缓存总大小超过预算时按最近使用时间淘汰（LRU）。
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None,
+                 max_bytes: Optional[int] = None,
+                 verify_hash: Optional[bool] = None):
+        """
+        Args:
+            cache_dir: 缓存目录，None表示使用配置值
+            max_bytes: 缓存大小预算（字节），None表示使用配置值
+            verify_hash: 命中时是否额外校验文件内容哈希，None表示使用配置值
+        """
+        self.cache_dir = cache_dir or PARSE_CACHE_DIR
+        self.max_bytes = PARSE_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+        self.verify_hash = PARSE_CACHE_VERIFY_HASH if verify_hash is None else verify_hash
+        self.hits = 0
+        self.misses = 0
+        self.errors = []
+
+    def fingerprint(self, file_path: str) -> Optional[Tuple[int, int, str]]:
+        """
+        计算源文件指纹，应在读取文件之前调用，并把结果同时传给get和put，
+        这样解析期间文件被修改时缓存条目记录的是旧指纹，下次会失效而不是误命中
+
+        Args:
+            file_path: 源文件路径
+
+        Returns:
+            (文件大小, mtime_ns, 内容哈希)，未启用verify_hash时哈希为空串；文件不可读返回None
+        """
+        abs_path = os.path.abspath(file_path)
+        try:
+            stat = os.stat(abs_path)
+            digest = self._file_digest(abs_path) if self.verify_hash else ""
+        except OSError:
+            return None
+        return stat.st_size, stat.st_mtime_ns, digest
+
+    def get(self, file_path: str,
+            fingerprint: Optional[Tuple[int, int, str]] = None) -> Optional[Any]:
+        """
+        读取缓存
+
+        Args:
+            file_path: 源文件路径
+            fingerprint: 读取文件前由fingerprint()得到的指纹，None表示此时计算
+
+        Returns:
+            缓存的解析结果，未命中或已失效返回None
+        """
+        abs_path = os.path.abspath(file_path)
+        entry_path = self._entry_path(abs_path)
+
+        if fingerprint is None:
+            fingerprint = self.fingerprint(abs_path)
+        if fingerprint is None:
+            self.misses += 1
+            return None
+        size, mtime_ns, digest = fingerprint
+
+        try:
+            with open(entry_path, 'rb') as f:
+                payload = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, zlib.error, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError, ValueError):
+            self.misses += 1
+            return None
+
+        if (not isinstance(payload, dict)
+                or payload.get('version') != CACHE_FORMAT_VERSION
+                or payload.get('path') != abs_path
+                or payload.get('size') != size
+                or payload.get('mtime_ns') != mtime_ns):
+            self.misses += 1
+            return None
+
+        if self.verify_hash and payload.get('digest') != digest:
+            self.misses += 1
+            return None
+
+        # 更新条目时间戳，作为LRU淘汰依据
+        try:
+            os.utime(entry_path, None)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return payload.get('value')
+
+    def put(self, file_path: str, value: Any,
+            fingerprint: Optional[Tuple[int, int, str]] = None) -> bool:
+        """
+        写入缓存
+
+        Args:
+            file_path: 源文件路径
+            value: 解析结果（必须可pickle）
+            fingerprint: 读取文件前由fingerprint()得到的指纹，None表示此时计算
+                （解析期间文件被修改时，新指纹会让旧内容的解析结果误命中）
+
+        Returns:
+            是否成功
+        """
+        abs_path = os.path.abspath(file_path)
+        entry_path = self._entry_path(abs_path)
+
+        try:
+            if fingerprint is None:
+                stat = os.stat(abs_path)
+                fingerprint = (stat.st_size, stat.st_mtime_ns,
+                               self._file_digest(abs_path) if self.verify_hash else "")
+            size, mtime_ns, digest = fingerprint
+            payload = {
+                'version': CACHE_FORMAT_VERSION,
+                'path': abs_path,
+                'size': size,
+                'mtime_ns': mtime_ns,
+                'digest': digest,
+                'value': value,
+            }
+            data = zlib.compress(pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), 1)
+
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # 先写临时文件再替换，避免并行进程读到半个条目
+            tmp_path = f"{entry_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, entry_path)
+            return True
+
+        except Exception as e:
+            self.errors.append(f"写入解析缓存失败 {file_path}: {str(e)}")
+            return False
+
+    def enforce_budget(self) -> int:
+        """
+        按LRU淘汰缓存条目，直到总大小不超过预算
+
+        Returns:
+            淘汰的条目数
+        """
+        entries = self._list_entries()
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            return 0
+
+        removed = 0
+        entries.sort(key=lambda item: item[2])
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+
+        return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取缓存统计信息
+
+        Returns:
+            {'cache_dir', 'entries', 'total_bytes', 'max_bytes', 'hits', 'misses'}
+        """
+        entries = self._list_entries()
+        return {
+            'cache_dir': self.cache_dir,
+            'entries': len(entries),
+            'total_bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def clear(self) -> int:
+        """
+        清空缓存
+
+        Returns:
+            删除的条目数
+        """
+        removed = 0
+        for path, _, _ in self._list_entries():
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+
+        self.hits = 0
+        self.misses = 0
+        return removed
+
+    def _entry_path(self, abs_path: str) -> str:
+        """根据源文件绝对路径计算缓存条目路径"""
+        name = hashlib.sha1(abs_path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, name + CACHE_ENTRY_SUFFIX)
+
+    def _list_entries(self) -> List[tuple]:
+        """列出所有缓存条目: [(路径, 大小, 最近使用时间), ...]"""
+        entries = []
+        try:
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(CACHE_ENTRY_SUFFIX):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((entry.path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            pass
+        return entries
+
+    def _file_digest(self, abs_path: str) -> str:
+        """计算文件内容哈希"""
+        digest = hashlib.sha256()
+        with open(abs_path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get_errors(self) -> List[str]:
+        """获取错误列表"""
+        return self.errors
+
+    def clear_errors(self):
+        """清除错误列表"""
+        self.errors = []
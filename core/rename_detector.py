@@ -0,0 +1,181 @@
+"""
+重命名检测模块
+比较集群时，仅存在于一侧的资源可能是被重命名或移动到其他命名空间的同一资源。
+每个资源的内容展开为 (路径, 值) 集合并计算MinHash签名，按LSH分段分桶，
+只对落入同一桶的候选对计算相似度，无需两两比较全部资源
+"""
+
+import random
+import hashlib
+from collections import defaultdict
+from typing import Any, FrozenSet, List, NamedTuple, Optional, Set
+from models.resource import Resource
+from core.deep_diff import compile_ignore_paths, advance_ignore
+from core.yaml_parser import format_key_path
+from config import (DEEP_DIFF_IGNORE_PATHS, RENAME_MINHASH_PERMUTATIONS, RENAME_LSH_BANDS,
+                    RENAME_SIMILARITY_THRESHOLD, RENAME_MAX_BUCKET_SIZE)
+
+# MinHash使用的梅森素数，大于64位哈希值的取值范围
+_PRIME = (1 << 89) - 1
+# 资源标识本身不参与相似度计算
+_IDENTITY_PATHS = ("metadata.name", "metadata.namespace")
+
+
+class RenameMatch(NamedTuple):
+    """疑似重命名的资源对"""
+    resource_left: Resource  # 仅存在于左侧的资源
+    resource_right: Resource  # 仅存在于右侧的资源
+    similarity: float  # 内容相似度（Jaccard系数，0~1）
+
+
+def content_features(yaml_content: Any, ignore_paths: tuple = ()) -> Set[int]:
+    """
+    将资源内容展开为特征集合，每个叶子的 (路径, 值) 对应一个64位哈希
+
+    Args:
+        yaml_content: 资源内容
+        ignore_paths: 不参与计算的路径（含其下所有内容），资源标识总是被忽略
+
+    Returns:
+        特征哈希集合
+    """
+    ignore_root = compile_ignore_paths(tuple(_IDENTITY_PATHS) + tuple(ignore_paths))
+    features = set()
+    stack = [((), yaml_content, (ignore_root,))]
+    while stack:
+        steps, value, ignore_nodes = stack.pop()
+        if isinstance(value, dict) and value:
+            for key, child in value.items():
+                child_ignore = advance_ignore(ignore_nodes, key, False)
+                if child_ignore is not None:
+                    stack.append((steps + (key,), child, child_ignore))
+        elif isinstance(value, list) and value:
+            for index, child in enumerate(value):
+                child_ignore = advance_ignore(ignore_nodes, index, True)
+                if child_ignore is not None:
+                    stack.append((steps + (index,), child, child_ignore))
+        else:
+            token = f"{format_key_path(steps)}={value!r}".encode('utf-8')
+            features.add(int.from_bytes(hashlib.blake2b(token, digest_size=8).digest(), 'little'))
+    return features
+
+
+class RenameDetector:
+    """
+    基于MinHash/LSH的重命名检测器
+    内容完全相同的资源先按特征集合直接配对；其余资源的签名分为若干段，
+    任意一段完全相同的两个资源成为候选对，相似度为s的资源对成为候选的概率为
+    1 - (1 - s^每段行数)^段数。同一模板生成的大量资源会共享只由公共内容决定的段，
+    这类过大的桶不产生候选对，只靠区分度高的段召回
+    """
+
+    def __init__(self, threshold: Optional[float] = None, permutations: Optional[int] = None,
+                 bands: Optional[int] = None, ignore_paths: Optional[List[str]] = None):
+        """
+        Args:
+            threshold: 相似度阈值，None表示使用RENAME_SIMILARITY_THRESHOLD
+            permutations: MinHash签名长度，None表示使用RENAME_MINHASH_PERMUTATIONS
+            bands: LSH段数（需整除签名长度），None表示使用RENAME_LSH_BANDS
+            ignore_paths: 不参与相似度计算的路径，None表示使用DEEP_DIFF_IGNORE_PATHS
+        """
+        self.threshold = RENAME_SIMILARITY_THRESHOLD if threshold is None else threshold
+        self.permutations = RENAME_MINHASH_PERMUTATIONS if permutations is None else permutations
+        self.bands = RENAME_LSH_BANDS if bands is None else bands
+        if self.permutations % self.bands:
+            raise ValueError(f"LSH段数 {self.bands} 不能整除签名长度 {self.permutations}")
+        self.rows = self.permutations // self.bands
+        self.ignore_paths = tuple(DEEP_DIFF_IGNORE_PATHS if ignore_paths is None else ignore_paths)
+        self.max_bucket_size = RENAME_MAX_BUCKET_SIZE
+        self.candidate_pairs = 0  # 最近一次检测中计算了相似度的候选对数
+
+        # 固定种子，同样的内容总是得到同样的签名
+        rng = random.Random(0x5EED)
+        self._coefficients = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME))
+                              for _ in range(self.permutations)]
+
+    def signature(self, features: FrozenSet[int]) -> tuple:
+        """
+        计算特征集合的MinHash签名
+
+        Args:
+            features: content_features的返回值（非空）
+
+        Returns:
+            长度为permutations的签名元组
+        """
+        return tuple(min((a * feature + b) % _PRIME for feature in features)
+                     for a, b in self._coefficients)
+
+    def detect(self, left: List[Resource], right: List[Resource]) -> List[RenameMatch]:
+        """
+        在仅存在于左侧和仅存在于右侧的资源之间寻找疑似重命名
+        只匹配类型相同的资源，每个资源最多出现在一个结果中（按相似度从高到低贪心分配）
+
+        Args:
+            left: 仅存在于左侧的资源
+            right: 仅存在于右侧的资源
+
+        Returns:
+            相似度不低于阈值的资源对，按左侧资源的顺序排列
+        """
+        self.candidate_pairs = 0
+        if not left or not right:
+            return []
+
+        features_left = [frozenset(content_features(r.yaml_content, self.ignore_paths)) for r in left]
+        features_right = [frozenset(content_features(r.yaml_content, self.ignore_paths)) for r in right]
+
+        # 内容完全相同（只改了名称或命名空间）的资源直接配对
+        exact = defaultdict(list)
+        for j, (resource, features) in enumerate(zip(right, features_right)):
+            if features:
+                exact[(resource.kind, features)].append(j)
+        matches = {}
+        used_right = set()
+        for i, (resource, features) in enumerate(zip(left, features_left)):
+            same = exact.get((resource.kind, features))
+            if same:
+                j = same.pop(0)
+                used_right.add(j)
+                matches[i] = RenameMatch(left[i], right[j], 1.0)
+
+        # 其余右侧资源按 (类型, 段序号, 段内容) 分桶
+        buckets = defaultdict(list)
+        for j, (resource, features) in enumerate(zip(right, features_right)):
+            if features and j not in used_right:
+                for band_key in self._band_keys(resource.kind, features):
+                    buckets[band_key].append(j)
+
+        scored = []
+        for i, (resource, features) in enumerate(zip(left, features_left)):
+            if not features or i in matches:
+                continue
+            candidates = set()
+            for band_key in self._band_keys(resource.kind, features):
+                bucket = buckets.get(band_key, ())
+                if len(bucket) <= self.max_bucket_size:
+                    candidates.update(bucket)
+            self.candidate_pairs += len(candidates)
+            for j in candidates:
+                other = features_right[j]
+                similarity = len(features & other) / len(features | other)
+                if similarity >= self.threshold:
+                    scored.append((similarity, i, j))
+
+        # 相似度高的先分配，相同时按出现顺序，结果稳定
+        scored.sort(key=lambda item: (-item[0], item[1], item[2]))
+        used_left = set(matches)
+        for similarity, i, j in scored:
+            if i in used_left or j in used_right:
+                continue
+            used_left.add(i)
+            used_right.add(j)
+            matches[i] = RenameMatch(left[i], right[j], similarity)
+
+        return [matches[i] for i in sorted(matches)]
+
+    def _band_keys(self, kind: str, features: FrozenSet[int]) -> List[tuple]:
+        """签名的各段，带上类型和段序号作为桶的键"""
+        signature = self.signature(features)
+        return [(kind, band, signature[band * self.rows:(band + 1) * self.rows])
+                for band in range(self.bands)]
@@ -0,0 +1,451 @@
+"""
+资源目录模块
+将多个集群的解析结果及指定键路径的值写入本地SQLite数据库，
+跨集群查询（如"哪些集群的Application X副本数大于4"）直接通过SQL完成，无需重新解析
+"""
+
+import os
+import json
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from models.resource import Resource
+from core.yaml_parser import (YAMLParser, compile_key_path, format_key_path, extract_by_steps,
+                              extract_fanout_batch, is_wildcard_path, ANY_INDEX, ANY_KEY)
+from utils.file_utils import ScanFilter, scan_yaml_entries
+from config import CATALOG_DB_PATH
+
+# 数据库结构版本，结构变化时递增，旧数据库会被重建
+CATALOG_SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS clusters (
+    cluster TEXT PRIMARY KEY,
+    source_path TEXT NOT NULL,
+    key_paths TEXT NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    cluster TEXT NOT NULL,
+    abs_file_path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (cluster, abs_file_path)
+);
+CREATE TABLE IF NOT EXISTS resources (
+    id INTEGER PRIMARY KEY,
+    cluster TEXT NOT NULL,
+    namespace TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    name TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    abs_file_path TEXT NOT NULL,
+    resource_type_folder TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_resources_identity ON resources (cluster, namespace, kind, name);
+CREATE INDEX IF NOT EXISTS idx_resources_kind_name ON resources (kind, name);
+CREATE INDEX IF NOT EXISTS idx_resources_file ON resources (cluster, abs_file_path);
+CREATE TABLE IF NOT EXISTS resource_values (
+    resource_id INTEGER NOT NULL REFERENCES resources (id) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    value_text TEXT,
+    value_num REAL,
+    value_json TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_values_path_text ON resource_values (path, value_text);
+CREATE INDEX IF NOT EXISTS idx_values_path_num ON resource_values (path, value_num);
+CREATE INDEX IF NOT EXISTS idx_values_resource ON resource_values (resource_id);
+"""
+
+# 查询条件支持的比较运算符
+_COMPARE_OPERATORS = ('=', '!=', '>', '>=', '<', '<=')
+
+
+class ResourceCatalog:
+    """
+    多集群资源目录（SQLite）
+    每个资源保存标识信息和若干键路径的值；
+    重新导入时按文件大小和mtime增量更新，只重新解析变化的文件
+    """
+
+    def __init__(self, db_path: Optional[str] = None, parser: Optional[YAMLParser] = None):
+        """
+        Args:
+            db_path: 数据库文件路径，None表示使用配置值，":memory:"表示内存数据库
+            parser: 用于解析YAML的解析器，None表示新建串行解析器
+        """
+        self.db_path = db_path or CATALOG_DB_PATH
+        self.parser = parser or YAMLParser(workers=1)
+        self.errors = []
+
+        if self.db_path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        # 含通配的键路径条件按matches_key_pattern匹配已保存的具体路径
+        self.conn.create_function("key_matches", 2, matches_key_pattern, deterministic=True)
+        self._init_schema()
+
+    def _init_schema(self):
+        """创建表结构，版本不一致时重建"""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version not in (0, CATALOG_SCHEMA_VERSION):
+            with self.conn:
+                for table in ('resource_values', 'resources', 'files', 'clusters'):
+                    self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+        with self.conn:
+            self.conn.executescript(_SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {CATALOG_SCHEMA_VERSION}")
+
+    def ingest_cluster(self, cluster_path: str, key_paths: Optional[Sequence[str]] = None,
+                       scan_filter: Optional[ScanFilter] = None,
+                       cluster_name: Optional[str] = None) -> Dict[str, int]:
+        """
+        导入（或增量更新）一个集群文件夹
+        大小和mtime均未变化的文件直接跳过；导入的键路径配置变化时整个集群重新导入
+
+        Args:
+            cluster_path: 集群文件夹路径
+            key_paths: 要保存的键路径列表（支持通配），None或空表示保存所有标量叶子节点
+            scan_filter: 目录扫描过滤条件
+            cluster_name: 集群名，None表示取文件夹名；
+                          同名集群已从其他路径导入时不导入并记录错误，需另外指定集群名
+
+        Returns:
+            {'parsed': 重新解析的文件数, 'skipped': 未变化的文件数,
+             'removed': 已删除的文件数, 'resources': 写入的资源数}
+        """
+        cluster_path = os.path.abspath(cluster_path)
+        cluster_name = cluster_name or os.path.basename(cluster_path)
+        key_paths = [format_key_path(compile_key_path(p)) for p in (key_paths or []) if p]
+        key_paths_sig = json.dumps(key_paths)
+        empty_stats = {'parsed': 0, 'skipped': 0, 'removed': 0, 'resources': 0}
+
+        if not os.path.isdir(cluster_path):
+            self.errors.append(f"不是有效的目录: {cluster_path}")
+            return empty_stats
+
+        row = self.conn.execute(
+            "SELECT key_paths, source_path FROM clusters WHERE cluster = ?", (cluster_name,)
+        ).fetchone()
+        if row is not None and row[1] != cluster_path:
+            self.errors.append(f"集群名 {cluster_name} 已用于 {row[1]}，"
+                               f"导入 {cluster_path} 时请指定其他集群名")
+            return empty_stats
+
+        entries = scan_yaml_entries(cluster_path, scan_filter)
+
+        if row is not None and row[0] == key_paths_sig:
+            known = {
+                path: (size, mtime_ns) for path, size, mtime_ns in self.conn.execute(
+                    "SELECT abs_file_path, size, mtime_ns FROM files WHERE cluster = ?",
+                    (cluster_name,)
+                )
+            }
+        else:
+            # 首次导入或键路径配置变化，整个集群重新导入
+            known = {}
+            with self.conn:
+                self._delete_files(cluster_name, None)
+
+        current = {os.path.abspath(entry.path): entry for entry in entries}
+        changed = [entry for path, entry in current.items()
+                   if known.get(path) != (entry.size, entry.mtime_ns)]
+        removed = [path for path in known if path not in current]
+
+        stats = {'parsed': 0, 'skipped': len(current) - len(changed),
+                 'removed': len(removed), 'resources': 0}
+
+        with self.conn:
+            self._delete_files(cluster_name, removed + [os.path.abspath(e.path) for e in changed])
+
+            for entry in changed:
+                abs_path = os.path.abspath(entry.path)
+                try:
+                    resources = self.parser.parse_yaml_file(entry.path, cluster_name, cluster_path)
+                except Exception as e:
+                    self.errors.append(f"解析文件失败 {entry.path}: {str(e)}")
+                    resources = []
+                self.errors.extend(self.parser.get_errors())
+                self.parser.clear_errors()
+
+                for resource in resources:
+                    self._insert_resource(resource, key_paths)
+                stats['resources'] += len(resources)
+                stats['parsed'] += 1
+
+                # 解析失败的文件同样记录指纹，文件未修改前不再重复解析
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (cluster, abs_file_path, size, mtime_ns) "
+                    "VALUES (?, ?, ?, ?)",
+                    (cluster_name, abs_path, entry.size, entry.mtime_ns)
+                )
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO clusters (cluster, source_path, key_paths, ingested_at) "
+                "VALUES (?, ?, ?, ?)",
+                (cluster_name, cluster_path, key_paths_sig, time.time())
+            )
+
+        return stats
+
+    def _delete_files(self, cluster_name: str, abs_paths: Optional[List[str]]):
+        """删除指定文件（None表示整个集群）的资源和文件记录"""
+        if abs_paths is None:
+            self.conn.execute("DELETE FROM resources WHERE cluster = ?", (cluster_name,))
+            self.conn.execute("DELETE FROM files WHERE cluster = ?", (cluster_name,))
+            return
+
+        for abs_path in abs_paths:
+            self.conn.execute(
+                "DELETE FROM resources WHERE cluster = ? AND abs_file_path = ?",
+                (cluster_name, abs_path)
+            )
+            self.conn.execute(
+                "DELETE FROM files WHERE cluster = ? AND abs_file_path = ?",
+                (cluster_name, abs_path)
+            )
+
+    def _insert_resource(self, resource: Resource, key_paths: List[str]):
+        """写入一个资源及其键路径的值"""
+        cursor = self.conn.execute(
+            "INSERT INTO resources (cluster, namespace, kind, name, file_path, abs_file_path, "
+            "resource_type_folder) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (resource.cluster, resource.namespace, resource.kind, resource.name,
+             resource.file_path, os.path.abspath(resource.abs_file_path),
+             resource.resource_type_folder)
+        )
+        resource_id = cursor.lastrowid
+
+        if key_paths:
+            values = []
+            for key_path in key_paths:
+                if is_wildcard_path(key_path):
+                    values.extend(extract_fanout_batch([resource.yaml_content], key_path)[0])
+                else:
+                    values.append((key_path, extract_by_steps(resource.yaml_content,
+                                                              compile_key_path(key_path))))
+        else:
+            values = flatten_scalar_values(resource.yaml_content)
+
+        self.conn.executemany(
+            "INSERT INTO resource_values (resource_id, path, value_text, value_num, value_json) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [(resource_id, path) + _encode_value(value) for path, value in values if value is not None]
+        )
+
+    def query(self, clusters: Optional[Iterable[str]] = None,
+              namespaces: Optional[Iterable[str]] = None,
+              kinds: Optional[Iterable[str]] = None,
+              names: Optional[Iterable[str]] = None,
+              conditions: Optional[List[Tuple[str, str, Any]]] = None,
+              paths: Optional[Iterable[str]] = None,
+              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        查询资源
+        同一字段内的多个值取并集，不同字段及各条件之间取交集，None表示不限制
+
+        Args:
+            clusters: 集群名列表
+            namespaces: 命名空间列表
+            kinds: 资源类型列表
+            names: 资源名列表
+            conditions: 键路径条件 [(键路径, 运算符, 值), ...]，
+                        运算符为 = != > >= < <= like exists；数值比较使用数值列；
+                        含通配的键路径（如 spec.containers[*].image）任一具体路径满足即可
+            paths: 结果中返回哪些键路径的值（支持通配），None表示返回全部已保存的值
+            limit: 最多返回的资源数
+
+        Returns:
+            [{'cluster', 'namespace', 'kind', 'name', 'file_path', 'abs_file_path',
+              'resource_type_folder', 'values': {键路径: 值}}, ...]，按集群、命名空间、类型、名称排序
+        """
+        sql = ["SELECT r.id, r.cluster, r.namespace, r.kind, r.name, r.file_path, "
+               "r.abs_file_path, r.resource_type_folder FROM resources r WHERE 1 = 1"]
+        params = []
+
+        for column, values in (('cluster', clusters), ('namespace', namespaces),
+                               ('kind', kinds), ('name', names)):
+            if values is None:
+                continue
+            values = list(values)
+            sql.append(f"AND r.{column} IN ({', '.join('?' * len(values)) or 'NULL'})")
+            params.extend(values)
+
+        for key_path, operator, value in conditions or []:
+            clause, clause_params = self._condition_clause(key_path, operator, value)
+            sql.append(f"AND EXISTS (SELECT 1 FROM resource_values v "
+                       f"WHERE v.resource_id = r.id AND {clause})")
+            params.extend(clause_params)
+
+        sql.append("ORDER BY r.cluster, r.namespace, r.kind, r.name, r.id")
+        if limit is not None:
+            sql.append("LIMIT ?")
+            params.append(int(limit))
+
+        records = []
+        for row in self.conn.execute(" ".join(sql), params):
+            records.append({
+                'id': row[0], 'cluster': row[1], 'namespace': row[2], 'kind': row[3],
+                'name': row[4], 'file_path': row[5], 'abs_file_path': row[6],
+                'resource_type_folder': row[7], 'values': {},
+            })
+
+        self._fill_values(records, paths)
+        return records
+
+    def _condition_clause(self, key_path: str, operator: str, value: Any) -> Tuple[str, list]:
+        """将一个键路径条件转换为SQL片段，含通配的键路径匹配任一具体路径"""
+        path = format_key_path(compile_key_path(key_path))
+        path_clause = "key_matches(v.path, ?)" if is_wildcard_path(path) else "v.path = ?"
+        operator = operator.strip().lower()
+
+        if operator == 'exists':
+            return path_clause, [path]
+        if operator == 'like':
+            return f"{path_clause} AND v.value_text LIKE ?", [path, str(value)]
+        if operator not in _COMPARE_OPERATORS:
+            raise ValueError(f"不支持的运算符: {operator}")
+
+        if _is_number(value):
+            return f"{path_clause} AND v.value_num {operator} ?", [path, value]
+        return f"{path_clause} AND v.value_text {operator} ?", [path, _encode_value(value)[0]]
+
+    def _fill_values(self, records: List[Dict[str, Any]], paths: Optional[Iterable[str]]):
+        """批量读取查询结果的键路径值"""
+        by_id = {record['id']: record for record in records}
+        if not by_id:
+            return
+
+        path_filter = ""
+        path_params = []
+        if paths is not None:
+            normalized = [format_key_path(compile_key_path(p)) for p in paths if p]
+            exact = [p for p in normalized if not is_wildcard_path(p)]
+            patterns = [p for p in normalized if is_wildcard_path(p)]
+            clauses = [f"path IN ({', '.join('?' * len(exact)) or 'NULL'})"]
+            clauses.extend("key_matches(path, ?)" for _ in patterns)
+            path_filter = f" AND ({' OR '.join(clauses)})"
+            path_params = exact + patterns
+
+        ids = list(by_id)
+        # SQLite参数数量有上限，分批查询
+        for start in range(0, len(ids), 500):
+            batch = ids[start:start + 500]
+            sql = (f"SELECT resource_id, path, value_json FROM resource_values "
+                   f"WHERE resource_id IN ({', '.join('?' * len(batch))}){path_filter}")
+            for resource_id, path, value_json in self.conn.execute(sql, batch + path_params):
+                by_id[resource_id]['values'][path] = json.loads(value_json)
+
+    def list_clusters(self) -> List[Dict[str, Any]]:
+        """
+        列出已导入的集群
+
+        Returns:
+            [{'cluster', 'source_path', 'key_paths', 'ingested_at', 'resources'}, ...]
+        """
+        rows = self.conn.execute(
+            "SELECT c.cluster, c.source_path, c.key_paths, c.ingested_at, "
+            "(SELECT COUNT(*) FROM resources r WHERE r.cluster = c.cluster) "
+            "FROM clusters c ORDER BY c.cluster"
+        )
+        return [
+            {'cluster': cluster, 'source_path': source_path, 'key_paths': json.loads(key_paths),
+             'ingested_at': ingested_at, 'resources': count}
+            for cluster, source_path, key_paths, ingested_at, count in rows
+        ]
+
+    def remove_cluster(self, cluster_name: str):
+        """从目录中删除一个集群"""
+        with self.conn:
+            self._delete_files(cluster_name, None)
+            self.conn.execute("DELETE FROM clusters WHERE cluster = ?", (cluster_name,))
+
+    def close(self):
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def get_errors(self) -> List[str]:
+        """获取错误列表"""
+        return self.errors
+
+    def clear_errors(self):
+        """清除错误列表"""
+        self.errors = []
+
+
+def flatten_scalar_values(yaml_obj: Any) -> List[Tuple[str, Any]]:
+    """
+    将YAML对象展开为 (键路径, 标量值) 列表，键路径格式与extract_value_by_path一致
+
+    Args:
+        yaml_obj: YAML对象
+
+    Returns:
+        [(键路径, 值), ...]，按文档顺序
+    """
+    values = []
+    stack = [((), yaml_obj)]
+    while stack:
+        steps, current = stack.pop()
+        if isinstance(current, dict):
+            children = [(steps + (str(key),), value) for key, value in current.items()]
+        elif isinstance(current, list):
+            children = [(steps + (idx,), value) for idx, value in enumerate(current)]
+        else:
+            if steps:
+                values.append((format_key_path(steps), current))
+            continue
+        stack.extend(reversed(children))
+    return values
+
+
+def matches_key_pattern(concrete_path: str, pattern: str) -> bool:
+    """
+    判断具体键路径是否匹配含通配的键路径
+
+    Args:
+        concrete_path: 具体键路径，如 spec.containers[0].image
+        pattern: 含通配的键路径，如 spec.containers[*].image
+
+    Returns:
+        是否匹配
+    """
+    concrete_steps = compile_key_path(concrete_path)
+    pattern_steps = compile_key_path(pattern)
+    if len(concrete_steps) != len(pattern_steps):
+        return False
+
+    for concrete, expected in zip(concrete_steps, pattern_steps):
+        if expected is ANY_INDEX:
+            if type(concrete) is not int:
+                return False
+        elif expected is ANY_KEY:
+            if type(concrete) is int:
+                return False
+        elif concrete != expected:
+            return False
+    return True
+
+
+def _is_number(value: Any) -> bool:
+    """是否为数值（布尔值除外）"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _encode_value(value: Any) -> Tuple[Optional[str], Optional[float], str]:
+    """
+    将值编码为 (文本, 数值, JSON)
+    文本列用于等值和LIKE查询，数值列用于大小比较，JSON列用于还原原始值
+    """
+    value_json = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    if isinstance(value, str):
+        text = value
+    elif isinstance(value, bool):
+        text = "true" if value else "false"
+    elif _is_number(value):
+        text = str(value)
+    else:
+        text = value_json
+    number = float(value) if _is_number(value) else None
+    return text, number, value_json
@@ -0,0 +1,191 @@
+"""
+资源索引模块
+解析完成后一次性建立索引，按标识、类型、命名空间、资源类型文件夹和标签快速查询资源
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from models.resource import Resource
+
+# 资源标识: (namespace, kind, name)
+ResourceKey = Tuple[str, str, str]
+
+
+def resource_key(resource: Resource) -> ResourceKey:
+    """获取资源在集群内的唯一标识 (namespace, kind, name)"""
+    return (resource.namespace, resource.kind, resource.name)
+
+
+class ResourceIndex:
+    """
+    资源索引
+    资源按加入顺序保存，各维度的倒排表只保存资源序号，
+    查询结果始终按加入顺序返回。
+    标识重复时后加入的资源生效（与此前构建映射字典的行为一致），重复项会被记录下来。
+    """
+
+    def __init__(self, resources: Iterable[Resource] = ()):
+        """
+        Args:
+            resources: 资源列表或资源迭代器
+        """
+        self.resources = []
+        self._by_key = {}  # (namespace, kind, name) -> 序号
+        self._by_kind_name = {}  # (kind, name) -> 序号
+        self._by_kind = {}
+        self._by_namespace = {}
+        self._by_type_folder = {}
+        self._by_label = {}  # (标签key, 标签value) -> [序号, ...]
+        self._by_label_key = {}  # 标签key -> [序号, ...]
+        self._duplicates = {}  # 重复标识 -> [序号, ...]
+
+        for resource in resources:
+            self.add(resource)
+
+    def add(self, resource: Resource):
+        """
+        加入一个资源
+
+        Args:
+            resource: 资源对象
+        """
+        position = len(self.resources)
+        self.resources.append(resource)
+
+        key = resource_key(resource)
+        previous = self._by_key.get(key)
+        if previous is not None:
+            self._duplicates.setdefault(key, [previous]).append(position)
+        self._by_key[key] = position
+        self._by_kind_name[(resource.kind, resource.name)] = position
+
+        self._by_kind.setdefault(resource.kind, []).append(position)
+        self._by_namespace.setdefault(resource.namespace, []).append(position)
+        self._by_type_folder.setdefault(resource.resource_type_folder, []).append(position)
+
+        labels = self._get_labels(resource)
+        for label_key, label_value in labels.items():
+            self._by_label.setdefault((label_key, str(label_value)), []).append(position)
+            self._by_label_key.setdefault(label_key, []).append(position)
+
+    def get(self, namespace: str, kind: str, name: str) -> Optional[Resource]:
+        """
+        按标识查询资源
+
+        Returns:
+            资源对象，不存在返回None
+        """
+        position = self._by_key.get((namespace, kind, name))
+        return None if position is None else self.resources[position]
+
+    def get_by_kind_name(self, kind: str, name: str) -> Optional[Resource]:
+        """
+        按类型和名称查询资源（忽略命名空间，用于单文件比较）
+
+        Returns:
+            资源对象，不存在返回None
+        """
+        position = self._by_kind_name.get((kind, name))
+        return None if position is None else self.resources[position]
+
+    def by_kind(self, kind: str) -> List[Resource]:
+        """查询指定类型的资源"""
+        return self._resolve(self._by_kind.get(kind, ()))
+
+    def by_namespace(self, namespace: str) -> List[Resource]:
+        """查询指定命名空间的资源"""
+        return self._resolve(self._by_namespace.get(namespace, ()))
+
+    def by_type_folder(self, folder: str) -> List[Resource]:
+        """查询指定资源类型文件夹下的资源"""
+        return self._resolve(self._by_type_folder.get(folder, ()))
+
+    def by_label(self, label_key: str, label_value: Optional[str] = None) -> List[Resource]:
+        """
+        按标签查询资源
+
+        Args:
+            label_key: 标签key
+            label_value: 标签值，None表示只要求存在该标签
+
+        Returns:
+            资源列表
+        """
+        if label_value is None:
+            return self._resolve(self._by_label_key.get(label_key, ()))
+        return self._resolve(self._by_label.get((label_key, str(label_value)), ()))
+
+    def query(self, kinds: Optional[Iterable[str]] = None,
+              namespaces: Optional[Iterable[str]] = None,
+              type_folders: Optional[Iterable[str]] = None,
+              labels: Optional[Dict[str, Optional[str]]] = None) -> List[Resource]:
+        """
+        组合查询：同一条件内取并集，不同条件之间取交集，None表示不限制
+
+        Args:
+            kinds: 资源类型列表
+            namespaces: 命名空间列表
+            type_folders: 资源类型文件夹列表
+            labels: {标签key: 标签值}，值为None表示只要求存在该标签
+
+        Returns:
+            按加入顺序排列的资源列表
+        """
+        selected = None
+
+        for postings, values in ((self._by_kind, kinds),
+                                 (self._by_namespace, namespaces),
+                                 (self._by_type_folder, type_folders)):
+            if values is None:
+                continue
+            positions = set()
+            for value in values:
+                positions.update(postings.get(value, ()))
+            selected = positions if selected is None else selected & positions
+
+        for label_key, label_value in (labels or {}).items():
+            if label_value is None:
+                positions = set(self._by_label_key.get(label_key, ()))
+            else:
+                positions = set(self._by_label.get((label_key, str(label_value)), ()))
+            selected = positions if selected is None else selected & positions
+
+        if selected is None:
+            return list(self.resources)
+        return self._resolve(sorted(selected))
+
+    def kinds(self) -> List[str]:
+        """获取所有资源类型"""
+        return list(self._by_kind)
+
+    def namespaces(self) -> List[str]:
+        """获取所有命名空间"""
+        return list(self._by_namespace)
+
+    def get_duplicates(self) -> Dict[ResourceKey, List[Resource]]:
+        """
+        获取标识重复的资源
+
+        Returns:
+            {(namespace, kind, name): [按加入顺序排列的资源, ...]}
+        """
+        return {key: self._resolve(positions) for key, positions in self._duplicates.items()}
+
+    def _resolve(self, positions: Iterable[int]) -> List[Resource]:
+        """将序号转换为资源列表"""
+        resources = self.resources
+        return [resources[position] for position in positions]
+
+    def _get_labels(self, resource: Resource) -> Dict:
+        """获取资源的metadata.labels，内容已释放或格式不正确时返回空字典"""
+        metadata = resource.yaml_content.get('metadata') if resource.yaml_content else None
+        labels = metadata.get('labels') if isinstance(metadata, dict) else None
+        return labels if isinstance(labels, dict) else {}
+
+    def __len__(self) -> int:
+        return len(self.resources)
+
+    def __iter__(self) -> Iterator[Resource]:
+        return iter(self.resources)
+
+    def __contains__(self, key: ResourceKey) -> bool:
+        return key in self._by_key
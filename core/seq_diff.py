@@ -0,0 +1,236 @@
+"""
+序列比较模块
+按Myers O(ND)算法对齐两个序列（列表元素或文本行），以及按合并键匹配列表元素。
+元素先映射为哈希值（列表元素使用Merkle摘要），算法只比较整数，
+两侧只有少量差异时耗时接近线性
+"""
+
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+from core.yaml_parser import ListItemKey
+from core.merkle import merkle_digest
+from config import SEQ_DIFF_MAX_COST
+
+# 对齐操作类型，与difflib.SequenceMatcher.get_opcodes一致
+OP_EQUAL = "equal"
+OP_DELETE = "delete"
+OP_INSERT = "insert"
+OP_REPLACE = "replace"
+
+
+def align_sequences(seq1: Sequence[Hashable], seq2: Sequence[Hashable],
+                    max_cost: Optional[int] = None) -> List[Tuple[str, int, int, int, int]]:
+    """
+    对齐两个序列，找出最短编辑脚本
+    先去掉公共前缀和后缀，中间部分按Myers算法求最长公共子序列
+
+    Args:
+        seq1: 左侧序列，元素需可哈希
+        seq2: 右侧序列
+        max_cost: 编辑距离上限，超出时中间部分整体作为替换，None表示使用SEQ_DIFF_MAX_COST
+
+    Returns:
+        [(操作, i1, i2, j1, j2), ...]，含义同difflib的opcodes：
+        seq1[i1:i2]与seq2[j1:j2]相同（equal）、被删除（delete）、插入（insert）或替换（replace）
+    """
+    max_cost = SEQ_DIFF_MAX_COST if max_cost is None else max_cost
+    # 元素映射为整数，Myers内层循环只做整数比较
+    ids = {}
+    a = [ids.setdefault(item, len(ids)) for item in seq1]
+    b = [ids.setdefault(item, len(ids)) for item in seq2]
+
+    n, m = len(a), len(b)
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < n - prefix and suffix < m - prefix and a[n - 1 - suffix] == b[m - 1 - suffix]:
+        suffix += 1
+
+    middle = _myers_matches(a[prefix:n - suffix], b[prefix:m - suffix], max_cost)
+    matches = [(i, i) for i in range(prefix)]
+    matches.extend((i + prefix, j + prefix) for i, j in middle)
+    matches.extend((n - suffix + i, m - suffix + i) for i in range(suffix))
+    return _matches_to_opcodes(matches, n, m)
+
+
+def _myers_matches(a: List[int], b: List[int], max_cost: int) -> List[Tuple[int, int]]:
+    """
+    Myers贪心算法，返回最长公共子序列中的下标对 [(i, j), ...]
+    编辑距离超过max_cost时返回空列表（整体替换）
+    """
+    n, m = len(a), len(b)
+    if not n or not m:
+        return []
+
+    limit = min(n + m, max_cost)
+    offset = limit + 1
+    v = [0] * (2 * limit + 3)
+    trace = []
+    found = False
+
+    for d in range(limit + 1):
+        # 只保存本轮可能读取的对角线范围
+        trace.append(v[offset - d - 1:offset + d + 2])
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and v[offset + k - 1] < v[offset + k + 1]):
+                x = v[offset + k + 1]
+            else:
+                x = v[offset + k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            v[offset + k] = x
+            if x >= n and y >= m:
+                found = True
+                break
+        if found:
+            break
+
+    if not found:
+        return []
+
+    # 从终点沿保存的对角线回溯
+    matches = []
+    x, y = n, m
+    for d in range(len(trace) - 1, -1, -1):
+        saved = trace[d]
+        base = d + 1  # saved[base + k] 对应对角线k
+        k = x - y
+        if k == -d or (k != d and saved[base + k - 1] < saved[base + k + 1]):
+            prev_k = k + 1
+        else:
+            prev_k = k - 1
+        prev_x = saved[base + prev_k] if d > 0 else 0
+        prev_y = prev_x - prev_k if d > 0 else 0
+        while x > prev_x and y > prev_y:
+            x -= 1
+            y -= 1
+            matches.append((x, y))
+        x, y = prev_x, prev_y
+
+    matches.reverse()
+    return matches
+
+
+def _matches_to_opcodes(matches: List[Tuple[int, int]], n: int,
+                        m: int) -> List[Tuple[str, int, int, int, int]]:
+    """将有序的匹配下标对转换为opcodes"""
+    opcodes = []
+    i = j = 0
+    position = 0
+    while position <= len(matches):
+        if position < len(matches):
+            mi, mj = matches[position]
+        else:
+            mi, mj = n, m
+        if i < mi and j < mj:
+            opcodes.append((OP_REPLACE, i, mi, j, mj))
+        elif i < mi:
+            opcodes.append((OP_DELETE, i, mi, j, j))
+        elif j < mj:
+            opcodes.append((OP_INSERT, i, i, j, mj))
+        if position == len(matches):
+            break
+        # 合并连续的匹配
+        end = position
+        while (end + 1 < len(matches) and matches[end + 1][0] == matches[end][0] + 1
+               and matches[end + 1][1] == matches[end][1] + 1):
+            end += 1
+        length = end - position + 1
+        opcodes.append((OP_EQUAL, mi, mi + length, mj, mj + length))
+        i, j = mi + length, mj + length
+        position = end + 1
+    return opcodes
+
+
+def find_merge_key(list1: list, list2: list, candidates: Sequence[str]) -> Optional[str]:
+    """
+    选择两个列表共用的合并键
+    所有元素都是包含该键的映射、键值为标量且在各自列表中不重复时才可使用
+
+    Args:
+        list1: 左侧列表
+        list2: 右侧列表
+        candidates: 候选合并键，按优先级排列
+
+    Returns:
+        合并键，没有可用的键时返回None
+    """
+    for field in candidates:
+        usable = True
+        for items in (list1, list2):
+            seen = set()
+            for item in items:
+                if not isinstance(item, dict) or field not in item:
+                    usable = False
+                    break
+                value = item[field]
+                if isinstance(value, (dict, list)) or value in seen:
+                    usable = False
+                    break
+                seen.add(value)
+            if not usable:
+                break
+        if usable:
+            return field
+    return None
+
+
+def match_list_items(list1: list, list2: list, merge_keys: Sequence[str] = (),
+                     digests1: Optional[Sequence[bytes]] = None,
+                     digests2: Optional[Sequence[bytes]] = None) -> List[Tuple[Optional[int], Optional[int], Any]]:
+    """
+    匹配两个列表的元素
+    有可用的合并键（如containers的name）时按键值匹配，否则按元素摘要对齐（Myers），
+    对齐后被替换的元素按位置两两配对作为变化项
+
+    Args:
+        list1: 左侧列表
+        list2: 右侧列表
+        merge_keys: 候选合并键
+        digests1: 左侧元素的摘要（如Merkle树中的摘要），None表示现场计算
+        digests2: 右侧元素的摘要
+
+    Returns:
+        [(左侧下标, 右侧下标, 路径步骤), ...]：一侧不存在时下标为None；
+        按键匹配时路径步骤为ListItemKey，否则为下标（仅右侧存在时为右侧下标）。
+        内容相同的元素不包含在内
+    """
+    if digests1 is None:
+        digests1 = [merkle_digest(item) for item in list1]
+    if digests2 is None:
+        digests2 = [merkle_digest(item) for item in list2]
+
+    merge_key = find_merge_key(list1, list2, merge_keys) if merge_keys else None
+    if merge_key is not None:
+        positions2 = {item[merge_key]: j for j, item in enumerate(list2)}
+        matched = []
+        for i, item in enumerate(list1):
+            value = item[merge_key]
+            j = positions2.pop(value, None)
+            if j is None or digests1[i] != digests2[j]:
+                matched.append((i, j, ListItemKey(merge_key, value)))
+        for value, j in positions2.items():
+            matched.append((None, j, ListItemKey(merge_key, value)))
+        return matched
+
+    matched = []
+    for op, i1, i2, j1, j2 in align_sequences(digests1, digests2):
+        if op == OP_EQUAL:
+            continue
+        paired = min(i2 - i1, j2 - j1)
+        for offset in range(paired):
+            matched.append((i1 + offset, j1 + offset, i1 + offset))
+        for i in range(i1 + paired, i2):
+            matched.append((i, None, i))
+        for j in range(j1 + paired, j2):
+            matched.append((None, j, j))
+    return matched
+
+
+def list_merge_keys(field: Any, merge_keys: Dict[str, Sequence[str]]) -> Sequence[str]:
+    """列表所在字段对应的候选合并键，字段不是字符串或未配置时为空"""
+    if type(field) is str:
+        return merge_keys.get(field, ())
+    return ()
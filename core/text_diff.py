@@ -0,0 +1,139 @@
+"""
+文本差异模块
+按行比较两段文本（如ConfigMap中的text类型文件），输出统一格式（unified）的差异块。
+行先映射为哈希值再按Myers算法对齐，只保留差异行及其上下文，输出总长度有上限
+"""
+
+from typing import Any, List, NamedTuple, Optional
+from core.seq_diff import align_sequences, OP_EQUAL, OP_DELETE, OP_INSERT
+from config import TEXT_DIFF_CONTEXT, TEXT_DIFF_MAX_CHARS
+
+# 行尾没有换行符时追加的标记
+_NO_NEWLINE = "\\ 文件末尾没有换行符"
+# 差异块超出长度上限被截断时追加的标记
+_TRUNCATED = "...（差异内容过长，已截断）"
+
+
+class TextHunk(NamedTuple):
+    """一个差异块"""
+    header: str  # 块头，如 @@ -12,7 +12,8 @@
+    body: str  # 统一格式的差异行：' '为上下文，'-'为删除，'+'为新增
+
+
+class TextDiff(NamedTuple):
+    """两段文本的差异"""
+    hunks: List[TextHunk]  # 保留的差异块
+    omitted_hunks: int  # 超出长度上限而省略的差异块数
+    removed_lines: int  # 删除的行数
+    added_lines: int  # 新增的行数
+
+
+def diff_text(text1: Any, text2: Any, context: Optional[int] = None,
+              max_chars: Optional[int] = None) -> TextDiff:
+    """
+    按行比较两段文本
+
+    Args:
+        text1: 左侧文本，非字符串按str转换，None视为空文本
+        text2: 右侧文本
+        context: 差异行前后保留的上下文行数，None表示使用TEXT_DIFF_CONTEXT
+        max_chars: 所有差异块内容的总字符数上限，达到上限的块被截断，之后的块只计数不保留，
+                   None表示使用TEXT_DIFF_MAX_CHARS
+
+    Returns:
+        TextDiff；两段文本相同时hunks为空
+    """
+    context = TEXT_DIFF_CONTEXT if context is None else context
+    max_chars = TEXT_DIFF_MAX_CHARS if max_chars is None else max_chars
+    lines1 = _split_lines(text1)
+    lines2 = _split_lines(text2)
+
+    opcodes = align_sequences(lines1, lines2)
+    removed = sum(i2 - i1 for op, i1, i2, _, _ in opcodes if op != OP_EQUAL)
+    added = sum(j2 - j1 for op, _, _, j1, j2 in opcodes if op != OP_EQUAL)
+
+    hunks = []
+    omitted = 0
+    total = 0
+    for group in _group_opcodes(opcodes, context):
+        if total >= max_chars:
+            omitted += 1
+            continue
+        hunk = _format_hunk(group, lines1, lines2)
+        if total + len(hunk.body) > max_chars:
+            # 超出上限的块截断，之后的块只计数
+            hunk = TextHunk(hunk.header, hunk.body[:max_chars - total] + "\n" + _TRUNCATED)
+        hunks.append(hunk)
+        total += len(hunk.body)
+
+    return TextDiff(hunks, omitted, removed, added)
+
+
+def _split_lines(text: Any) -> List[str]:
+    """按行切分，保留换行符，使末尾换行符的差异也能被发现"""
+    if text is None:
+        return []
+    if not isinstance(text, str):
+        text = str(text)
+    return text.splitlines(keepends=True)
+
+
+def _group_opcodes(opcodes: List[tuple], context: int) -> List[List[tuple]]:
+    """将opcodes按上下文分组，间隔超过2倍上下文的差异分到不同的块（同difflib）"""
+    if not opcodes or all(op == OP_EQUAL for op, _, _, _, _ in opcodes):
+        return []
+
+    codes = list(opcodes)
+    # 首尾的相同部分只保留上下文
+    if codes[0][0] == OP_EQUAL:
+        op, i1, i2, j1, j2 = codes[0]
+        codes[0] = (op, max(i1, i2 - context), i2, max(j1, j2 - context), j2)
+    if codes[-1][0] == OP_EQUAL:
+        op, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = (op, i1, min(i2, i1 + context), j1, min(j2, j1 + context))
+
+    groups = []
+    group = []
+    for op, i1, i2, j1, j2 in codes:
+        if op == OP_EQUAL and i2 - i1 > 2 * context:
+            group.append((op, i1, min(i2, i1 + context), j1, min(j2, j1 + context)))
+            groups.append(group)
+            group = []
+            i1, j1 = max(i1, i2 - context), max(j1, j2 - context)
+        group.append((op, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == OP_EQUAL):
+        groups.append(group)
+    return groups
+
+
+def _format_hunk(group: List[tuple], lines1: List[str], lines2: List[str]) -> TextHunk:
+    """格式化一个差异块"""
+    first, last = group[0], group[-1]
+    start1, count1 = first[1], last[2] - first[1]
+    start2, count2 = first[3], last[4] - first[3]
+    # 行号从1开始，空范围按统一格式的惯例使用前一行的行号
+    header = (f"@@ -{start1 + 1 if count1 else start1},{count1} "
+              f"+{start2 + 1 if count2 else start2},{count2} @@")
+
+    body = []
+    for op, i1, i2, j1, j2 in group:
+        if op == OP_EQUAL:
+            body.extend(_prefixed(" ", lines1[i1:i2]))
+            continue
+        if op != OP_INSERT:
+            body.extend(_prefixed("-", lines1[i1:i2]))
+        if op != OP_DELETE:
+            body.extend(_prefixed("+", lines2[j1:j2]))
+    return TextHunk(header, "\n".join(body))
+
+
+def _prefixed(prefix: str, lines: List[str]) -> List[str]:
+    """给每行加上前缀，去掉换行符；没有换行符的末行追加标记"""
+    result = []
+    for line in lines:
+        if line.endswith("\n"):
+            result.append(prefix + line[:-1].rstrip("\r"))
+        else:
+            result.append(prefix + line)
+            result.append(_NO_NEWLINE)
+    return result
@@ -5,8 +5,9 @@
 
 import os
 import re
-from typing import List, Dict, Any
-from utils.file_utils import scan_yaml_files, is_yaml_file, get_relative_path, ensure_dir
+from typing import List, Dict, Any, Optional
+from utils.file_utils import (ScanFilter, scan_yaml_files, is_yaml_file, get_relative_path,
+                              ensure_dir)
 
 
 class VariableReplacer:
@@ -16,8 +17,9 @@ class VariableReplacer:
         self.errors = []
 
     def replace_to_output(self, input_path: str, output_dir: str,
-                          variables: List[Dict[str, Any]]) -> bool:
-        """替换变量并导出副本"""
+                          variables: List[Dict[str, Any]],
+                          scan_filter: Optional[ScanFilter] = None) -> bool:
+        """替换变量并导出副本，输入为文件夹时可按命名空间/资源类型文件夹过滤"""
         self.errors = []
         if not input_path or not os.path.exists(input_path):
             self.errors.append("输入路径不存在")
@@ -44,7 +46,7 @@ class VariableReplacer:
             files = [input_path]
             base_path = os.path.dirname(input_path)
         else:
-            files = scan_yaml_files(input_path)
+            files = scan_yaml_files(input_path, scan_filter)
             base_path = input_path
 
         for file_path in files:
@@ -3,27 +3,65 @@ YAML比较核心模块
 负责比较两个YAML资源的差异
 """
 
-import yaml
-from typing import List, Dict, Any, Optional
-from models.resource import Resource, ComparisonResult
-from core.yaml_parser import YAMLParser, parse_properties_content
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from models.resource import (Resource, ComparisonResult, MultiComparisonResult, DIFF_TEXT,
+                             DIFF_RENAMED)
+from core.yaml_parser import YAMLParser, extract_fanout_batch, compile_key_path
+from core.compare_plan import KeyPlan, FileContent, OP_PLAIN, OP_FANOUT
+from core.deep_diff import deep_diff
+from core.text_diff import diff_text
+from core.compare_state import compare_config_hash
+from core.compare_engine import CompareEngine
+from core.rename_detector import RenameDetector
+from core.merge_join import SortedCluster, merge_join
+from core.resource_index import ResourceIndex, resource_key
+from core.cluster_snapshot import ClusterSnapshot, is_snapshot_file
+from core.document_store import DocumentStore
+from core.embedded_file_cache import EmbeddedFileCache
+from config import DEEP_DIFF_IGNORE_PATHS, LIST_MERGE_KEYS, TEXT_DIFF_CONTEXT
 
 
 class YAMLComparator:
     """YAML比较器"""
     
-    def __init__(self):
-        self.parser = YAMLParser()
+    def __init__(self, cache=None, workers: Optional[int] = None, state_store=None):
+        """
+        Args:
+            cache: 解析缓存（ParseCache），None表示不使用缓存
+            workers: 资源配对比较的进程数（CompareEngine），None表示使用配置值
+            state_store: 比较状态存储（CompareStateStore），None表示每次都完整比较
+        """
+        # 解析时计算Merkle树，比较时按子树哈希跳过相同的key
+        self.parser = YAMLParser(cache=cache, compute_merkle=True)
         self.errors = []
+        self.identical_pairs = 0  # 最近一次比较中内容完全一致、直接跳过的资源对数
+        self.skipped_keys = 0  # 最近一次比较中子树哈希一致、未提取值的key数
+        self.deep_diff = False  # 全量比较模式：忽略比较key配置，报告所有变化的路径
+        self.ignore_paths = list(DEEP_DIFF_IGNORE_PATHS)  # 全量比较时忽略的路径
+        self.list_matching = False  # 列表按元素匹配（合并键或对齐），而不是按下标或整体比较
+        self.text_diff = False  # text类型内嵌文件按行比较，只保存差异块而不是两侧全文
+        self.text_context = TEXT_DIFF_CONTEXT  # 按行比较时差异行前后保留的上下文行数
+        self.streaming = False  # 流式比较：按标识归并两侧资源，内存占用不随集群规模增长
+        self.embedded_cache = EmbeddedFileCache()  # ConfigMap/Secret内嵌文件解析缓存
+        self.engine = CompareEngine(workers)
+        self._plan = None  # 最近一次比较的key配置执行计划
+        self.state_store = state_store
+        self.force_full = False  # 忽略保存的比较状态，重新比较所有资源对（比较后仍保存状态）
+        self.reused_pairs = 0  # 最近一次比较中复用上次差异的资源对数
+        self._snapshots = []  # 最近一次比较加载的集群快照，用于收集解码资源内容时的错误
+        self.detect_renames = False  # 在仅存在于一侧的资源之间检测重命名/移动（不支持流式比较）
+        self.renames = []  # 最近一次比较检测到的重命名 [RenameMatch, ...]
+        self.rename_candidates = 0  # 最近一次重命名检测中计算了相似度的候选对数
     
     def compare_clusters(self, cluster1_path: str, cluster2_path: str, 
                         compare_keys: List[Dict[str, Any]]) -> List[ComparisonResult]:
         """
         比较两个集群文件夹
+        任一侧可以是集群快照文件，此时直接加载快照而不重新解析YAML
         
         Args:
-            cluster1_path: 集群1路径
-            cluster2_path: 集群2路径
+            cluster1_path: 集群1路径（文件夹或快照文件）
+            cluster2_path: 集群2路径（文件夹或快照文件）
             compare_keys: 比较key配置列表，每个配置包含:
                         {
                             'key_path': str,  # key路径
@@ -31,38 +69,275 @@ class YAMLComparator:
                             'file_key': str,  # 文件名key（仅当is_configmap_file=True时）
                             'file_type': str,  # 文件类型: 'yaml', 'properties', 'text'
                         }
+                        启用deep_diff时忽略该配置，报告ignore_paths以外所有变化的路径
+            
+        设置了state_store时为增量比较：只重新比较内容变化的资源对（force_full为True时全部重新比较）
+        启用detect_renames时，仅存在于一侧的资源之间内容相似的被配对为重命名，
+        结果中第一个差异为资源标识的变化（DIFF_RENAMED），之后是两个资源内容的差异
             
         Returns:
-            比较结果列表
+            比较结果列表：集群1中有差异或集群2中不存在的资源（含重命名）按集群1的顺序排列，
+            之后是仅存在于集群2的资源（resource_left为None）；
+            启用streaming时等同于list(iter_compare_clusters(...))
         """
+        if self.streaming:
+            return list(self.iter_compare_clusters(cluster1_path, cluster2_path, compare_keys))
+        
+        # 两个集群共用一个文档存储，内容相同的文档只保留一份
+        self._reset_document_store()
+        
         # 解析两个集群
-        resources1 = self.parser.parse_cluster_folder(cluster1_path)
-        resources2 = self.parser.parse_cluster_folder(cluster2_path)
+        resources1 = self._load_cluster(cluster1_path)
+        resources2 = self._load_cluster(cluster2_path)
         
-        # 创建资源映射 (namespace, kind, name) -> Resource
-        resources2_map = {}
-        for r in resources2:
-            key = (r.namespace, r.kind, r.name)
-            resources2_map[key] = r
+        # 建立资源索引 (namespace, kind, name) -> Resource
+        index1 = ResourceIndex(resources1)
+        index2 = ResourceIndex(resources2)
+        self._report_duplicates(index1, cluster1_path)
+        self._report_duplicates(index2, cluster2_path)
         
-        # 比较资源
-        comparison_results = []
+        # 配对后交给比较引擎（可能使用进程池），结果按集群1的资源顺序合并
+        matched = [(r1, index2.get(r1.namespace, r1.kind, r1.name)) for r1 in resources1]
+        pair_results = iter(self._compare_matched(
+            cluster1_path, cluster2_path,
+            [(r1, r2) for r1, r2 in matched if r2 is not None], compare_keys
+        ))
         
-        for r1 in resources1:
-            key = (r1.namespace, r1.kind, r1.name)
-            r2 = resources2_map.get(key)
-            
-            result = ComparisonResult(resource_left=r1, resource_right=r2)
-            
+        comparison_results = []
+        for r1, r2 in matched:
             if r2 is None:
                 # 右侧资源不存在
-                comparison_results.append(result)
+                comparison_results.append(ComparisonResult(resource_left=r1, resource_right=None))
             else:
-                # 比较两个资源
-                self._compare_resources(r1, r2, compare_keys, result)
+                result = next(pair_results)
                 if result.has_differences():
                     comparison_results.append(result)
         
+        # 仅存在于集群2的资源
+        for r2 in index2:
+            if (r2.namespace, r2.kind, r2.name) not in index1 and index2.get(
+                    r2.namespace, r2.kind, r2.name) is r2:
+                comparison_results.append(ComparisonResult(resource_left=None, resource_right=r2))
+        
+        if self.detect_renames:
+            comparison_results = self._pair_renames(comparison_results, compare_keys)
+        return comparison_results
+    
+    def _pair_renames(self, comparison_results: List[ComparisonResult],
+                      compare_keys: List[Dict[str, Any]]) -> List[ComparisonResult]:
+        """
+        在仅存在于一侧的资源之间检测重命名/移动，配对的资源合并为一个比较结果
+        
+        Returns:
+            新的比较结果列表：重命名结果位于左侧资源原来的位置，对应的仅右侧结果被移除
+        """
+        left_only = [result.resource_left for result in comparison_results if result.resource_right is None]
+        right_only = [result.resource_right for result in comparison_results if result.resource_left is None]
+        detector = RenameDetector(ignore_paths=self.ignore_paths)
+        self.renames = detector.detect(left_only, right_only)
+        self.rename_candidates = detector.candidate_pairs
+        if not self.renames:
+            return comparison_results
+        
+        # 重命名的资源对不参与增量比较状态，直接交给比较引擎
+        pair_results = self.engine.compare_pairs(
+            self, [(match.resource_left, match.resource_right) for match in self.renames], compare_keys)
+        self._collect_engine_errors()
+        
+        renamed = {}
+        for match, pair_result in zip(self.renames, pair_results):
+            r1, r2 = match.resource_left, match.resource_right
+            result = ComparisonResult(resource_left=r1, resource_right=r2)
+            result.add_difference(
+                "[资源标识]", f"{r1.namespace}/{r1.kind}/{r1.name}",
+                f"{r2.namespace}/{r2.kind}/{r2.name}（相似度 {match.similarity:.2f}）",
+                DIFF_RENAMED
+            )
+            result.differences.extend(pair_result.differences)
+            renamed[id(r1)] = result
+        moved = {id(match.resource_right) for match in self.renames}
+        
+        results = []
+        for result in comparison_results:
+            if result.resource_right is None:
+                results.append(renamed.get(id(result.resource_left), result))
+            elif result.resource_left is None and id(result.resource_right) in moved:
+                continue
+            else:
+                results.append(result)
+        return results
+    
+    def _compare_matched(self, cluster1_path: str, cluster2_path: str,
+                         pairs: List[Tuple[Resource, Resource]],
+                         compare_keys: List[Dict[str, Any]]) -> List[ComparisonResult]:
+        """
+        比较已配对的资源
+        设置了比较状态存储时，比较配置未变化且两侧内容摘要都与上次相同的资源对直接复用上次的差异，
+        其余资源对交给比较引擎，结果与完整比较一致；比较后保存本次状态
+        
+        Returns:
+            与pairs一一对应的比较结果列表
+        """
+        if self.state_store is None:
+            results = self.engine.compare_pairs(self, pairs, compare_keys)
+            self._collect_engine_errors()
+            return results
+        
+        config_hash = compare_config_hash(compare_keys, self.compare_options())
+        previous = {} if self.force_full else self.state_store.load(
+            cluster1_path, cluster2_path, config_hash)
+        
+        results = [None] * len(pairs)
+        pending = []
+        for position, (r1, r2) in enumerate(pairs):
+            entry = previous.get(resource_key(r1))
+            if (entry is not None and r1.content_digest and r2.content_digest
+                    and entry[0] == r1.content_digest and entry[1] == r2.content_digest):
+                result = results[position] = ComparisonResult(resource_left=r1, resource_right=r2)
+                for difference in entry[2]:
+                    result.add_difference(*difference)
+            else:
+                pending.append(position)
+        self.reused_pairs = len(pairs) - len(pending)
+        
+        pending_results = self.engine.compare_pairs(self, [pairs[p] for p in pending], compare_keys)
+        # 比较时产生错误的资源对不保存，下次重新比较以便再次报告错误
+        failed = {pending[i] for i in self.engine.failed_positions}
+        self._collect_engine_errors()
+        for position, result in zip(pending, pending_results):
+            results[position] = result
+        
+        state = {
+            resource_key(r1): (r1.content_digest, r2.content_digest,
+                               [tuple(difference) for difference in result.differences])
+            for position, ((r1, r2), result) in enumerate(zip(pairs, results))
+            if position not in failed and r1.content_digest and r2.content_digest
+        }
+        self.state_store.save(cluster1_path, cluster2_path, config_hash, state)
+        self.errors.extend(self.state_store.get_errors())
+        self.state_store.clear_errors()
+        return results
+    
+    def compare_options(self) -> Dict[str, Any]:
+        """
+        影响比较结果的选项，比较进程按此设置比较器，增量比较按此判断能否复用上次的结果
+        
+        Returns:
+            {属性名: 值}
+        """
+        return {
+            'deep_diff': self.deep_diff,
+            'ignore_paths': list(self.ignore_paths),
+            'list_matching': self.list_matching,
+            'text_diff': self.text_diff,
+            'text_context': self.text_context,
+        }
+    
+    def _collect_engine_errors(self):
+        """合并比较引擎的错误"""
+        self.errors.extend(self.engine.get_errors())
+        self.engine.clear_errors()
+    
+    def iter_compare_clusters(self, cluster1_path: str, cluster2_path: str,
+                              compare_keys: List[Dict[str, Any]]) -> Iterator[ComparisonResult]:
+        """
+        流式比较两个集群
+        两侧资源写入临时快照（快照文件直接使用）后按 (命名空间, 类型, 名称) 排序归并，
+        每对资源比较完立即释放内容，内存中只保留资源标识和当前比较的资源内容
+        
+        Args:
+            cluster1_path: 集群1路径（文件夹或快照文件）
+            cluster2_path: 集群2路径（文件夹或快照文件）
+            compare_keys: 比较key配置列表，格式同compare_clusters
+            
+        Returns:
+            有差异的比较结果迭代器，按资源标识排序；仅一侧存在的资源另一侧为None。
+            结果中的资源不含yaml_content
+        """
+        self._reset_document_store()
+        # 文档存储会保留所有文档，流式比较时不使用
+        self.parser.document_store = None
+        
+        left = self._open_sorted_cluster(cluster1_path)
+        right = self._open_sorted_cluster(cluster2_path) if left is not None else None
+        if left is None or right is None:
+            if left is not None:
+                left.close()
+            return
+        
+        try:
+            for r1, r2 in merge_join(left, right):
+                if r1 is None or r2 is None:
+                    yield ComparisonResult(
+                        resource_left=r1.without_content() if r1 is not None else None,
+                        resource_right=r2.without_content() if r2 is not None else None
+                    )
+                    continue
+                
+                result = ComparisonResult(resource_left=r1, resource_right=r2)
+                self._compare_resources(r1, r2, compare_keys, result)
+                r1.release_content()
+                r2.release_content()
+                if result.has_differences():
+                    result.resource_left = r1.without_content()
+                    result.resource_right = r2.without_content()
+                    yield result
+        finally:
+            left.close()
+            right.close()
+            self.errors.extend(left.errors)
+            self.errors.extend(right.errors)
+    
+    def _open_sorted_cluster(self, cluster_path: str) -> Optional[SortedCluster]:
+        """打开按标识排序的集群资源流，失败时记录错误并返回None"""
+        try:
+            sorted_cluster = SortedCluster(self.parser, cluster_path)
+        except (OSError, ValueError) as e:
+            self.errors.append(f"加载集群失败 {cluster_path}: {str(e)}")
+            return None
+        finally:
+            self.errors.extend(self.parser.get_errors())
+            self.parser.clear_errors()
+        return sorted_cluster
+    
+    def compare_many(self, cluster_paths: List[str], compare_keys: List[Dict[str, Any]],
+                     baseline: Optional[int] = None) -> List[MultiComparisonResult]:
+        """
+        比较多个集群
+        每个集群只解析一次，所有集群共用一个文档存储；资源按 (命名空间, 类型, 名称) 对齐，
+        每个比较key得到各集群的值，找出偏离基准集群（未指定时为多数值）的集群
+        
+        Args:
+            cluster_paths: 集群路径列表（文件夹或快照文件）
+            compare_keys: 比较key配置列表，格式同compare_clusters（不支持全量比较）
+            baseline: 基准集群在cluster_paths中的下标，None表示以多数集群的值为准
+            
+        Returns:
+            存在偏离的资源的比较结果列表，按资源首次出现的顺序排列；
+            资源是否存在也作为一行（key_path为空）参与偏离判断
+        """
+        self._reset_document_store()
+        
+        indexes = []
+        for cluster_path in cluster_paths:
+            index = ResourceIndex(self._load_cluster(cluster_path))
+            self._report_duplicates(index, cluster_path)
+            indexes.append(index)
+        
+        # 按首次出现的顺序收集所有资源标识
+        identities = {}
+        for index in indexes:
+            for resource in index:
+                identities.setdefault(resource_key(resource), None)
+        
+        comparison_results = []
+        for namespace, kind, name in identities:
+            resources = [index.get(namespace, kind, name) for index in indexes]
+            result = MultiComparisonResult(namespace, kind, name, resources)
+            self._compare_many_resources(resources, compare_keys, baseline, result)
+            if result.has_differences():
+                comparison_results.append(result)
+        
         return comparison_results
     
     def compare_files(self, file1_path: str, file2_path: str, 
@@ -78,22 +353,20 @@ class YAMLComparator:
         Returns:
             比较结果列表
         """
+        self._reset_document_store()
+        
         # 解析两个文件
         resources1 = self.parser.parse_yaml_file(file1_path)
         resources2 = self.parser.parse_yaml_file(file2_path)
         
-        # 创建资源映射
-        resources2_map = {}
-        for r in resources2:
-            key = (r.kind, r.name)
-            resources2_map[key] = r
+        # 建立资源索引，单文件比较时忽略命名空间
+        index2 = ResourceIndex(resources2)
         
         # 比较资源
         comparison_results = []
         
         for r1 in resources1:
-            key = (r1.kind, r1.name)
-            r2 = resources2_map.get(key)
+            r2 = index2.get_by_kind_name(r1.kind, r1.name)
             
             result = ComparisonResult(resource_left=r1, resource_right=r2)
             
@@ -106,109 +379,393 @@ class YAMLComparator:
                 if result.has_differences():
                     comparison_results.append(result)
         
+        # 仅存在于文件2的资源
+        left_keys = {(r1.kind, r1.name) for r1 in resources1}
+        for r2 in resources2:
+            if (r2.kind, r2.name) not in left_keys and index2.get_by_kind_name(r2.kind, r2.name) is r2:
+                comparison_results.append(ComparisonResult(resource_left=None, resource_right=r2))
+        
         return comparison_results
     
+    def _reset_document_store(self):
+        """每次比较使用新的文档存储和内嵌文件缓存，比较结束后随结果一起释放"""
+        self._collect_snapshot_errors()
+        self._snapshots = []
+        self.parser.document_store = DocumentStore()
+        self.embedded_cache = EmbeddedFileCache()
+        self.identical_pairs = 0
+        self.skipped_keys = 0
+        self.reused_pairs = 0
+        self.renames = []
+        self.rename_candidates = 0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取最近一次比较的统计信息
+        
+        Returns:
+            解析统计（含文档去重率dedup_ratio）、'identical_pairs'（内容一致而跳过比较的资源对数）、
+            'skipped_keys'（子树哈希一致而未提取值的key数）、
+            'reused_pairs'（增量比较时复用上次差异的资源对数）、
+            'renames'/'rename_candidates'（检测到的重命名数/计算了相似度的候选对数）、
+            'embedded_hits'/'embedded_misses'（内嵌文件解析缓存命中/未命中次数）
+        """
+        stats = self.parser.get_stats()
+        stats['identical_pairs'] = self.identical_pairs
+        stats['skipped_keys'] = self.skipped_keys
+        stats['reused_pairs'] = self.reused_pairs
+        stats['renames'] = len(self.renames)
+        stats['rename_candidates'] = self.rename_candidates
+        stats['embedded_hits'] = self.embedded_cache.hits
+        stats['embedded_misses'] = self.embedded_cache.misses
+        return stats
+    
+    def _load_cluster(self, cluster_path: str) -> List[Resource]:
+        """加载集群资源：快照文件直接加载，文件夹则解析YAML"""
+        if is_snapshot_file(cluster_path):
+            try:
+                snapshot = ClusterSnapshot(cluster_path)
+            except (OSError, ValueError) as e:
+                self.errors.append(f"加载集群快照失败 {cluster_path}: {str(e)}")
+                return []
+            self.errors.extend(snapshot.errors)
+            self._snapshots.append(snapshot)
+            return snapshot.resources
+        
+        resources = self.parser.parse_cluster_folder(cluster_path)
+        # 解析器每次解析都会重置错误列表，先保存本次的错误
+        self.errors.extend(self.parser.get_errors())
+        self.parser.clear_errors()
+        return resources
+    
+    def _report_duplicates(self, index: ResourceIndex, source: str):
+        """记录标识重复的资源，比较时以最后出现的资源为准"""
+        for (namespace, kind, name), resources in index.get_duplicates().items():
+            files = ", ".join(r.file_path for r in resources)
+            self.errors.append(
+                f"{source} 中存在重复资源 {namespace}/{kind}/{name}，以最后一个为准: {files}"
+            )
+    
+    def _plan_for(self, compare_keys: List[Dict[str, Any]]) -> KeyPlan:
+        """获取比较key配置的执行计划，同一配置列表在一次比较中只编译一次"""
+        if self._plan is None or self._plan.source is not compare_keys:
+            self._plan = KeyPlan(compare_keys, 'compare_key')
+        return self._plan
+    
     def _compare_resources(self, r1: Resource, r2: Resource, 
                           compare_keys: List[Dict[str, Any]], 
-                          result: ComparisonResult):
-        """比较两个资源"""
-        for key_config in compare_keys:
-            key_path = key_config.get('key_path', '')
-            is_configmap_file = key_config.get('is_configmap_file', False)
-            
-            if is_configmap_file:
-                # ConfigMap/Secret特殊处理
-                self._compare_configmap_file(r1, r2, key_config, result)
-            else:
-                # 普通key比较
-                value1 = self.parser.extract_value_by_path(r1.yaml_content, key_path)
-                value2 = self.parser.extract_value_by_path(r2.yaml_content, key_path)
-                
-                if value1 != value2:
-                    result.add_difference(key_path, value1, value2)
-    
-    def _compare_configmap_file(self, r1: Resource, r2: Resource, 
-                               key_config: Dict[str, Any], 
-                               result: ComparisonResult):
+                          result: ComparisonResult,
+                          indices: Optional[Tuple[int, ...]] = None):
         """
-        比较ConfigMap/Secret中的文件内容
+        比较两个资源
         
         Args:
             r1: 资源1
             r2: 资源2
-            key_config: key配置
+            compare_keys: 比较key配置列表
             result: 比较结果
+            indices: 需要比较的key序号，None表示根据Merkle树自动跳过子树一致的key
         """
-        file_key = key_config.get('file_key', '')
-        file_type = key_config.get('file_type', 'text')
-        compare_key = key_config.get('compare_key', '')  # 文件内容中要比较的key
+        if r1.content_digest and r1.content_digest == r2.content_digest:
+            # 内容完全一致，无需提取任何key
+            self.identical_pairs += 1
+            return
         
-        # 提取data字段
-        data1 = r1.yaml_content.get('data', {})
-        data2 = r2.yaml_content.get('data', {})
+        if self.deep_diff:
+            for key_path, value1, value2, change in deep_diff(
+                    r1.yaml_content, r2.yaml_content, self.ignore_paths,
+                    r1.merkle_tree, r2.merkle_tree,
+                    LIST_MERGE_KEYS if self.list_matching else None):
+                result.add_difference(key_path, value1, value2, change)
+            return
         
-        # 获取文件内容
-        file_content1 = data1.get(file_key, '')
-        file_content2 = data2.get(file_key, '')
+        plan = self._plan_for(compare_keys)
+        if indices is None:
+            # key所在子树的Merkle哈希一致时，两侧的值必然相同，无需提取
+            indices = plan.pending_steps(r1.merkle_tree, r2.merkle_tree)
+            self.skipped_keys += len(plan.steps) - len(indices)
+        if not indices:
+            return
         
-        if file_type == 'text':
-            # 直接文本比较
-            if file_content1 != file_content2:
-                full_path = f"data.{file_key}"
-                result.add_difference(full_path, file_content1, file_content2)
+        plain_values = None
+        files = {}  # 文件组序号 -> (资源1的文件内容, 资源2的文件内容)
+        failed_groups = set()
         
-        elif file_type == 'yaml':
-            # 解析YAML内容
-            try:
-                yaml_obj1 = yaml.safe_load(file_content1) if file_content1 else {}
-                yaml_obj2 = yaml.safe_load(file_content2) if file_content2 else {}
-                
-                # 提取比较key
-                if compare_key:
-                    value1 = self.parser.extract_value_by_path(yaml_obj1, compare_key)
-                    value2 = self.parser.extract_value_by_path(yaml_obj2, compare_key)
-                    
-                    if value1 != value2:
-                        full_path = f"data.{file_key}.{compare_key}"
-                        result.add_difference(full_path, value1, value2)
+        for position in indices:
+            step = plan.steps[position]
+            
+            if step.op == OP_PLAIN:
+                if plain_values is None:
+                    # 所有普通key一次提取
+                    plain_values = (plan.extract_plain(r1.yaml_content),
+                                    plan.extract_plain(r2.yaml_content))
+                value1 = plain_values[0].get(step.key_path)
+                value2 = plain_values[1].get(step.key_path)
+                if value1 == value2:
+                    continue
+                if self.list_matching and isinstance(value1, list) and isinstance(value2, list):
+                    # 列表按元素匹配，逐项报告新增、删除和变化的元素
+                    for key_path, item1, item2, change in deep_diff(
+                            value1, value2, list_keys=LIST_MERGE_KEYS,
+                            base_steps=compile_key_path(step.key_path)):
+                        result.add_difference(key_path, item1, item2, change)
                 else:
-                    # 比较整个YAML对象
-                    if yaml_obj1 != yaml_obj2:
-                        full_path = f"data.{file_key}"
-                        result.add_difference(full_path, yaml_obj1, yaml_obj2)
+                    result.add_difference(step.key_path, value1, value2)
             
-            except Exception as e:
-                self.errors.append(f"解析YAML文件内容失败: {str(e)}")
-        
-        elif file_type == 'properties':
-            # 解析properties内容
-            props1 = parse_properties_content(file_content1)
-            props2 = parse_properties_content(file_content2)
+            elif step.op == OP_FANOUT:
+                # 通配key按展开后的具体路径逐项比较
+                self._compare_fanout(r1, r2, step.key_path, result)
             
-            if compare_key:
-                # 提取指定key
-                value1 = self.parser.extract_value_by_path(props1, compare_key)
-                value2 = self.parser.extract_value_by_path(props2, compare_key)
-                
+            elif step.group not in failed_groups:
+                # ConfigMap/Secret内嵌文件，每个文件每个资源只读取和解析一次
+                contents = files.get(step.group)
+                if contents is None:
+                    contents = files[step.group] = (
+                        plan.read_file(r1.yaml_content, step.group, self.embedded_cache),
+                        plan.read_file(r2.yaml_content, step.group, self.embedded_cache)
+                    )
+                self._compare_file_step(plan, step, contents, result, failed_groups)
+    
+    def _compare_file_step(self, plan: KeyPlan, step, contents: Tuple[FileContent, FileContent],
+                           result: ComparisonResult, failed_groups: set):
+        """
+        比较ConfigMap/Secret中的文件内容
+        
+        Args:
+            plan: 执行计划
+            step: 内嵌文件步骤
+            contents: 两个资源中该文件的读取结果
+            result: 比较结果
+            failed_groups: 解析失败的文件组序号，失败时加入并记录一次错误
+        """
+        file_group = plan.file_groups[step.group]
+        file_key = file_group.file_key
+        file1, file2 = contents
+        
+        if file_group.file_type == 'text':
+            # 直接文本比较
+            if file1.raw != file2.raw:
+                if self.text_diff:
+                    self._add_text_diff(f"data.{file_key}", file1.raw, file2.raw, result)
+                else:
+                    result.add_difference(f"data.{file_key}", file1.raw, file2.raw)
+            return
+        
+        error = file1.error or file2.error
+        if error is not None:
+            self.errors.append(f"解析YAML文件内容失败: {str(error)}")
+            failed_groups.add(step.group)
+            return
+        
+        if step.inner_key:
+            value1 = file1.values.get(step.inner_key)
+            value2 = file2.values.get(step.inner_key)
+            if value1 != value2:
+                result.add_difference(f"data.{file_key}.{step.inner_key}", value1, value2)
+        elif file_group.file_type == 'yaml':
+            # 比较整个YAML对象
+            if file1.parsed != file2.parsed:
+                result.add_difference(f"data.{file_key}", file1.parsed, file2.parsed)
+        else:
+            # 比较所有属性，先按左侧顺序，再补充仅右侧存在的属性
+            props1 = file1.parsed
+            props2 = file2.parsed
+            for key in dict.fromkeys(list(props1) + list(props2)):
+                value1 = props1.get(key, '')
+                value2 = props2.get(key, '')
                 if value1 != value2:
-                    full_path = f"data.{file_key}.{compare_key}"
-                    result.add_difference(full_path, value1, value2)
+                    result.add_difference(f"data.{file_key}.{key}", value1, value2)
+    
+    def _add_text_diff(self, key_path: str, text1: Any, text2: Any, result: ComparisonResult):
+        """
+        按行比较两段文本，每个差异块作为一个差异项，不保存两侧全文
+        
+        Args:
+            key_path: 文件的键路径
+            text1: 左侧文本
+            text2: 右侧文本
+            result: 比较结果
+        """
+        text_diff = diff_text(text1, text2, self.text_context)
+        if not text_diff.hunks:
+            # 按行比较没有差异（如数值与字符串），按整体值报告
+            result.add_difference(key_path, text1, text2)
+            return
+        for hunk in text_diff.hunks:
+            result.add_difference(key_path, hunk.header, hunk.body, DIFF_TEXT)
+        if text_diff.omitted_hunks:
+            result.add_difference(
+                key_path, "...",
+                f"另有 {text_diff.omitted_hunks} 个差异块未显示"
+                f"（共删除 {text_diff.removed_lines} 行，新增 {text_diff.added_lines} 行）",
+                DIFF_TEXT
+            )
+    
+    def _compare_many_resources(self, resources: List[Optional[Resource]],
+                                compare_keys: List[Dict[str, Any]], baseline: Optional[int],
+                                result: MultiComparisonResult):
+        """比较同一资源在多个集群中的各个key"""
+        presence = tuple(resource is not None for resource in resources)
+        deviating = find_deviations(presence, baseline)
+        if deviating:
+            result.add_row("", presence, deviating)
+        
+        # 只在存在该资源的集群之间比较值
+        present = [position for position, resource in enumerate(resources) if resource is not None]
+        if len(present) < 2:
+            return
+        first = resources[present[0]]
+        others = [resources[position] for position in present[1:]]
+        
+        if first.content_digest and all(r.content_digest == first.content_digest for r in others):
+            self.identical_pairs += 1
+            return
+        
+        plan = self._plan_for(compare_keys)
+        plain_values = None
+        files = {}  # 文件组序号 -> 各集群中该文件的读取结果
+        
+        for position, step in enumerate(plan.steps):
+            if all(plan.step_unchanged(position, first.merkle_tree, r.merkle_tree) for r in others):
+                self.skipped_keys += 1
+                continue
+            
+            if step.op == OP_PLAIN:
+                if plain_values is None:
+                    # 所有普通key每个资源一次提取
+                    plain_values = [plan.extract_plain(resource.yaml_content)
+                                    if resource is not None else None
+                                    for resource in resources]
+                values_by_cluster = [{step.key_path: values.get(step.key_path)}
+                                     if values is not None else {}
+                                     for values in plain_values]
+            
+            elif step.op == OP_FANOUT:
+                # 通配key对所有集群的资源统一求值
+                pairs = iter(extract_fanout_batch([resources[index].yaml_content for index in present],
+                                                  step.key_path))
+                values_by_cluster = [dict(next(pairs)) if resource is not None else {}
+                                     for resource in resources]
+            
             else:
-                # 比较所有属性
-                all_keys = set(props1.keys()) | set(props2.keys())
-                for key in all_keys:
-                    value1 = props1.get(key, '')
-                    value2 = props2.get(key, '')
-                    
-                    if value1 != value2:
-                        full_path = f"data.{file_key}.{key}"
-                        result.add_difference(full_path, value1, value2)
+                # ConfigMap/Secret内嵌文件，每个文件每个资源只读取和解析一次
+                contents = files.get(step.group)
+                if contents is None:
+                    contents = files[step.group] = [
+                        plan.read_file(resource.yaml_content, step.group, self.embedded_cache)
+                        if resource is not None else None
+                        for resource in resources
+                    ]
+                    error = next((c.error for c in contents
+                                  if c is not None and c.error is not None), None)
+                    if error is not None:
+                        self.errors.append(f"解析YAML文件内容失败: {str(error)}")
+                values_by_cluster = [self._file_step_values(plan, step, content)
+                                     for content in contents]
+            
+            concrete_paths = {}
+            for values in values_by_cluster:
+                concrete_paths.update(dict.fromkeys(values))
+            
+            for concrete_path in concrete_paths:
+                values = tuple(v.get(concrete_path) for v in values_by_cluster)
+                deviating = find_deviations(values, baseline, present)
+                if deviating:
+                    result.add_row(concrete_path, values, deviating)
+    
+    def _file_step_values(self, plan: KeyPlan, step,
+                          content: Optional[FileContent]) -> Dict[str, Any]:
+        """
+        一个资源中内嵌文件步骤对应的值
+        
+        Returns:
+            {具体路径: 值}，不指定比较key的properties文件会产生多个路径；
+            资源不存在或文件解析失败时为空
+        """
+        if content is None or content.error is not None:
+            return {}
+        
+        file_group = plan.file_groups[step.group]
+        full_path = f"data.{file_group.file_key}"
+        if file_group.file_type == 'text':
+            return {full_path: content.raw}
+        if step.inner_key:
+            return {f"{full_path}.{step.inner_key}": content.values.get(step.inner_key)}
+        if file_group.file_type == 'yaml':
+            return {full_path: content.parsed}
+        return {f"{full_path}.{key}": value for key, value in content.parsed.items()}
+    
+    def _compare_fanout(self, r1: Resource, r2: Resource, key_path: str,
+                        result: ComparisonResult):
+        """
+        比较含通配的key，两侧展开后按具体路径对齐，一侧不存在时值为None
+        
+        Args:
+            r1: 资源1
+            r2: 资源2
+            key_path: 含通配的键路径，如 spec.template.spec.containers[*].image
+            result: 比较结果
+        """
+        pairs1, pairs2 = extract_fanout_batch([r1.yaml_content, r2.yaml_content], key_path)
+        values1 = dict(pairs1)
+        values2 = dict(pairs2)
+        
+        # 先按左侧顺序，再补充仅右侧存在的路径
+        concrete_paths = list(values1)
+        concrete_paths.extend(path for path in values2 if path not in values1)
+        
+        for concrete_path in concrete_paths:
+            value1 = values1.get(concrete_path)
+            value2 = values2.get(concrete_path)
+            if value1 != value2:
+                result.add_difference(concrete_path, value1, value2)
+    
+    def _collect_snapshot_errors(self):
+        """将快照资源内容解码失败的错误并入错误列表（内容在访问时才解码，可能晚于比较）"""
+        for snapshot in self._snapshots:
+            self.errors.extend(snapshot.take_decode_errors())
     
     def get_errors(self) -> List[str]:
         """获取错误列表"""
+        self._collect_snapshot_errors()
         return self.errors + self.parser.get_errors()
     
     def clear_errors(self):
         """清除错误列表"""
+        self._collect_snapshot_errors()
         self.errors = []
         self.parser.clear_errors()
+
+
+def find_deviations(values: tuple, baseline: Optional[int] = None,
+                    candidates: Optional[List[int]] = None) -> tuple:
+    """
+    找出值偏离基准的集群
+    
+    Args:
+        values: 各集群的值
+        baseline: 基准集群下标；为None或不在参与比较的集群中时，以出现次数最多的值为准
+                 （次数相同时取先出现的值）
+        candidates: 参与比较的集群下标，None表示全部
+        
+    Returns:
+        偏离的集群下标元组
+    """
+    if candidates is None:
+        candidates = range(len(values))
+    
+    if baseline is not None and baseline in candidates:
+        reference = values[baseline]
+    else:
+        # 值可能不可哈希（如字典、列表），按相等比较分组；集群数量不多，逐个比较即可
+        groups = []  # [[值, 次数], ...]
+        for position in candidates:
+            for group in groups:
+                if group[0] == values[position]:
+                    group[1] += 1
+                    break
+            else:
+                groups.append([values[position], 1])
+        reference = max(groups, key=lambda group: group[1])[0] if groups else None
+    
+    return tuple(position for position in candidates if values[position] != reference)
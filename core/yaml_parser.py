@@ -4,46 +4,165 @@ YAML解析核心模块
 """
 
 import os
+import re
+import mmap
 import yaml
-from typing import List, Any, Dict, Optional
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Any, Dict, NamedTuple, Optional, Tuple, Iterator
 from models.resource import Resource
-from utils.file_utils import scan_yaml_files, get_relative_path, is_yaml_file
+from core.merkle import build_merkle_tree
+from utils.file_utils import ScanFilter, scan_yaml_entries, get_relative_path, is_yaml_file
 from utils.validators import validate_yaml_resource
+from config import (PARSE_WORKERS, PARSE_PARALLEL_MIN_FILES, PARSE_CHUNKS_PER_WORKER,
+                    KEY_PATH_CACHE_SIZE, LARGE_FILE_PARALLEL_BYTES)
+
+# 优先使用libyaml的C加载器（快5~10倍），不可用时回退到纯Python加载器
+try:
+    from yaml import CSafeLoader as DefaultSafeLoader
+    YAML_BACKEND = "libyaml"
+except ImportError:
+    from yaml import SafeLoader as DefaultSafeLoader
+    YAML_BACKEND = "python"
+
+
+def get_yaml_backend() -> str:
+    """获取当前使用的YAML解析后端: 'libyaml' 或 'python'"""
+    return YAML_BACKEND
+
+
+def load_yaml(content, loader=None) -> Any:
+    """
+    解析单个YAML文档，行为与yaml.safe_load一致
+    
+    Args:
+        content: YAML字符串、字节串或文件对象
+        loader: 加载器类，None表示使用默认加载器
+    """
+    return yaml.load(content, Loader=loader or DefaultSafeLoader)
+
+
+def load_yaml_all(content, loader=None):
+    """
+    解析多文档YAML，行为与yaml.safe_load_all一致
+    
+    Args:
+        content: YAML字符串、字节串或文件对象
+        loader: 加载器类，None表示使用默认加载器
+    """
+    return yaml.load_all(content, Loader=loader or DefaultSafeLoader)
 
 
 class YAMLParser:
     """YAML解析器"""
     
-    def __init__(self):
+    def __init__(self, workers: Optional[int] = None, loader=None, cache=None,
+                 document_store=None, compute_merkle: bool = False):
+        """
+        Args:
+            workers: 并行解析进程数，None表示使用配置值，0表示使用CPU核数，1表示串行
+            loader: YAML加载器类，None表示使用默认加载器（优先libyaml）
+            cache: 解析缓存（ParseCache），None表示不使用缓存
+            document_store: 文档存储（DocumentStore），内容相同的文档共享同一对象并记录摘要，
+                            None表示不去重
+            compute_merkle: 是否在解析时为每个资源计算Merkle树（core.merkle），
+                            启用缓存时树与解析结果一起缓存
+        """
         self.errors = []
+        self.workers = PARSE_WORKERS if workers is None else workers
+        self.loader = loader or DefaultSafeLoader
+        self.cache = cache
+        self.parallel_min_bytes = LARGE_FILE_PARALLEL_BYTES
+        self.parallel_min_files = PARSE_PARALLEL_MIN_FILES
+        self.document_store = document_store
+        self.compute_merkle = compute_merkle
+        self.file_fingerprints = {}  # 最近一次扫描的文件 -> (大小, mtime_ns)
+        self.resource_count = 0  # 最近一次解析集群产出的资源数
     
-    def parse_cluster_folder(self, cluster_path: str) -> List[Resource]:
+    def parse_cluster_folder(self, cluster_path: str, 
+                             workers: Optional[int] = None,
+                             scan_filter: Optional[ScanFilter] = None) -> List[Resource]:
         """
         解析集群文件夹
         结构：集群名/命名空间/资源类型/yaml文件
+        文件数量足够多时使用进程池并行解析，结果按文件路径排序，与串行解析一致
         
         Args:
             cluster_path: 集群文件夹路径
+            workers: 并行解析进程数，None表示使用解析器默认值
+            scan_filter: 命名空间/资源类型文件夹过滤条件，None表示使用默认条件
             
         Returns:
             Resource对象列表
         """
-        resources = []
+        return list(self.iter_cluster_resources(cluster_path, workers, scan_filter))
+    
+    def iter_cluster_resources(self, cluster_path: str, 
+                               workers: Optional[int] = None,
+                               scan_filter: Optional[ScanFilter] = None) -> Iterator[Resource]:
+        """
+        流式解析集群文件夹，每解析完一个文件就产出其中的资源
+        调用方逐个处理资源时，内存占用与集群大小无关
+        
+        Args:
+            cluster_path: 集群文件夹路径
+            workers: 并行解析进程数，None表示使用解析器默认值
+            scan_filter: 命名空间/资源类型文件夹过滤条件，None表示使用默认条件
+            
+        Yields:
+            Resource对象，按文件路径顺序
+        """
         self.errors = []
         
         if not os.path.exists(cluster_path):
             self.errors.append(f"路径不存在: {cluster_path}")
-            return resources
+            return
         
         if not os.path.isdir(cluster_path):
             self.errors.append(f"不是有效的目录: {cluster_path}")
-            return resources
+            return
         
         cluster_name = os.path.basename(cluster_path)
         
-        # 扫描所有YAML文件
-        yaml_files = scan_yaml_files(cluster_path)
+        # 扫描所有YAML文件（已按路径排序，保证结果顺序稳定）
+        entries = scan_yaml_entries(cluster_path, scan_filter)
+        self.file_fingerprints = {entry.path: (entry.size, entry.mtime_ns) for entry in entries}
+        yaml_files = [entry.path for entry in entries]
         
+        self.resource_count = 0
+        worker_count = self._resolve_worker_count(workers, len(yaml_files))
+        if worker_count > 1:
+            resources = self._iter_files_parallel(
+                yaml_files, cluster_name, cluster_path, worker_count
+            )
+        else:
+            resources = self._iter_files_serial(yaml_files, cluster_name, cluster_path)
+        
+        for resource in resources:
+            self.resource_count += 1
+            yield resource
+        
+        if self.cache is not None:
+            self.cache.enforce_budget()
+    
+    def _resolve_worker_count(self, workers: Optional[int], file_count: int) -> int:
+        """根据配置和文件数量确定实际使用的进程数"""
+        if workers is None:
+            workers = self.workers
+        if workers <= 0:
+            workers = os.cpu_count() or 1
+        
+        # 文件太少时进程启动开销大于收益，直接串行
+        if file_count < max(self.parallel_min_files, 2):
+            return 1
+        
+        return min(workers, file_count)
+    
+    def _iter_files_serial(self, yaml_files: List[str], cluster_name: str,
+                           cluster_path: str) -> Iterator[Resource]:
+        """在当前进程中逐个解析文件"""
         for yaml_file in yaml_files:
             try:
                 file_resources = self.parse_yaml_file(
@@ -51,11 +170,59 @@ class YAMLParser:
                     cluster_name, 
                     cluster_path
                 )
-                resources.extend(file_resources)
             except Exception as e:
                 self.errors.append(f"解析文件失败 {yaml_file}: {str(e)}")
+                continue
+            yield from file_resources
+    
+    def _iter_files_parallel(self, yaml_files: List[str], cluster_name: str,
+                             cluster_path: str, worker_count: int) -> Iterator[Resource]:
+        """
+        使用进程池并行解析文件
+        文件按路径顺序切分为总大小大致相等的连续任务块，按块顺序产出结果，
+        因此结果顺序与串行解析一致。同时在途的任务块数量有上限，避免结果堆积。
+        进程池不可用时，剩余文件回退到串行解析。
+        """
+        chunk_count = min(len(yaml_files), worker_count * PARSE_CHUNKS_PER_WORKER)
+        # 文件大小直接使用扫描时的stat结果
+        sizes = [self.file_fingerprints.get(path, (0, 0))[0] for path in yaml_files]
+        chunks = split_by_weight(yaml_files, sizes, chunk_count)
+        max_pending = worker_count * 2
         
-        return resources
+        submitted = 0  # 已提交的任务块数
+        finished = 0  # 已产出结果的任务块数
+        try:
+            with ProcessPoolExecutor(max_workers=worker_count) as executor:
+                pending = deque()
+                try:
+                    while finished < len(chunks):
+                        while submitted < len(chunks) and len(pending) < max_pending:
+                            pending.append(executor.submit(
+                                _parse_files_worker, chunks[submitted], cluster_name,
+                                cluster_path, self.loader, self.cache, self.compute_merkle
+                            ))
+                            submitted += 1
+                        
+                        chunk_results, cache_counters = pending.popleft().result()
+                        finished += 1
+                        if self.cache is not None:
+                            self.cache.hits += cache_counters[0]
+                            self.cache.misses += cache_counters[1]
+                        
+                        for _, file_resources, file_errors in chunk_results:
+                            self.errors.extend(file_errors)
+                            # 子进程中没有文档存储，在主进程中去重
+                            for resource in file_resources:
+                                self._share_content(resource)
+                            yield from file_resources
+                finally:
+                    # 调用方提前结束迭代时，取消尚未开始的任务
+                    for future in pending:
+                        future.cancel()
+        except (OSError, BrokenProcessPool) as e:
+            self.errors.append(f"并行解析失败，剩余文件回退到串行解析: {str(e)}")
+            for chunk in chunks[finished:]:
+                yield from self._iter_files_serial(chunk, cluster_name, cluster_path)
     
     def parse_yaml_file(self, file_path: str, cluster_name: str = "", 
                        cluster_base_path: str = "") -> List[Resource]:
@@ -82,44 +249,169 @@ class YAMLParser:
         if not cluster_base_path:
             cluster_base_path = os.path.dirname(os.path.dirname(os.path.dirname(file_path)))
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            try:
-                # 使用safe_load_all支持多文档YAML
-                yaml_documents = yaml.safe_load_all(f)
-                
-                for doc in yaml_documents:
-                    if doc is None:
-                        continue
-                    
-                    # 验证YAML资源
-                    is_valid, kind, name, namespace, error_msg = validate_yaml_resource(doc)
-                    
-                    if not is_valid:
-                        self.errors.append(f"文件 {file_path} 中的资源验证失败: {error_msg}")
-                        continue
-                    
-                    # 提取资源类型文件夹名
-                    resource_type_folder = self._extract_resource_type_folder(file_path, cluster_base_path)
-                    
-                    # 创建Resource对象
-                    resource = Resource(
-                        kind=kind,
-                        name=name,
-                        namespace=namespace,
-                        cluster=cluster_name,
-                        file_path=get_relative_path(file_path, cluster_base_path),
-                        yaml_content=doc,
-                        abs_file_path=file_path,
-                        resource_type_folder=resource_type_folder
-                    )
-                    
-                    resources.append(resource)
-                    
-            except yaml.YAMLError as e:
-                raise ValueError(f"YAML格式错误: {str(e)}")
+        documents, doc_errors, trees = self._load_file_documents(file_path)
+        
+        for error_msg in doc_errors:
+            self.errors.append(f"文件 {file_path} 中的资源验证失败: {error_msg}")
+        
+        if not documents:
+            return resources
+        
+        # 提取资源类型文件夹名和相对路径（同一文件内所有资源相同）
+        resource_type_folder = self._extract_resource_type_folder(file_path, cluster_base_path)
+        rel_path = get_relative_path(file_path, cluster_base_path)
+        
+        for index, (kind, name, namespace, doc) in enumerate(documents):
+            # 创建Resource对象
+            resource = Resource(
+                kind=kind,
+                name=name,
+                namespace=namespace,
+                cluster=cluster_name,
+                file_path=rel_path,
+                yaml_content=doc,
+                abs_file_path=file_path,
+                resource_type_folder=resource_type_folder,
+                merkle_tree=trees[index] if trees is not None else None
+            )
+            self._share_content(resource)
+            
+            resources.append(resource)
         
         return resources
     
+    def _share_content(self, resource: Resource):
+        """启用文档存储时，记录资源内容摘要并改为引用共享的文档对象和Merkle树"""
+        if self.document_store is not None and not resource.content_digest:
+            resource.content_digest, resource.yaml_content, resource.merkle_tree = \
+                self.document_store.add(resource.yaml_content, resource.merkle_tree)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        获取最近一次解析集群的统计信息
+        
+        Returns:
+            {'files', 'resources'}，启用解析缓存时包含'cache_hits'、'cache_misses'，
+            启用文档存储时包含'documents'、'unique_documents'、'dedup_ratio'（按存储累计）
+        """
+        stats = {
+            'files': len(self.file_fingerprints),
+            'resources': self.resource_count,
+        }
+        if self.cache is not None:
+            stats['cache_hits'] = self.cache.hits
+            stats['cache_misses'] = self.cache.misses
+        if self.document_store is not None:
+            stats.update(self.document_store.get_stats())
+        return stats
+    
+    def _load_file_documents(self, file_path: str) -> Tuple[List[tuple], List[str], Optional[list]]:
+        """
+        读取并验证文件中的所有YAML文档，启用缓存时优先从缓存读取
+        
+        Returns:
+            ([(kind, name, namespace, doc), ...], [验证错误, ...], 各文档的Merkle树列表)
+            未启用compute_merkle且缓存中没有Merkle树时，树列表为None
+        """
+        fingerprint = None
+        if self.cache is not None:
+            # 在读取文件之前取指纹，解析期间文件被修改时条目下次自然失效
+            fingerprint = self.cache.fingerprint(file_path)
+            cached = self.cache.get(file_path, fingerprint) if fingerprint is not None else None
+            if cached is not None:
+                documents, doc_errors, trees = cached
+                if trees is None and self.compute_merkle:
+                    # 缓存条目由未计算Merkle树的解析器写入，补算后更新缓存
+                    trees = [build_merkle_tree(doc) for _, _, _, doc in documents]
+                    self.cache.put(file_path, (documents, doc_errors, trees), fingerprint)
+                return documents, doc_errors, trees
+        
+        if self._use_parallel_documents(file_path):
+            documents, doc_errors = self._load_documents_parallel(file_path)
+        else:
+            documents = []
+            doc_errors = []
+            
+            # 以字节方式读取，由加载器自行解码（C加载器可直接处理字节流）
+            with open(file_path, 'rb') as f:
+                try:
+                    # 使用load_all支持多文档YAML
+                    load_validated_documents(f, self.loader, documents, doc_errors)
+                except yaml.YAMLError as e:
+                    self._raise_yaml_error(file_path, str(e), doc_errors)
+        
+        trees = None
+        if self.compute_merkle:
+            trees = [build_merkle_tree(doc) for _, _, _, doc in documents]
+        
+        if fingerprint is not None:
+            self.cache.put(file_path, (documents, doc_errors, trees), fingerprint)
+        
+        return documents, doc_errors, trees
+    
+    def _raise_yaml_error(self, file_path: str, message: str, doc_errors: List[str]):
+        """记录出错前已发现的验证错误，并抛出YAML格式错误"""
+        for error_msg in doc_errors:
+            self.errors.append(f"文件 {file_path} 中的资源验证失败: {error_msg}")
+        raise ValueError(f"YAML格式错误: {message}")
+    
+    def _use_parallel_documents(self, file_path: str) -> bool:
+        """判断单个文件是否需要按文档并行解析"""
+        workers = self.workers if self.workers > 0 else (os.cpu_count() or 1)
+        if workers <= 1:
+            return False
+        try:
+            return os.path.getsize(file_path) >= self.parallel_min_bytes
+        except OSError:
+            return False
+    
+    def _load_documents_parallel(self, file_path: str) -> Tuple[List[tuple], List[str]]:
+        """
+        按文档并行解析超大的多文档文件
+        通过内存映射在字节层面查找文档分隔行，将字节范围分块交给进程池解析，
+        结果按文件顺序合并，错误信息中的行号为整个文件中的行号
+        
+        Returns:
+            ([(kind, name, namespace, doc), ...], [验证错误, ...])
+        """
+        ranges = find_document_ranges(file_path)
+        workers = self.workers if self.workers > 0 else (os.cpu_count() or 1)
+        chunk_count = min(len(ranges), workers * PARSE_CHUNKS_PER_WORKER)
+        chunks = split_by_weight(ranges, [end - start for start, end, _ in ranges], chunk_count)
+        
+        documents = []
+        doc_errors = []
+        
+        if len(chunks) <= 1:
+            # 只有一个文档时无法拆分，直接在当前进程解析
+            chunk_results = [_parse_document_ranges_worker(file_path, chunk, self.loader)
+                             for chunk in chunks]
+        else:
+            chunk_results = self._run_document_chunks(file_path, chunks, workers)
+        
+        for chunk_documents, chunk_errors, yaml_error in chunk_results:
+            documents.extend(chunk_documents)
+            doc_errors.extend(chunk_errors)
+            if yaml_error is not None:
+                # 与串行解析一致：遇到第一个格式错误时整个文件解析失败
+                self._raise_yaml_error(file_path, yaml_error, doc_errors)
+        
+        return documents, doc_errors
+    
+    def _run_document_chunks(self, file_path: str, chunks: List[list], workers: int) -> List[tuple]:
+        """在进程池中解析文档范围块，进程池不可用时回退到串行解析"""
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(chunks))) as executor:
+                futures = [
+                    executor.submit(_parse_document_ranges_worker, file_path, chunk, self.loader)
+                    for chunk in chunks
+                ]
+                return [future.result() for future in futures]
+        except (OSError, BrokenProcessPool) as e:
+            self.errors.append(f"并行解析失败，已回退到串行解析 {file_path}: {str(e)}")
+            return [_parse_document_ranges_worker(file_path, chunk, self.loader)
+                    for chunk in chunks]
+    
     def _extract_cluster_name_from_path(self, file_path: str) -> str:
         """从文件路径提取集群名称"""
         # 假设结构：.../集群名/命名空间/资源类型/文件
@@ -142,110 +434,424 @@ class YAMLParser:
     def extract_value_by_path(self, yaml_obj: Dict[str, Any], key_path: str) -> Any:
         """
         根据路径提取YAML中的值
-        支持格式: a.b.c 或 a.b[0].c
+        支持格式: a.b.c 或 a.b[0].c，以及通配 a.b[*].c、a.*.c
+        键路径只解析一次，编译结果缓存在LRU缓存中
         
         Args:
             yaml_obj: YAML对象
             key_path: 键路径
             
         Returns:
-            提取的值，如果路径不存在返回None
+            提取的值，如果路径不存在返回None；
+            含通配的路径返回 [(具体路径, 值), ...]
         """
         if not key_path:
             return None
         
-        try:
-            current = yaml_obj
-            
-            # 分割路径
-            parts = self._parse_key_path(key_path)
-            
-            for part in parts:
-                if isinstance(part, int):
-                    # 数组索引
-                    if isinstance(current, list) and 0 <= part < len(current):
-                        current = current[part]
-                    else:
-                        return None
-                else:
-                    # 字典键
-                    if isinstance(current, dict):
-                        current = current.get(part)
-                        if current is None:
-                            return None
-                    else:
-                        return None
-            
-            return current
-            
-        except Exception:
-            return None
+        if is_wildcard_path(key_path):
+            return extract_fanout_batch([yaml_obj], key_path)[0]
+        
+        return extract_by_steps(yaml_obj, compile_key_path(key_path))
     
     def _parse_key_path(self, key_path: str) -> List:
         """
         解析键路径为部件列表
         例如: "a.b[0].c" -> ["a", "b", 0, "c"]
         """
-        parts = []
-        current = ""
-        i = 0
+        return list(compile_key_path(key_path))
+    
+    def get_errors(self) -> List[str]:
+        """获取解析过程中的错误"""
+        return self.errors
+    
+    def clear_errors(self):
+        """清除错误列表"""
+        self.errors = []
+
+
+class _Wildcard:
+    """通配步骤，ANY_INDEX匹配列表的所有元素，ANY_KEY匹配字典的所有键"""
+    __slots__ = ('symbol',)
+    
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+    
+    def __repr__(self) -> str:
+        return self.symbol
+
+
+ANY_INDEX = _Wildcard('[*]')
+ANY_KEY = _Wildcard('*')
+
+
+class ListItemKey(NamedTuple):
+    """按合并键匹配的列表元素步骤，格式化为 [name=web]，只出现在差异报告的路径中"""
+    field: str
+    value: Any
+
+
+@lru_cache(maxsize=KEY_PATH_CACHE_SIZE)
+def compile_key_path(key_path: str) -> Tuple:
+    """
+    将键路径编译为不可变的步骤元组，结果缓存在有界LRU缓存中
+    例如: "a.b[0].c" -> ("a", "b", 0, "c")
+          "a.b[*].c" -> ("a", "b", ANY_INDEX, "c")
+    
+    Args:
+        key_path: 键路径
         
-        while i < len(key_path):
-            char = key_path[i]
+    Returns:
+        步骤元组，字符串表示字典键，整数表示数组下标，ANY_INDEX/ANY_KEY表示通配
+    """
+    return tuple(_tokenize_key_path(key_path))
+
+
+def is_wildcard_path(key_path: str) -> bool:
+    """判断键路径是否包含通配（[*] 或 *）"""
+    if not key_path:
+        return False
+    return any(isinstance(step, _Wildcard) for step in compile_key_path(key_path))
+
+
+def format_key_path(steps) -> str:
+    """
+    将步骤序列格式化为键路径字符串，是compile_key_path的逆操作
+    包含点号、方括号或等于*的键会用单引号包裹
+    """
+    parts = []
+    for step in steps:
+        if isinstance(step, _Wildcard):
+            if step is ANY_INDEX:
+                parts.append('[*]')
+            else:
+                parts.append('.*' if parts else '*')
+        elif type(step) is int:
+            parts.append(f"[{step}]")
+        elif type(step) is ListItemKey:
+            parts.append(f"[{step.field}={step.value}]")
+        else:
+            key = str(step)
+            if key == '*' or any(c in key for c in ".[]"):
+                key = f"'{key}'"
+            parts.append(f".{key}" if parts else key)
+    return "".join(parts)
+
+
+def extract_fanout_batch(yaml_objs: List[Any], key_path: str) -> List[List[Tuple[str, Any]]]:
+    """
+    对一批YAML对象按含通配的键路径展开提取
+    按步骤逐层推进，每一步对整批对象的所有候选位置统一处理（向量化求值），
+    每个通配组合产出一个 (具体路径, 值)；通配之后的路径不存在时值为None，
+    通配之前的路径不存在或通配没有可展开的元素时不产出结果
+    
+    Args:
+        yaml_objs: YAML对象列表
+        key_path: 键路径，如 spec.template.spec.containers[*].image
+        
+    Returns:
+        与yaml_objs一一对应的 [(具体路径, 值), ...] 列表，按文档顺序排列
+    """
+    steps = compile_key_path(key_path) if key_path else ()
+    results = [[] for _ in yaml_objs]
+    if not steps:
+        return results
+    
+    # 候选位置: (对象序号, 当前值, 已走过的具体步骤, 是否已经过通配)
+    frontier = [(idx, obj, (), False) for idx, obj in enumerate(yaml_objs)]
+    
+    for step in steps:
+        next_frontier = []
+        for idx, current, concrete, expanded in frontier:
+            if step is ANY_INDEX:
+                if isinstance(current, list):
+                    for i, item in enumerate(current):
+                        next_frontier.append((idx, item, concrete + (i,), True))
+            elif step is ANY_KEY:
+                if isinstance(current, dict):
+                    for key, item in current.items():
+                        next_frontier.append((idx, item, concrete + (key,), True))
+            else:
+                value = extract_by_steps(current, (step,))
+                if value is not None or expanded:
+                    next_frontier.append((idx, value, concrete + (step,), expanded))
+        frontier = next_frontier
+    
+    for idx, value, concrete, expanded in frontier:
+        if expanded:
+            results[idx].append((format_key_path(concrete), value))
+    
+    return results
+
+
+def extract_by_steps(yaml_obj: Any, steps: Tuple) -> Any:
+    """
+    按编译后的步骤元组提取值
+    
+    Args:
+        yaml_obj: YAML对象
+        steps: compile_key_path的返回值
+        
+    Returns:
+        提取的值，如果路径不存在返回None
+    """
+    current = yaml_obj
+    
+    for step in steps:
+        if type(step) is int:
+            # 数组索引
+            if isinstance(current, list) and 0 <= step < len(current):
+                current = current[step]
+            else:
+                return None
+        else:
+            # 字典键
+            if isinstance(current, dict):
+                current = current.get(step)
+                if current is None:
+                    return None
+            else:
+                return None
+    
+    return current
+
+
+def _tokenize_key_path(key_path: str) -> List:
+    """
+    逐字符解析键路径为部件列表
+    未加引号的*段解析为ANY_KEY，[*]解析为ANY_INDEX，'*'仍表示字面键名
+    """
+    parts = []
+    current = ""
+    i = 0
+    
+    while i < len(key_path):
+        char = key_path[i]
+        
+        if char == "'":
+            # 支持单引号包裹的key，避免点号被拆分
+            if current:
+                parts.append(_key_step(current))
+                current = ""
             
-            if char == "'":
-                # 支持单引号包裹的key，避免点号被拆分
-                if current:
-                    parts.append(current)
-                    current = ""
-                
-                # 查找右引号
-                j = i + 1
-                while j < len(key_path) and key_path[j] != "'":
-                    j += 1
-                
-                quoted = key_path[i + 1:j] if j <= len(key_path) else key_path[i + 1:]
-                parts.append(quoted)
-                i = j
-            elif char == '.':
-                if current:
-                    parts.append(current)
-                    current = ""
-            elif char == '[':
-                # 处理数组索引
-                if current:
-                    parts.append(current)
-                    current = ""
-                
-                # 查找右括号
-                j = i + 1
-                while j < len(key_path) and key_path[j] != ']':
-                    j += 1
-                
-                if j < len(key_path):
+            # 查找右引号
+            j = i + 1
+            while j < len(key_path) and key_path[j] != "'":
+                j += 1
+            
+            quoted = key_path[i + 1:j] if j <= len(key_path) else key_path[i + 1:]
+            parts.append(quoted)
+            i = j
+        elif char == '.':
+            if current:
+                parts.append(_key_step(current))
+                current = ""
+        elif char == '[':
+            # 处理数组索引
+            if current:
+                parts.append(_key_step(current))
+                current = ""
+            
+            # 查找右括号
+            j = i + 1
+            while j < len(key_path) and key_path[j] != ']':
+                j += 1
+            
+            if j < len(key_path):
+                index_text = key_path[i+1:j]
+                if index_text.strip() == '*':
+                    parts.append(ANY_INDEX)
+                else:
                     try:
-                        index = int(key_path[i+1:j])
+                        index = int(index_text)
                         parts.append(index)
                     except ValueError:
                         pass
-                    i = j
-            else:
-                current += char
+                i = j
+        else:
+            current += char
+        
+        i += 1
+    
+    if current:
+        parts.append(_key_step(current))
+    
+    return parts
+
+
+def _key_step(segment: str):
+    """未加引号的键段，单独的*表示匹配所有键"""
+    return ANY_KEY if segment == '*' else segment
+
+
+def split_by_weight(items: List[Any], weights: List[int], chunk_count: int) -> List[List[Any]]:
+    """
+    保持顺序将元素切分为多个连续块，每块的权重总和大致相等
+    
+    Args:
+        items: 元素列表
+        weights: 与元素一一对应的权重（如字节数）
+        chunk_count: 块数量
+        
+    Returns:
+        块列表，空块会被丢弃
+    """
+    if chunk_count <= 1:
+        return [list(items)] if items else []
+    
+    total = sum(weights)
+    target = total / chunk_count if total else 0
+    
+    chunks = []
+    current = []
+    current_size = 0
+    for idx, (item, size) in enumerate(zip(items, weights)):
+        current.append(item)
+        current_size += size
+        remaining_items = len(items) - idx - 1
+        remaining_chunks = chunk_count - len(chunks) - 1
+        # 达到目标大小或剩余元素只够每块一个时切分
+        if remaining_chunks > 0 and (
+                current_size >= target or remaining_items <= remaining_chunks):
+            chunks.append(current)
+            current = []
+            current_size = 0
+    
+    if current:
+        chunks.append(current)
+    
+    return chunks
+
+
+# 文档分隔行：第0列开始且整行恰好为---
+_DOCUMENT_SEPARATOR = re.compile(rb'^---\r?$', re.MULTILINE)
+# YAML指令行（如%YAML、%TAG），作用于其后的文档，出现时不拆分文件
+_DIRECTIVE_LINE = re.compile(rb'^%', re.MULTILINE)
+
+
+def find_document_ranges(file_path: str) -> List[Tuple[int, int, int]]:
+    """
+    通过内存映射在字节层面查找多文档YAML的文档边界，不解码文件内容
+    
+    Args:
+        file_path: YAML文件路径
+        
+    Returns:
+        [(起始字节, 结束字节, 起始行号), ...]，不含分隔行本身，行号从0开始
+    """
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            if _DIRECTIVE_LINE.search(mm):
+                return [(0, size, 0)]
+            
+            ranges = []
+            start = 0
+            line = 0
             
-            i += 1
+            for match in _DOCUMENT_SEPARATOR.finditer(mm):
+                if match.start() > start:
+                    ranges.append((start, match.start(), line))
+                
+                # 跳过分隔行（含换行符）并累计行号
+                next_start = match.end()
+                if next_start < size and mm[next_start:next_start + 1] == b'\n':
+                    next_start += 1
+                line += mm[start:next_start].count(b'\n')
+                start = next_start
+            
+            if start < size:
+                ranges.append((start, size, line))
+    
+    return ranges
+
+
+def load_validated_documents(stream, loader, documents: List[tuple], doc_errors: List[str]):
+    """
+    解析多文档YAML并验证每个资源，结果追加到传入的列表中
+    出现格式错误时抛出yaml.YAMLError，此前的结果保留在列表中
+    
+    Args:
+        stream: YAML字节串或文件对象
+        loader: 加载器类
+        documents: 有效资源输出列表 [(kind, name, namespace, doc), ...]
+        doc_errors: 验证错误输出列表
+    """
+    for doc in load_yaml_all(stream, loader):
+        if doc is None:
+            continue
         
-        if current:
-            parts.append(current)
+        # 验证YAML资源
+        is_valid, kind, name, namespace, error_msg = validate_yaml_resource(doc)
         
-        return parts
+        if not is_valid:
+            doc_errors.append(error_msg)
+            continue
+        
+        documents.append((kind, name, namespace, doc))
+
+
+def _parse_document_ranges_worker(file_path: str, ranges: List[Tuple[int, int, int]],
+                                  loader=None) -> Tuple[List[tuple], List[str], Optional[str]]:
+    """
+    进程池任务：解析同一文件中的一组文档字节范围
     
-    def get_errors(self) -> List[str]:
-        """获取解析过程中的错误"""
-        return self.errors
+    Returns:
+        (有效资源列表, 验证错误列表, YAML格式错误信息或None)
+        遇到格式错误时停止，错误信息中的行号已换算为整个文件中的行号
+    """
+    documents = []
+    doc_errors = []
     
-    def clear_errors(self):
-        """清除错误列表"""
-        self.errors = []
+    with open(file_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for start, end, start_line in ranges:
+                try:
+                    load_validated_documents(mm[start:end], loader, documents, doc_errors)
+                except yaml.MarkedYAMLError as e:
+                    # 将片段内的位置换算为整个文件中的位置
+                    for attr in ('context_mark', 'problem_mark'):
+                        mark = getattr(e, attr, None)
+                        if mark is not None:
+                            setattr(e, attr, yaml.Mark(
+                                file_path, mark.index + start, mark.line + start_line,
+                                mark.column, None, None
+                            ))
+                    return documents, doc_errors, str(e)
+                except yaml.YAMLError as e:
+                    return documents, doc_errors, str(e)
+    
+    return documents, doc_errors, None
+
+
+def _parse_files_worker(file_paths: List[str], cluster_name: str,
+                        cluster_base_path: str, loader=None, cache=None,
+                        compute_merkle: bool = False) -> tuple:
+    """
+    进程池任务：串行解析一个任务块中的文件
+    
+    Returns:
+        ([(文件路径, Resource列表, 错误列表), ...], (缓存命中数, 缓存未命中数))
+    """
+    parser = YAMLParser(workers=1, loader=loader, cache=cache, compute_merkle=compute_merkle)
+    results = []
+    base_counters = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    
+    for file_path in file_paths:
+        parser.clear_errors()
+        try:
+            file_resources = parser.parse_yaml_file(file_path, cluster_name, cluster_base_path)
+        except Exception as e:
+            file_resources = []
+            parser.errors.append(f"解析文件失败 {file_path}: {str(e)}")
+        results.append((file_path, file_resources, list(parser.errors)))
+    
+    if cache is not None:
+        cache_counters = (cache.hits - base_counters[0], cache.misses - base_counters[1])
+    else:
+        cache_counters = (0, 0)
+    return results, cache_counters
 
 
 def parse_properties_content(content: str) -> Dict[str, str]:
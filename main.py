@@ -4,6 +4,7 @@ K8s YAML管理工具
 """
 
 import sys
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 from ui.main_window import MainWindow
 
@@ -25,4 +26,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包为可执行文件后，解析进程池需要此调用
+    multiprocessing.freeze_support()
     main()
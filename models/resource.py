@@ -3,21 +3,52 @@
 定义Kubernetes资源的数据结构
 """
 
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, field
+import sys
+from typing import Dict, Any, NamedTuple, Optional
+
+
+def _intern(value: Any) -> Any:
+    """驻留字符串，大量资源的集群名、命名空间等重复字符串共享同一对象"""
+    return sys.intern(value) if type(value) is str else value
 
 
-@dataclass
 class Resource:
-    """Kubernetes资源模型"""
-    kind: str  # 资源类型（如Application, Service等）
-    name: str  # 资源名称（metadata.name）
-    namespace: str  # 命名空间（metadata.namespace）
-    cluster: str  # 集群名称（顶层文件夹名）
-    file_path: str  # YAML文件路径（相对于集群根目录）
-    yaml_content: Dict[str, Any]  # YAML内容（完整的字典）
-    abs_file_path: str = ""  # 绝对文件路径
-    resource_type_folder: str = ""  # 资源类型文件夹名
+    """
+    Kubernetes资源模型
+    使用__slots__而不是实例字典，集群名、命名空间、类型、路径等标识字符串会被驻留，
+    大集群中数十万个资源共享这些字符串
+    """
+    __slots__ = ('kind', 'name', 'namespace', 'cluster', 'file_path', 'yaml_content',
+                 'abs_file_path', 'resource_type_folder', 'content_digest', 'merkle_tree')
+    
+    def __init__(self, kind: str, name: str, namespace: str, cluster: str, file_path: str,
+                 yaml_content: Dict[str, Any], abs_file_path: str = "",
+                 resource_type_folder: str = "", content_digest: str = "",
+                 merkle_tree: Optional[tuple] = None):
+        """
+        Args:
+            kind: 资源类型（如Application, Service等）
+            name: 资源名称（metadata.name）
+            namespace: 命名空间（metadata.namespace）
+            cluster: 集群名称（顶层文件夹名）
+            file_path: YAML文件路径（相对于集群根目录）
+            yaml_content: YAML内容（完整的字典）
+            abs_file_path: 绝对文件路径
+            resource_type_folder: 资源类型文件夹名
+            content_digest: 内容摘要（Merkle根摘要），空表示未计算
+            merkle_tree: 内容的Merkle树（core.merkle），None表示未计算
+        """
+        self.kind = _intern(kind)
+        self.name = name
+        self.namespace = _intern(namespace)
+        self.cluster = _intern(cluster)
+        self.file_path = _intern(file_path)
+        self.yaml_content = yaml_content
+        self.abs_file_path = _intern(abs_file_path)
+        self.resource_type_folder = _intern(resource_type_folder)
+        self.content_digest = content_digest
+        self.merkle_tree = merkle_tree
+        self.__post_init__()
     
     def __post_init__(self):
         """数据验证"""
@@ -32,6 +63,35 @@ class Resource:
         """获取资源唯一标识符"""
         return f"{self.cluster}/{self.namespace}/{self.kind}/{self.name}"
     
+    def without_content(self) -> "Resource":
+        """返回不含yaml_content的轻量副本，流式处理时用于尽早释放YAML内容"""
+        return Resource(
+            kind=self.kind,
+            name=self.name,
+            namespace=self.namespace,
+            cluster=self.cluster,
+            file_path=self.file_path,
+            yaml_content={},
+            abs_file_path=self.abs_file_path,
+            resource_type_folder=self.resource_type_folder,
+            content_digest=self.content_digest
+        )
+    
+    def _astuple(self) -> tuple:
+        return (self.kind, self.name, self.namespace, self.cluster, self.file_path,
+                self.yaml_content, self.abs_file_path, self.resource_type_folder)
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Resource):
+            return NotImplemented
+        return self._astuple() == other._astuple()
+    
+    __hash__ = None
+    
+    def __reduce__(self):
+        # 反序列化（如进程池返回结果）时重新经过__init__，使标识字符串再次驻留
+        return (Resource, self._astuple() + (self.content_digest, self.merkle_tree))
+    
     def __str__(self) -> str:
         return f"Resource(kind={self.kind}, name={self.name}, namespace={self.namespace}, cluster={self.cluster})"
     
@@ -39,33 +99,154 @@ class Resource:
         return self.__str__()
 
 
-@dataclass
+# 差异类型
+DIFF_CHANGED = "changed"  # 两侧值不同
+DIFF_ADDED = "added"  # 仅右侧存在
+DIFF_REMOVED = "removed"  # 仅左侧存在
+DIFF_TEXT = "text"  # 文本差异块：左侧值为块头（行号范围），右侧值为统一格式的差异行
+DIFF_RENAMED = "renamed"  # 资源被重命名或移动：左右两侧值为资源标识
+
+
+class Difference(NamedTuple):
+    """
+    差异项
+    兼容原先的字典形式，diff['key_path']与diff.key_path等价
+    """
+    key_path: str  # 键路径
+    left_value: Any  # 左侧值
+    right_value: Any  # 右侧值
+    change: str = DIFF_CHANGED  # 差异类型
+    
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if key not in self._fields:
+                raise KeyError(key)
+            return getattr(self, key)
+        return tuple.__getitem__(self, key)
+
+
 class ComparisonResult:
     """比较结果数据模型"""
-    resource_left: Resource  # 左侧资源
-    resource_right: Optional[Resource]  # 右侧资源（可能不存在）
-    differences: list = field(default_factory=list)  # 差异列表
+    __slots__ = ('resource_left', 'resource_right', 'differences')
     
-    def add_difference(self, key_path: str, left_value: Any, right_value: Any):
+    def __init__(self, resource_left: Optional[Resource], resource_right: Optional[Resource],
+                 differences: Optional[list] = None):
+        """
+        Args:
+            resource_left: 左侧资源（可能不存在）
+            resource_right: 右侧资源（可能不存在），两侧至少有一个
+            differences: 差异列表 [Difference, ...]
+        """
+        self.resource_left = resource_left
+        self.resource_right = resource_right
+        self.differences = [] if differences is None else differences
+    
+    def add_difference(self, key_path: str, left_value: Any, right_value: Any,
+                       change: str = DIFF_CHANGED):
         """添加差异项"""
-        self.differences.append({
-            'key_path': key_path,
-            'left_value': left_value,
-            'right_value': right_value
-        })
+        self.differences.append(Difference(_intern(key_path), left_value, right_value, change))
     
     def has_differences(self) -> bool:
         """是否有差异"""
-        return len(self.differences) > 0 or self.resource_right is None
+        return len(self.differences) > 0 or self.resource_left is None or self.resource_right is None
+    
+    @property
+    def resource(self) -> Resource:
+        """存在的一侧资源（优先左侧），用于按类型、名称分组"""
+        return self.resource_left if self.resource_left is not None else self.resource_right
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ComparisonResult):
+            return NotImplemented
+        return ((self.resource_left, self.resource_right, self.differences)
+                == (other.resource_left, other.resource_right, other.differences))
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"ComparisonResult(resource_left={self.resource_left!r}, "
+                f"resource_right={self.resource_right!r}, differences={self.differences!r})")
 
 
-@dataclass
 class ExtractionResult:
     """信息提取结果数据模型"""
-    resource: Resource  # 资源对象
-    extracted_values: Dict[str, Any] = field(default_factory=dict)  # 提取的值字典 {key_path: value}
+    __slots__ = ('resource', 'extracted_values')
+    
+    def __init__(self, resource: Resource, extracted_values: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            resource: 资源对象
+            extracted_values: 提取的值字典 {key_path: value}
+        """
+        self.resource = resource
+        self.extracted_values = {} if extracted_values is None else extracted_values
     
     def add_value(self, key_path: str, value: Any, alias: str = ""):
         """添加提取的值"""
         display_key = f"{key_path} ({alias})" if alias else key_path
-        self.extracted_values[display_key] = value
+        self.extracted_values[_intern(display_key)] = value
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, ExtractionResult):
+            return NotImplemented
+        return (self.resource, self.extracted_values) == (other.resource, other.extracted_values)
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return f"ExtractionResult(resource={self.resource!r}, extracted_values={self.extracted_values!r})"
+
+
+class MultiDifference(NamedTuple):
+    """
+    多集群比较中的一行：同一资源同一键路径在各集群的值
+    key_path为空表示资源本身，values为各集群中资源是否存在
+    """
+    key_path: str  # 键路径
+    values: tuple  # 各集群的值，顺序与集群列表一致，资源不存在时为None
+    deviating: tuple  # 偏离基准（或多数）的集群下标
+
+
+class MultiComparisonResult:
+    """多集群比较结果数据模型：一个资源在所有集群中的对比"""
+    __slots__ = ('namespace', 'kind', 'name', 'resources', 'rows')
+    
+    def __init__(self, namespace: str, kind: str, name: str, resources: list,
+                 rows: Optional[list] = None):
+        """
+        Args:
+            namespace: 命名空间
+            kind: 资源类型
+            name: 资源名
+            resources: 各集群中的资源（不存在时为None），顺序与集群列表一致
+            rows: 有偏离的行 [MultiDifference, ...]
+        """
+        self.namespace = _intern(namespace)
+        self.kind = _intern(kind)
+        self.name = name
+        self.resources = resources
+        self.rows = [] if rows is None else rows
+    
+    def add_row(self, key_path: str, values: tuple, deviating: tuple):
+        """添加一行"""
+        self.rows.append(MultiDifference(_intern(key_path), values, deviating))
+    
+    def has_differences(self) -> bool:
+        """是否有集群偏离"""
+        return len(self.rows) > 0
+    
+    def deviating_clusters(self) -> set:
+        """所有行中偏离的集群下标"""
+        return {index for row in self.rows for index in row.deviating}
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, MultiComparisonResult):
+            return NotImplemented
+        return ((self.namespace, self.kind, self.name, self.resources, self.rows)
+                == (other.namespace, other.kind, other.name, other.resources, other.rows))
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return (f"MultiComparisonResult(namespace={self.namespace!r}, kind={self.kind!r}, "
+                f"name={self.name!r}, rows={self.rows!r})")
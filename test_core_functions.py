@@ -5,16 +5,41 @@
 
 import sys
 import os
+import yaml
+import shutil
+import datetime
+import tempfile
+import pickle
+import struct
+import zlib
 from pathlib import Path
 
 # 添加项目根目录到路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from core.yaml_parser import YAMLParser
+from core.yaml_parser import YAMLParser, get_yaml_backend, compile_key_path, extract_by_steps
+from core.key_path_trie import KeyPathTrie
 from core.command_generator import CommandGenerator
 from core.yaml_comparator import YAMLComparator
 from core.info_extractor import InfoExtractor
+from core.parse_cache import ParseCache
+from core.resource_index import ResourceIndex
+from core.cluster_snapshot import (ClusterSnapshot, create_snapshot, write_snapshot,
+                                   SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION)
+from core.merkle import build_merkle_tree, merkle_digest, subtrees_match
+from core.deep_diff import deep_diff
+from core.text_diff import diff_text
+from core.compare_engine import project_document
+from core.compare_plan import key_anchor, KeyPlan
+from core.compare_state import CompareStateStore
+from core.document_store import DocumentStore
+from core.rename_detector import RenameDetector
+from models.resource import (Resource, ComparisonResult, DIFF_CHANGED, DIFF_ADDED, DIFF_REMOVED, DIFF_TEXT,
+                             DIFF_RENAMED)
+from core.resource_catalog import ResourceCatalog
 from utils.excel_exporter import ExcelExporter
+from openpyxl import load_workbook
+from utils.file_utils import ScanFilter, scan_yaml_entries
 
 def print_section(title):
     """打印分隔线"""
@@ -22,6 +47,15 @@ def print_section(title):
     print(f"  {title}")
     print("="*60)
 
+def write_resources(cluster_dir, docs):
+    """将资源文档按 命名空间/类型/名称.yaml 写入集群文件夹"""
+    for doc in docs:
+        metadata = doc['metadata']
+        folder = os.path.join(cluster_dir, metadata['namespace'], doc['kind'])
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{metadata['name']}.yaml"), 'w', encoding='utf-8') as f:
+            yaml.safe_dump(doc, f, allow_unicode=True)
+
 def test_yaml_parser():
     """测试1: YAML解析器"""
     print_section("测试1: YAML解析器")
@@ -63,6 +97,328 @@ def test_yaml_parser():
     
     return len(resources) > 0
 
+def test_parallel_parse():
+    """测试1b: 并行解析与串行解析结果一致"""
+    print_section("测试1b: 并行解析")
+    
+    cluster_path = "test_data/cluster1"
+    
+    serial_parser = YAMLParser(workers=1)
+    serial_resources = serial_parser.parse_cluster_folder(cluster_path)
+    
+    parallel_parser = YAMLParser(workers=2)
+    parallel_parser.parallel_min_files = 0  # 测试数据很小，强制走进程池
+    parallel_resources = parallel_parser.parse_cluster_folder(cluster_path)
+    
+    same = serial_resources == parallel_resources
+    same_errors = serial_parser.get_errors() == parallel_parser.get_errors()
+    print(f"串行解析 {len(serial_resources)} 个资源，并行解析 {len(parallel_resources)} 个资源")
+    print(f"{'✓' if same else '✗'} 资源列表及顺序一致")
+    print(f"{'✓' if same_errors else '✗'} 错误信息一致")
+    
+    return same and same_errors and len(parallel_resources) > 0
+
+def test_loader_parity():
+    """测试1c: libyaml加载器与纯Python加载器解析结果一致"""
+    print_section("测试1c: YAML加载器一致性")
+    
+    print(f"当前解析后端: {get_yaml_backend()}")
+    if not getattr(yaml, "__with_libyaml__", False):
+        print("⚠ 未安装libyaml，跳过一致性测试")
+        return True
+    
+    cluster_path = "test_data/cluster1"
+    c_resources = YAMLParser(workers=1, loader=yaml.CSafeLoader).parse_cluster_folder(cluster_path)
+    py_resources = YAMLParser(workers=1, loader=yaml.SafeLoader).parse_cluster_folder(cluster_path)
+    
+    same = c_resources == py_resources
+    print(f"CSafeLoader: {len(c_resources)} 个资源，SafeLoader: {len(py_resources)} 个资源")
+    print(f"{'✓' if same else '✗'} 两种加载器的Resource列表一致")
+    
+    return same and len(c_resources) > 0
+
+def test_parse_cache():
+    """测试1d: 解析缓存命中后结果不变"""
+    print_section("测试1d: 解析缓存")
+    
+    cluster_path = "test_data/cluster1"
+    
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = ParseCache(cache_dir=cache_dir, verify_hash=True)
+        parser = YAMLParser(workers=1, cache=cache)
+        
+        first = parser.parse_cluster_folder(cluster_path)
+        first_misses = cache.misses
+        second = parser.parse_cluster_folder(cluster_path)
+        stats = cache.get_stats()
+        
+        print(f"缓存条目: {stats['entries']}，命中: {stats['hits']}，未命中: {stats['misses']}")
+        
+        same = first == second
+        all_hit = cache.misses == first_misses and stats['hits'] > 0
+        print(f"{'✓' if same else '✗'} 缓存命中后资源列表一致")
+        print(f"{'✓' if all_hit else '✗'} 第二次解析全部命中缓存")
+        
+        removed = cache.clear()
+        print(f"清除缓存条目: {removed}")
+        
+        # 模拟解析期间文件被修改：指纹在读取前取得，旧内容的条目不应命中新文件
+        source = os.path.join(cache_dir, "race.yaml")
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write("kind: ConfigMap\nmetadata:\n  name: old\n")
+        fingerprint = cache.fingerprint(source)
+        with open(source, 'w', encoding='utf-8') as f:
+            f.write("kind: ConfigMap\nmetadata:\n  name: new-name\n")
+        cache.put(source, "旧内容的解析结果", fingerprint)
+        stale_ok = cache.get(source) is None
+        print(f"{'✓' if stale_ok else '✗'} 解析期间文件被修改时不会命中旧结果")
+        cache.clear()
+    
+    return same and all_hit and removed == stats['entries'] and stale_ok
+
+def test_streaming_parse():
+    """测试1e: 流式解析与列表解析结果一致"""
+    print_section("测试1e: 流式解析")
+    
+    cluster_path = "test_data/cluster1"
+    parser = YAMLParser(workers=1)
+    cmd_gen = CommandGenerator()
+    
+    resources = parser.parse_cluster_folder(cluster_path)
+    streamed = parser.iter_cluster_resources(cluster_path)
+    
+    same_commands = (cmd_gen.generate_deploy_commands(resources)
+                     == cmd_gen.generate_deploy_commands(streamed))
+    print(f"{'✓' if same_commands else '✗'} 流式生成的部署命令与列表一致")
+    
+    extractor = InfoExtractor()
+    extract_configs = [{'key_path': 'spec.replicas', 'alias': '', 'is_configmap_file': False}]
+    light_results = list(extractor.iter_extract_from_path(cluster_path, extract_configs))
+    full_results = extractor.extract_from_path(cluster_path, extract_configs)
+    
+    same_values = [r.extracted_values for r in light_results] == [r.extracted_values for r in full_results]
+    released = all(not r.resource.yaml_content for r in light_results)
+    print(f"{'✓' if same_values else '✗'} 流式提取结果一致")
+    print(f"{'✓' if released else '✗'} 流式提取结果已释放YAML内容")
+    
+    return same_commands and same_values and released
+
+def test_large_file_parse():
+    """测试1f: 超大多文档文件按文档并行解析"""
+    print_section("测试1f: 大文件并行解析")
+    
+    docs = [f"apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: cm-{i}\ndata:\n  k: 'v{i}'\n"
+            for i in range(200)]
+    broken = list(docs)
+    broken[150] = broken[150].replace("k: 'v", "k: [v")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        good_path = os.path.join(tmp_dir, "all.yaml")
+        bad_path = os.path.join(tmp_dir, "bad.yaml")
+        with open(good_path, 'w', encoding='utf-8') as f:
+            f.write("---\n" + "---\n".join(docs))
+        with open(bad_path, 'w', encoding='utf-8') as f:
+            f.write("---\n".join(broken))
+        
+        outcomes = []
+        for min_bytes in (float('inf'), 0):
+            parser = YAMLParser(workers=2)
+            parser.parallel_min_bytes = min_bytes
+            good = parser.parse_yaml_file(good_path, "c1", tmp_dir)
+            try:
+                parser.parse_yaml_file(bad_path, "c1", tmp_dir)
+                bad_error = ""
+            except ValueError as e:
+                bad_error = str(e)
+            outcomes.append(([(r.name, r.yaml_content) for r in good], bad_error))
+    
+    serial, parallel = outcomes
+    same_docs = len(serial[0]) == 200 and serial[0] == parallel[0]
+    same_error = bool(serial[1]) and serial[1] == parallel[1]
+    print(f"{'✓' if same_docs else '✗'} 并行解析结果与串行一致 ({len(parallel[0])} 个文档)")
+    print(f"{'✓' if same_error else '✗'} 格式错误行号与串行一致")
+    
+    return same_docs and same_error
+
+def test_wildcard_paths():
+    """测试1g: 通配键路径展开"""
+    print_section("测试1g: 通配键路径")
+    
+    parser = YAMLParser(workers=1)
+    sample_yaml = {
+        "spec": {"containers": [{"name": "web", "image": "nginx:1.21"}, {"name": "sidecar"}]},
+        "metadata": {"labels": {"app": "web", "tier": "frontend"}},
+    }
+    
+    images = parser.extract_value_by_path(sample_yaml, "spec.containers[*].image")
+    labels = parser.extract_value_by_path(sample_yaml, "metadata.labels.*")
+    print(f"  spec.containers[*].image = {images}")
+    print(f"  metadata.labels.* = {labels}")
+    
+    expected_images = [("spec.containers[0].image", "nginx:1.21"), ("spec.containers[1].image", None)]
+    expected_labels = [("metadata.labels.app", "web"), ("metadata.labels.tier", "frontend")]
+    
+    return images == expected_images and labels == expected_labels
+
+def test_scan_filter():
+    """测试1h: 目录扫描过滤"""
+    print_section("测试1h: 目录扫描过滤")
+    
+    cluster_path = "test_data/cluster1"
+    parser = YAMLParser(workers=1)
+    all_resources = parser.parse_cluster_folder(cluster_path)
+    
+    prod_only = parser.parse_cluster_folder(
+        cluster_path, scan_filter=ScanFilter(include_namespaces=["prod-*"], exclude_types=["Secret"])
+    )
+    filtered_ok = (len(prod_only) > 0
+                   and all(r.namespace == "prod-namespace" and r.kind != "Secret" for r in prod_only)
+                   and len(prod_only) < len(all_resources))
+    print(f"{'✓' if filtered_ok else '✗'} 按命名空间/资源类型过滤: {len(prod_only)}/{len(all_resources)} 个资源")
+    
+    serial = scan_yaml_entries(cluster_path, threads=1)
+    threaded = scan_yaml_entries(cluster_path, threads=4)
+    stat_ok = serial == threaded and all(e.size == os.path.getsize(e.path) for e in serial)
+    print(f"{'✓' if stat_ok else '✗'} 多线程扫描结果与单线程一致，文件大小来自目录项")
+    
+    return filtered_ok and stat_ok
+
+def test_document_store():
+    """测试1i: 文档去重与内容一致快速判断"""
+    print_section("测试1i: 文档去重")
+    
+    def resource(kind, name, spec):
+        return {'apiVersion': 'v1', 'kind': kind,
+                'metadata': {'name': name, 'namespace': 'prod-namespace'}, 'spec': spec}
+    
+    # 两个集群：web-app相同，api-app副本数不同，ports-app只有深层映射键的类型不同（8080与"8080"）
+    cluster1_docs = [resource('Application', 'web-app', {'replicas': 3}),
+                     resource('Application', 'api-app', {'replicas': 2}),
+                     resource('Application', 'ports-app', {'a': {'b': {'c': {'ports': {8080: 'http'}}}}})]
+    cluster2_docs = [resource('Application', 'web-app', {'replicas': 3}),
+                     resource('Application', 'api-app', {'replicas': 5}),
+                     resource('Application', 'ports-app', {'a': {'b': {'c': {'ports': {'8080': 'http'}}}}})]
+    compare_keys = [{'key_path': 'spec.replicas', 'is_configmap_file': False},
+                    {'key_path': 'spec.a.b.c.ports', 'is_configmap_file': False}]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cluster1 = os.path.join(tmp, "cluster1")
+        cluster2 = os.path.join(tmp, "cluster2")
+        write_resources(cluster1, cluster1_docs)
+        write_resources(cluster2, cluster2_docs)
+        comparator = YAMLComparator()
+        
+        same_cluster = comparator.compare_clusters(cluster1, cluster1, compare_keys)
+        stats = comparator.get_stats()
+        all_skipped = not same_cluster and stats['identical_pairs'] == stats['unique_documents'] == 3
+        print(f"{'✓' if all_skipped else '✗'} 相同集群比较时全部跳过: {stats['identical_pairs']} 对")
+        print(f"  文档去重率: {stats['dedup_ratio'] * 100:.1f}%")
+        
+        results = comparator.compare_clusters(cluster1, cluster2, compare_keys)
+        stats = comparator.get_stats()
+        shared = [r for r in results if r.resource_left is not None and r.resource_right is not None
+                  and r.resource_left.yaml_content is r.resource_right.yaml_content]
+        dedup_ok = 0 < stats['dedup_ratio'] < 1 and stats['identical_pairs'] == 1 and not shared
+        print(f"{'✓' if dedup_ok else '✗'} 不同集群去重率 {stats['dedup_ratio'] * 100:.1f}%，"
+              f"{stats['identical_pairs']} 对内容一致")
+        
+        changed = sorted(r.resource.name for r in results)
+        comparator.deep_diff = True
+        deep_changed = sorted(r.resource.name for r in comparator.compare_clusters(cluster1, cluster2, []))
+        key_type_ok = changed == deep_changed == ['api-app', 'ports-app']
+        print(f"{'✓' if key_type_ok else '✗'} 映射键8080与\"8080\"不视为相同内容: {changed}，全量比较 {deep_changed}")
+    
+    # 摘要相同但内容不同时不共享对象，也不提供摘要
+    store = DocumentStore()
+    doc_a, doc_b = {'ports': {8080: 'http'}}, {'ports': {'8080': 'http'}}
+    tree = build_merkle_tree(doc_a)
+    digest_a, shared_a, _ = store.add(doc_a, tree)
+    digest_b, shared_b, _ = store.add(doc_b, tree)
+    digest_c, shared_c, _ = store.add({'ports': {8080: 'http'}}, tree)
+    collision_ok = (digest_a and shared_a is doc_a and digest_b == '' and shared_b is doc_b
+                    and digest_c == digest_a and shared_c is doc_a and store.collisions == 1)
+    print(f"{'✓' if collision_ok else '✗'} 摘要碰撞时不替换文档内容")
+    
+    return all_skipped and dedup_ok and key_type_ok and collision_ok
+
+def test_merkle_hash():
+    """测试1j: Merkle哈希跳过未变化的key"""
+    print_section("测试1j: Merkle哈希")
+    
+    doc1 = {'metadata': {'name': 'app', 'labels': {'a': '1', 'b': '2'}},
+            'spec': {'replicas': 3, 'template': {'spec': {'containers': [{'image': 'x:1'}]}}}}
+    doc2 = {'spec': {'template': {'spec': {'containers': [{'image': 'x:1'}]}}, 'replicas': 3},
+            'metadata': {'labels': {'b': '2', 'a': '1'}, 'name': 'app'}}
+    doc3 = {'metadata': {'name': 'app', 'labels': {'a': '1', 'b': '3'}},
+            'spec': {'replicas': 3, 'template': {'spec': {'containers': [{'image': 'x:1'}]}}}}
+    order_ok = merkle_digest(doc1) == merkle_digest(doc2) != merkle_digest(doc3)
+    print(f"{'✓' if order_ok else '✗'} 摘要与映射键顺序无关，内容变化时摘要变化")
+    
+    # 超出保留深度的子树整体编码，int/bool键与同名字符串键不能得到相同摘要
+    def deep(ports):
+        return {'spec': {'a': {'b': {'c': {'ports': ports}}}}}
+    digests = {merkle_digest(deep(ports)) for ports in ({8080: 'http'}, {'8080': 'http'},
+                                                         {True: 'http'}, {'True': 'http'})}
+    type_ok = len(digests) == 4
+    print(f"{'✓' if type_ok else '✗'} 深层子树中类型不同的同名键摘要不同")
+    
+    tree1, tree3 = build_merkle_tree(doc1), build_merkle_tree(doc3)
+    match_ok = (subtrees_match(tree1, tree3, compile_key_path('spec.template'))
+                and subtrees_match(tree1, tree3, compile_key_path('status.phase'))
+                and not subtrees_match(tree1, tree3, compile_key_path('metadata.labels')))
+    print(f"{'✓' if match_ok else '✗'} 子树哈希区分相同与不同的子树")
+    
+    compare_keys = [
+        {'key_path': 'spec.replicas', 'is_configmap_file': False},
+        {'key_path': 'metadata.labels', 'is_configmap_file': False},
+        {'key_path': 'spec.template.spec.containers[*].image', 'is_configmap_file': False},
+    ]
+    comparator = YAMLComparator()
+    merkle_results = comparator.compare_clusters("test_data/cluster1", "test_data/cluster2", compare_keys)
+    skipped = comparator.get_stats()['skipped_keys']
+    comparator.parser.compute_merkle = False
+    plain_results = comparator.compare_clusters("test_data/cluster1", "test_data/cluster2", compare_keys)
+    result_ok = skipped > 0 and merkle_results == plain_results
+    print(f"{'✓' if result_ok else '✗'} 跳过 {skipped} 个未变化的key，比较结果与逐个提取一致")
+    
+    return order_ok and type_ok and match_ok and result_ok
+
+def test_key_path_trie():
+    """测试1k: 键路径前缀树与逐路径提取一致"""
+    print_section("测试1k: 键路径前缀树")
+    
+    doc = {
+        "spec": {"template": {"spec": {"containers": [
+            {"name": "web", "image": "nginx:1.21"},
+            {"name": "sidecar", "image": "envoy:1.20"},
+        ]}}},
+        "metadata": {"name": "web", "labels": {"app": "web"}},
+    }
+    key_paths = [
+        "spec.template.spec.containers[0].image",
+        "spec.template.spec.containers[-1].image",
+        "spec.template.spec.containers[1].name",
+        "spec.template.spec.containers[5].name",
+        "metadata.name",
+        "metadata.labels.app",
+        "metadata.missing",
+    ]
+    
+    ok = True
+    for paths in (key_paths, ["spec.template.spec.containers[-1].image", "metadata.name"]):
+        try:
+            extracted = KeyPathTrie(paths).extract_all(doc)
+        except Exception as e:
+            print(f"✗ 构建或提取失败: {type(e).__name__}: {e}")
+            ok = False
+            continue
+        expected = {p: extract_by_steps(doc, compile_key_path(p)) for p in paths}
+        same = extracted == expected
+        print(f"{'✓' if same else '✗'} {len(paths)} 个路径（含负下标）与extract_by_steps一致")
+        ok = ok and same
+    
+    return ok
+
 def test_command_generator():
     """测试2: 命令生成器"""
     print_section("测试2: 命令生成器")
@@ -107,6 +463,41 @@ def test_command_generator():
     
     return len(deploy_commands) > 0 and len(delete_commands) > 0
 
+def test_resource_index():
+    """测试2a: 资源索引查询"""
+    print_section("测试2a: 资源索引")
+    
+    parser = YAMLParser(workers=1)
+    cmd_gen = CommandGenerator()
+    resources = parser.parse_cluster_folder("test_data/cluster1")
+    index = ResourceIndex(resources)
+    
+    found = all(index.get(r.namespace, r.kind, r.name) is r for r in resources)
+    print(f"{'✓' if found else '✗'} 按标识查询 {len(index)} 个资源")
+    
+    same_commands = (cmd_gen.generate_deploy_commands(index) == cmd_gen.generate_deploy_commands(resources)
+                     and cmd_gen.generate_delete_commands(index) == cmd_gen.generate_delete_commands(resources))
+    print(f"{'✓' if same_commands else '✗'} 基于索引生成的命令与列表一致")
+    
+    selected = ["Service", "ConfigMap"]
+    same_filter = (cmd_gen.filter_resources_by_types(index, selected)
+                   == cmd_gen.filter_resources_by_types(resources, selected))
+    print(f"{'✓' if same_filter else '✗'} 按类型过滤结果一致")
+    
+    label_ok = all(
+        r in index.by_label(k, v)
+        for r in resources
+        for k, v in (r.yaml_content.get('metadata', {}).get('labels') or {}).items()
+    )
+    print(f"{'✓' if label_ok else '✗'} 按标签查询")
+    
+    duplicated = ResourceIndex(resources + resources[:1])
+    dup_ok = (len(duplicated.get_duplicates()) == 1
+              and duplicated.get(resources[0].namespace, resources[0].kind, resources[0].name) is resources[0])
+    print(f"{'✓' if dup_ok else '✗'} 检测到重复标识")
+    
+    return found and same_commands and same_filter and label_ok and dup_ok
+
 def test_yaml_comparator():
     """测试3: YAML比较器"""
     print_section("测试3: YAML比较器")
@@ -132,9 +523,11 @@ def test_yaml_comparator():
     
     print(f"\n✓ 发现 {len(results)} 个差异项:")
     for result in results:
-        print(f"\n  资源: {result.resource_left.kind}/{result.resource_left.name}")
+        print(f"\n  资源: {result.resource.kind}/{result.resource.name}")
         if result.resource_right is None:
             print(f"    状态: 仅存在于集群1")
+        elif result.resource_left is None:
+            print(f"    状态: 仅存在于集群2")
         else:
             for diff in result.differences:
                 print(f"    - {diff['key_path']}: {diff['left_value']} -> {diff['right_value']}")
@@ -160,13 +553,478 @@ def test_yaml_comparator():
     
     print(f"✓ 发现 {len(cm_results)} 个ConfigMap差异:")
     for result in cm_results:
-        if result.resource_left.kind == "ConfigMap":
-            print(f"\n  ConfigMap: {result.resource_left.name}")
+        if result.resource.kind == "ConfigMap":
+            print(f"\n  ConfigMap: {result.resource.name}")
             for diff in result.differences:
                 print(f"    - {diff['key_path']}: {diff['left_value']} -> {diff['right_value']}")
     
     return len(results) > 0
 
+def test_deep_diff():
+    """测试3a: 全量结构比较"""
+    print_section("测试3a: 全量比较")
+    
+    left = {'metadata': {'name': 'app', 'uid': 'u1', 'labels': {'a': '1'}},
+            'spec': {'replicas': 2, 'ports': [80, 443], 'env': [{'name': 'A', 'value': '1'}]},
+            'status': {'ready': 1}}
+    right = {'metadata': {'name': 'app', 'uid': 'u2', 'labels': {'a': '1', 'b': '2'}},
+             'spec': {'replicas': 3, 'ports': [80], 'env': [{'name': 'A', 'value': '2'}]},
+             'status': {'ready': 0}}
+    expected = [
+        ('metadata.labels.b', None, '2', DIFF_ADDED),
+        ('spec.replicas', 2, 3, DIFF_CHANGED),
+        ('spec.ports[1]', 443, None, DIFF_REMOVED),
+        ('spec.env[0].value', '1', '2', DIFF_CHANGED),
+    ]
+    ignore = ['metadata.uid', 'status']
+    plain = deep_diff(left, right, ignore)
+    hashed = deep_diff(left, right, ignore, build_merkle_tree(left), build_merkle_tree(right))
+    diff_ok = plain == expected and hashed == expected
+    print(f"{'✓' if diff_ok else '✗'} 报告变化/新增/删除的路径，忽略列表生效: {len(plain)} 项")
+    
+    deep_left, deep_right = {}, {}
+    node_left, node_right = deep_left, deep_right
+    for _ in range(5000):
+        node_left['x'], node_right['x'] = {}, {}
+        node_left, node_right = node_left['x'], node_right['x']
+    node_left['v'], node_right['v'] = 1, 2
+    nested = deep_diff(deep_left, deep_right)
+    nested_ok = len(nested) == 1 and nested[0][0].endswith('.x.v')
+    print(f"{'✓' if nested_ok else '✗'} 5000层嵌套不受递归深度限制")
+    
+    comparator = YAMLComparator()
+    comparator.deep_diff = True
+    results = comparator.compare_clusters("test_data/cluster1", "test_data/cluster2", [])
+    paths = {diff.key_path for result in results for diff in result.differences}
+    cluster_ok = 'spec.replicas' in paths and not any(p.startswith('status') for p in paths)
+    print(f"{'✓' if cluster_ok else '✗'} 集群全量比较: {len(results)} 个资源，{len(paths)} 个不同路径")
+    
+    return diff_ok and nested_ok and cluster_ok
+
+def test_compare_many():
+    """测试3b: 多集群比较"""
+    print_section("测试3b: 多集群比较")
+    
+    compare_keys = [
+        {'key_path': 'spec.replicas', 'is_configmap_file': False},
+        {'key_path': 'spec.image', 'is_configmap_file': False},
+    ]
+    clusters = ["test_data/cluster1", "test_data/cluster2", "test_data/cluster1"]
+    comparator = YAMLComparator()
+    
+    # 多数为cluster1，偏离的应只有cluster2（下标1）
+    majority = comparator.compare_many(clusters, compare_keys)
+    majority_ok = bool(majority) and all(r.deviating_clusters() == {1} for r in majority)
+    print(f"{'✓' if majority_ok else '✗'} 以多数为准: {len(majority)} 个资源偏离，偏离集群均为cluster2")
+    
+    # 两两比较的差异应与多集群矩阵一致
+    pairwise = comparator.compare_clusters(clusters[0], clusters[1], compare_keys)
+    pairwise_rows = {(r.resource_left.namespace, r.resource_left.kind, r.resource_left.name,
+                      d.key_path, d.left_value, d.right_value)
+                     for r in pairwise if r.resource_left is not None and r.resource_right is not None
+                     for d in r.differences}
+    matrix_rows = {(r.namespace, r.kind, r.name, row.key_path, row.values[0], row.values[1])
+                   for r in majority for row in r.rows if row.key_path}
+    matrix_ok = pairwise_rows == matrix_rows
+    print(f"{'✓' if matrix_ok else '✗'} 值矩阵与两两比较结果一致: {len(matrix_rows)} 行")
+    
+    baseline = comparator.compare_many(clusters, compare_keys, baseline=1)
+    baseline_ok = bool(baseline) and all(r.deviating_clusters() == {0, 2} for r in baseline)
+    print(f"{'✓' if baseline_ok else '✗'} 指定cluster2为基准时，另外两个集群偏离")
+    
+    exporter = ExcelExporter()
+    output_dir = "test_output/多集群比较"
+    export_ok = exporter.export_multi_comparison_result(
+        majority, output_dir, ["cluster1", "cluster2", "cluster1-copy"])
+    export_ok = export_ok and bool(os.listdir(output_dir))
+    print(f"{'✓' if export_ok else '✗'} 导出多列Excel: {len(os.listdir(output_dir))} 个文件")
+    
+    # 同一内嵌文件的多个key共用一次解析，解析失败只记录一次错误，其余集群照常比较
+    file_keys = [
+        {'is_configmap_file': True, 'file_key': 'application.yaml', 'file_type': 'yaml',
+         'compare_key': key}
+        for key in ('server.port', 'database.*', '')
+    ]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        copies = [os.path.join(tmp_dir, name) for name in ("a", "b", "c")]
+        for copy in copies:
+            shutil.copytree("test_data/cluster1", copy)
+        config_path = os.path.join(copies[0], "prod-namespace", "ConfigMap", "web-config.yaml")
+        with open(config_path, encoding='utf-8') as f:
+            text = f.read()
+        with open(config_path, 'w', encoding='utf-8') as f:
+            f.write(text.replace("server:\n", "server: [\n", 1))
+        comparator.clear_errors()
+        broken = comparator.compare_many(copies, file_keys)
+        parse_errors = [e for e in comparator.get_errors() if e.startswith("解析YAML文件内容失败")]
+        rows = [row for r in broken for row in r.rows if row.key_path]
+        file_ok = (len(parse_errors) == 1 and bool(rows)
+                   and all(row.deviating == (0,) and row.values[1] == row.values[2] for row in rows))
+        print(f"{'✓' if file_ok else '✗'} 内嵌文件解析失败时只记录 {len(parse_errors)} 次错误，"
+              f"{len(rows)} 行偏离均为损坏的集群")
+        comparator.clear_errors()
+    
+    return majority_ok and matrix_ok and baseline_ok and export_ok and file_ok
+
+def test_compare_engine():
+    """测试3c: 并行比较引擎"""
+    print_section("测试3c: 并行比较引擎")
+    
+    doc = {'metadata': {'name': 'a'}, 'data': {'app.yaml': 'x: 1', 'other': 'y'},
+           'spec': {'containers': [{'image': 'i0'}, {'image': 'i1', 'env': [1, 2]}]}}
+    anchors = [key_anchor({'key_path': 'spec.containers[1].image'}),
+               key_anchor({'key_path': 'metadata.*'}),
+               key_anchor({'is_configmap_file': True, 'file_key': 'app.yaml'})]
+    projected = project_document(doc, anchors)
+    project_ok = projected == {'metadata': {'name': 'a'}, 'data': {'app.yaml': 'x: 1'},
+                               'spec': {'containers': [None, {'image': 'i1'}]}}
+    print(f"{'✓' if project_ok else '✗'} 投影只保留比较所需的子树，列表下标不变")
+    
+    compare_keys = [
+        {'key_path': 'spec.replicas', 'is_configmap_file': False},
+        {'key_path': 'spec.template.spec.containers[*].image', 'is_configmap_file': False},
+        {'is_configmap_file': True, 'file_key': 'application.yaml',
+         'file_type': 'yaml', 'compare_key': 'server.port'},
+    ]
+    all_ok = project_ok
+    for deep in (False, True):
+        serial = YAMLComparator(workers=1)
+        parallel = YAMLComparator(workers=2)
+        parallel.engine.parallel_min_pairs = 0
+        serial.deep_diff = parallel.deep_diff = deep
+        expected = serial.compare_clusters("test_data/cluster1", "test_data/cluster2", compare_keys)
+        actual = parallel.compare_clusters("test_data/cluster1", "test_data/cluster2", compare_keys)
+        same = actual == expected and not parallel.get_errors()
+        mode = "全量比较" if deep else "按Key比较"
+        print(f"{'✓' if same else '✗'} {mode}: 2进程结果与串行一致（{len(actual)} 个资源）")
+        all_ok = all_ok and same
+    
+    return all_ok
+
+def test_streaming_compare():
+    """测试3d: 流式归并比较"""
+    print_section("测试3d: 流式归并比较")
+    
+    compare_keys = [
+        {'key_path': 'spec.replicas', 'is_configmap_file': False},
+        {'key_path': 'spec.template.spec.containers[*].image', 'is_configmap_file': False},
+    ]
+    
+    def summarize(results):
+        return sorted(
+            ((r.resource.namespace, r.resource.kind, r.resource.name,
+              r.resource_left is not None, r.resource_right is not None, tuple(r.differences))
+             for r in results),
+            key=repr
+        )
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # 在集群2的副本中加入仅右侧存在的资源
+        cluster1 = "test_data/cluster1"
+        cluster2 = os.path.join(tmp, "cluster2")
+        shutil.copytree("test_data/cluster2", cluster2)
+        write_resources(cluster2, [{'apiVersion': 'v1', 'kind': 'Service',
+                                    'metadata': {'name': 'new-svc', 'namespace': 'prod-namespace'},
+                                    'spec': {'type': 'ClusterIP'}}])
+        
+        comparator = YAMLComparator()
+        in_memory = comparator.compare_clusters(cluster1, cluster2, compare_keys)
+        right_only = [r for r in in_memory if r.resource_left is None]
+        print(f"{'✓' if right_only else '✗'} 报告仅存在于集群2的资源: {len(right_only)} 个")
+        
+        tmp_before = set(os.listdir(tempfile.gettempdir()))
+        comparator.streaming = True
+        streamed = comparator.compare_clusters(cluster1, cluster2, compare_keys)
+        keys = [(r.resource.namespace, r.resource.kind, r.resource.name) for r in streamed]
+        stream_ok = (summarize(streamed) == summarize(in_memory) and keys == sorted(keys)
+                     and all(r.resource.yaml_content == {} for r in streamed))
+        print(f"{'✓' if stream_ok else '✗'} 流式比较结果与内存比较一致，按标识排序，结果不保留内容")
+        
+        snapshot_path = os.path.join(tmp, "cluster2.ysnap")
+        create_snapshot(YAMLParser(), cluster2, snapshot_path)
+        from_snapshot = comparator.compare_clusters(cluster1, snapshot_path, compare_keys)
+        leftover = set(os.listdir(tempfile.gettempdir())) - tmp_before
+        snapshot_ok = summarize(from_snapshot) == summarize(in_memory) and not any(
+            name.startswith("yaml_tools_") for name in leftover)
+        print(f"{'✓' if snapshot_ok else '✗'} 快照输入结果一致，临时快照已删除")
+    
+    return bool(right_only) and stream_ok and snapshot_ok
+
+def test_compare_plan():
+    """测试3e: 比较计划"""
+    print_section("测试3e: 比较计划")
+    
+    def file_key(name, file_type, inner=''):
+        return {'key_path': '', 'is_configmap_file': True, 'file_key': name,
+                'file_type': file_type, 'compare_key': inner, 'extract_key': inner, 'alias': ''}
+    
+    compare_keys = [
+        {'key_path': 'metadata.labels.app', 'is_configmap_file': False},
+        file_key('app.yaml', 'yaml', 'server.port'),
+        file_key('app.properties', 'properties'),
+        file_key('app.yaml', 'yaml', 'server.host'),
+        file_key('notes.txt', 'text'),
+        file_key('app.yaml', 'yaml', 'routes[*].path'),
+    ]
+    plan = KeyPlan(compare_keys)
+    grouping_ok = (len(plan.steps) == len(compare_keys) and len(plan.file_groups) == 3
+                   and plan.file_groups[0].inner_keys == ('server.port', 'server.host', 'routes[*].path'))
+    print(f"{'✓' if grouping_ok else '✗'} {len(compare_keys)} 个key编译为 {len(plan.steps)} 步，"
+          f"{len(plan.file_groups)} 个内嵌文件组")
+    
+    def configmap(port, host, props, notes):
+        return Resource(kind="ConfigMap", name="app", namespace="default", cluster="", file_path="",
+                        yaml_content={'metadata': {'labels': {'app': 'demo'}}, 'data': {
+                            'app.yaml': f"server:\n  port: {port}\n  host: {host}\nroutes:\n- path: /a\n",
+                            'app.properties': props,
+                            'notes.txt': notes,
+                        }})
+    
+    r1 = configmap(8080, 'a', "x=1\ny=2\n", "hello")
+    r2 = configmap(9090, 'a', "y=3\nz=4\n", "world")
+    comparator = YAMLComparator()
+    comparator._reset_document_store()
+    result = ComparisonResult(resource_left=r1, resource_right=r2)
+    comparator._compare_resources(r1, r2, compare_keys, result)
+    actual = [(d.key_path, d.left_value, d.right_value) for d in result.differences]
+    expected = [
+        ('data.app.yaml.server.port', 8080, 9090),
+        ('data.app.properties.x', '1', ''),
+        ('data.app.properties.y', '2', '3'),
+        ('data.app.properties.z', '', '4'),
+        ('data.notes.txt', 'hello', 'world'),
+    ]
+    diff_ok = actual == expected
+    print(f"{'✓' if diff_ok else '✗'} 差异与逐个key比较一致: {actual}")
+    
+    # 每侧的yaml和properties文件各解析一次（text不解析）
+    stats = comparator.get_stats()
+    parse_ok = stats['embedded_misses'] == 4 and stats['embedded_hits'] == 0
+    print(f"{'✓' if parse_ok else '✗'} 内嵌文件解析 {stats['embedded_misses']} 次")
+    
+    extractor = InfoExtractor()
+    extracted = extractor._extract_from_resource(r1, compare_keys)
+    extract_ok = (extracted.extracted_values.get('data.app.yaml.server.host') == 'a'
+                  and extracted.extracted_values.get('data.app.yaml.routes[*].path') == [('routes[0].path', '/a')]
+                  and extracted.extracted_values.get('data.app.properties') == {'x': '1', 'y': '2'}
+                  and extractor.embedded_cache.misses == 2)
+    print(f"{'✓' if extract_ok else '✗'} 提取计划同样按文件分组: {extracted.extracted_values}")
+    
+    # 其他文件类型（如json）按原始内容比较和提取
+    json_keys = [file_key('notes.txt', 'json'), file_key('notes.txt', 'json', 'a.b')]
+    json_result = ComparisonResult(resource_left=r1, resource_right=r2)
+    comparator._compare_resources(r1, r2, json_keys, json_result)
+    json_extracted = extractor._extract_from_resource(r1, json_keys)
+    other_type_ok = ([(d.key_path, d.left_value, d.right_value) for d in json_result.differences]
+                     == [('data.notes.txt', 'hello', 'world')] * 2
+                     and json_extracted.extracted_values == {'data.notes.txt': 'hello'})
+    print(f"{'✓' if other_type_ok else '✗'} 其他文件类型按原始内容处理: {json_extracted.extracted_values}")
+    
+    return grouping_ok and diff_ok and parse_ok and extract_ok and other_type_ok
+
+def test_incremental_compare():
+    """测试3f: 增量比较"""
+    print_section("测试3f: 增量比较")
+    
+    compare_keys = [
+        {'key_path': 'spec.replicas', 'is_configmap_file': False},
+        {'key_path': 'spec.template.spec.containers[*].image', 'is_configmap_file': False},
+        {'key_path': '', 'is_configmap_file': True, 'file_key': 'application.yaml',
+         'file_type': 'yaml', 'compare_key': 'server.port'},
+    ]
+    
+    def summarize(results):
+        return [(r.resource.namespace, r.resource.kind, r.resource.name,
+                 r.resource_left is not None, r.resource_right is not None, tuple(r.differences))
+                for r in results]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cluster1 = os.path.join(tmp, "cluster1")
+        cluster2 = os.path.join(tmp, "cluster2")
+        shutil.copytree("test_data/cluster1", cluster1)
+        shutil.copytree("test_data/cluster2", cluster2)
+        store = CompareStateStore(os.path.join(tmp, "state"))
+        
+        comparator = YAMLComparator(state_store=store)
+        first = comparator.compare_clusters(cluster1, cluster2, compare_keys)
+        second = comparator.compare_clusters(cluster1, cluster2, compare_keys)
+        reused = comparator.get_stats()['reused_pairs']
+        reuse_ok = reused > 0 and summarize(second) == summarize(first)
+        print(f"{'✓' if reuse_ok else '✗'} 未修改时复用 {reused} 个资源对的结果，结果一致")
+        
+        app_file = os.path.join(cluster2, "prod-namespace", "Application", "web-app.yaml")
+        with open(app_file, 'r', encoding='utf-8') as f:
+            content = f.read()
+        with open(app_file, 'w', encoding='utf-8') as f:
+            f.write(content.replace("replicas: 5", "replicas: 7"))
+        
+        incremental = comparator.compare_clusters(cluster1, cluster2, compare_keys)
+        changed_reused = comparator.get_stats()['reused_pairs']
+        full = YAMLComparator().compare_clusters(cluster1, cluster2, compare_keys)
+        changed_ok = (changed_reused == reused - 1 and summarize(incremental) == summarize(full)
+                      and summarize(incremental) != summarize(first))
+        print(f"{'✓' if changed_ok else '✗'} 修改一个文件后只重新比较1个资源对，结果与完整比较一致")
+        
+        comparator.compare_clusters(cluster1, cluster2, compare_keys[:2])
+        config_ok = comparator.get_stats()['reused_pairs'] == 0
+        comparator.force_full = True
+        comparator.compare_clusters(cluster1, cluster2, compare_keys[:2])
+        force_ok = comparator.get_stats()['reused_pairs'] == 0
+        print(f"{'✓' if config_ok and force_ok else '✗'} 比较配置变化或强制完整比较时不复用结果")
+    
+    return reuse_ok and changed_ok and config_ok and force_ok
+
+def test_list_matching():
+    """测试3g: 列表按元素匹配"""
+    print_section("测试3g: 列表按元素匹配")
+    
+    from config import LIST_MERGE_KEYS
+    
+    left = {'spec': {'containers': [
+        {'name': 'web', 'image': 'nginx:1', 'env': [{'name': 'A', 'value': '1'}, {'name': 'B', 'value': '2'}],
+         'ports': [{'containerPort': 80}, {'containerPort': 443}]},
+        {'name': 'sidecar', 'image': 'envoy:1'},
+    ], 'args': ['a', 'b', 'c', 'd']}}
+    right = {'spec': {'containers': [
+        {'name': 'sidecar', 'image': 'envoy:1'},
+        {'name': 'web', 'image': 'nginx:2',
+         'env': [{'name': 'X', 'value': '0'}, {'name': 'A', 'value': '1'}, {'name': 'B', 'value': '3'}],
+         'ports': [{'containerPort': 443}, {'containerPort': 8080}]},
+    ], 'args': ['a', 'x', 'b', 'c', 'd']}}
+    
+    actual = deep_diff(left, right, list_keys=LIST_MERGE_KEYS)
+    expected = [
+        ('spec.containers[name=web].image', 'nginx:1', 'nginx:2', DIFF_CHANGED),
+        ('spec.containers[name=web].env[name=B].value', '2', '3', DIFF_CHANGED),
+        ('spec.containers[name=web].env[name=X]', None, {'name': 'X', 'value': '0'}, DIFF_ADDED),
+        ('spec.containers[name=web].ports[containerPort=80]', {'containerPort': 80}, None, DIFF_REMOVED),
+        ('spec.containers[name=web].ports[containerPort=8080]', None, {'containerPort': 8080}, DIFF_ADDED),
+        ('spec.args[1]', None, 'x', DIFF_ADDED),
+    ]
+    keyed_ok = actual == expected
+    print(f"{'✓' if keyed_ok else '✗'} 按合并键/对齐匹配得到 {len(actual)} 项差异"
+          f"（按下标 {len(deep_diff(left, right))} 项）")
+    for item in actual:
+        print(f"  {item}")
+    
+    trees = (build_merkle_tree(left), build_merkle_tree(right))
+    tree_ok = deep_diff(left, right, (), *trees, list_keys=LIST_MERGE_KEYS) == expected
+    print(f"{'✓' if tree_ok else '✗'} 使用Merkle树剪枝时结果一致")
+    
+    # 按key比较时列表值同样按元素匹配
+    r1 = Resource(kind="Application", name="app", namespace="ns", cluster="", file_path="",
+                  yaml_content=left)
+    r2 = Resource(kind="Application", name="app", namespace="ns", cluster="", file_path="",
+                  yaml_content=right)
+    comparator = YAMLComparator()
+    comparator.list_matching = True
+    result = ComparisonResult(resource_left=r1, resource_right=r2)
+    comparator._compare_resources(r1, r2, [{'key_path': 'spec.args'}], result)
+    key_ok = [tuple(d) for d in result.differences] == [('spec.args[1]', None, 'x', DIFF_ADDED)]
+    print(f"{'✓' if key_ok else '✗'} 按key比较列表值: {[tuple(d) for d in result.differences]}")
+    
+    return keyed_ok and tree_ok and key_ok
+
+def test_text_diff():
+    """测试3h: text类型文件按行比较"""
+    print_section("测试3h: text类型文件按行比较")
+    
+    lines = [f"key.{i}=value{i}" for i in range(5000)]
+    changed = list(lines)
+    changed[100] = "key.100=changed"
+    changed.insert(4000, "key.new=1")
+    text1 = "\n".join(lines) + "\n"
+    text2 = "\n".join(changed) + "\n"
+    
+    text_diff = diff_text(text1, text2, context=2)
+    hunk_ok = ([hunk.header for hunk in text_diff.hunks] == ["@@ -99,5 +99,5 @@", "@@ -3999,4 +3999,5 @@"]
+               and text_diff.hunks[0].body.splitlines()[2:4] == ["-key.100=value100", "+key.100=changed"]
+               and (text_diff.removed_lines, text_diff.added_lines) == (1, 2))
+    print(f"{'✓' if hunk_ok else '✗'} 差异块: {[hunk.header for hunk in text_diff.hunks]}，"
+          f"删除 {text_diff.removed_lines} 行，新增 {text_diff.added_lines} 行")
+    
+    capped = diff_text("\n".join(lines), "\n".join(line + "!" for line in lines), max_chars=1000)
+    cap_ok = sum(len(hunk.body) for hunk in capped.hunks) < 1100 and capped.removed_lines == 5000
+    print(f"{'✓' if cap_ok else '✗'} 全部修改时输出限制在上限内: "
+          f"{sum(len(hunk.body) for hunk in capped.hunks)} 个字符")
+    
+    def configmap(notes):
+        return Resource(kind="ConfigMap", name="cm", namespace="ns", cluster="", file_path="",
+                        yaml_content={'data': {'notes.txt': notes}})
+    
+    comparator = YAMLComparator()
+    comparator.text_diff = True
+    comparator.text_context = 2
+    result = ComparisonResult(resource_left=configmap(text1), resource_right=configmap(text2))
+    comparator._compare_resources(result.resource_left, result.resource_right,
+                                  [{'is_configmap_file': True, 'file_key': 'notes.txt',
+                                    'file_type': 'text'}], result)
+    stored = sum(len(str(d.left_value)) + len(str(d.right_value)) for d in result.differences)
+    result_ok = (len(result.differences) == 2
+                 and all(d.change == DIFF_TEXT and d.key_path == 'data.notes.txt' for d in result.differences)
+                 and stored < len(text1) // 10)
+    print(f"{'✓' if result_ok else '✗'} 比较结果只保存差异块: {len(result.differences)} 项，"
+          f"{stored} 个字符（全文 {len(text1) + len(text2)} 个字符）")
+    
+    return hunk_ok and cap_ok and result_ok
+
+def test_rename_detection():
+    """测试3i: 重命名/移动检测"""
+    print_section("测试3i: 重命名/移动检测")
+    
+    def application(name, namespace, index, image_tag="1.0"):
+        return Resource(kind="Application", name=name, namespace=namespace, cluster="", file_path="",
+                        yaml_content={
+                            'metadata': {'name': name, 'namespace': namespace, 'labels': {'app': f'svc-{index}'}},
+                            'spec': {'replicas': index % 5 + 1, 'image': f'registry/svc-{index}:{image_tag}',
+                                     'env': [{'name': f'VAR_{index}_{k}', 'value': str(k)} for k in range(8)]},
+                        })
+    
+    # 300个仅左侧的资源：前100个改名、再100个移动到其他命名空间并修改镜像，其余被删除；
+    # 右侧另有100个无关的新资源
+    left = [application(f"app-{i}", "ns1", i) for i in range(300)]
+    right = ([application(f"app-{i}-v2", "ns1", i) for i in range(100)]
+             + [application(f"app-{i}", "ns2", i, image_tag="2.0") for i in range(100, 200)]
+             + [application(f"new-{i}", "ns1", 1000 + i) for i in range(100)])
+    detector = RenameDetector()
+    matches = detector.detect(left, right)
+    expected = {(f"app-{i}", f"app-{i}-v2") for i in range(100)} | {(f"app-{i}", f"app-{i}") for i in range(100, 200)}
+    found = {(m.resource_left.name, m.resource_right.name) for m in matches}
+    match_ok = found == expected and all(m.similarity >= detector.threshold for m in matches)
+    print(f"{'✓' if match_ok else '✗'} 检测到 {len(matches)} 个重命名/移动（预期 {len(expected)} 个），"
+          f"最低相似度 {min(m.similarity for m in matches):.2f}")
+    
+    candidate_ok = detector.candidate_pairs < len(left) * len(right) // 10
+    print(f"{'✓' if candidate_ok else '✗'} 候选对 {detector.candidate_pairs} 个（两两比较需 {len(left) * len(right)} 个）")
+    
+    other_kind = Resource(kind="Service", name="app-0-v2", namespace="ns1", cluster="", file_path="",
+                          yaml_content=right[0].yaml_content)
+    kind_ok = detector.detect(left[:1], [other_kind]) == []
+    print(f"{'✓' if kind_ok else '✗'} 不同类型的资源不配对")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # 集群2的副本中加入改名后的web-svc
+        cluster2 = os.path.join(tmp, "cluster2")
+        shutil.copytree("test_data/cluster2", cluster2)
+        with open("test_data/cluster1/prod-namespace/Service/web-svc.yaml", 'r', encoding='utf-8') as f:
+            service = yaml.safe_load(f)
+        service['metadata']['name'] = "web-svc-renamed"
+        write_resources(cluster2, [service])
+        
+        comparator = YAMLComparator()
+        comparator.detect_renames = True
+        results = comparator.compare_clusters("test_data/cluster1", cluster2,
+                                              [{'key_path': 'spec.replicas', 'is_configmap_file': False}])
+    renamed = [r for r in results if r.differences and r.differences[0].change == DIFF_RENAMED]
+    cluster_ok = (len(renamed) == 1 and renamed[0].resource_left.name == "web-svc"
+                  and renamed[0].resource_right.name == "web-svc-renamed"
+                  and not any(r.resource_left is None and r.resource_right.name == "web-svc-renamed"
+                              for r in results)
+                  and comparator.get_stats()['renames'] == 1)
+    print(f"{'✓' if cluster_ok else '✗'} 集群比较中 web-svc -> web-svc-renamed 合并为一个结果")
+    
+    return match_ok and candidate_ok and kind_ok and cluster_ok
+
 def test_info_extractor():
     """测试4: 信息提取器"""
     print_section("测试4: 信息提取器")
@@ -198,6 +1056,188 @@ def test_info_extractor():
     
     return len(results) > 0
 
+def test_cluster_snapshot():
+    """测试4a: 集群快照保存与加载"""
+    print_section("测试4a: 集群快照")
+    
+    compare_keys = [{'key_path': 'spec.replicas', 'is_configmap_file': False}]
+    extract_configs = [{'key_path': 'spec.replicas', 'alias': '', 'is_configmap_file': False}]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        snapshot_path = os.path.join(tmp_dir, "cluster1.ysnap")
+        parser = YAMLParser(workers=1)
+        count = create_snapshot(parser, "test_data/cluster1", snapshot_path)
+        
+        snapshot = ClusterSnapshot(snapshot_path)
+        lazy = all(r._content is None for r in snapshot.resources)
+        as_tuple = lambda r: (r.kind, r.name, r.namespace, r.file_path, r.yaml_content)
+        same_resources = ([as_tuple(r) for r in snapshot.resources]
+                          == [as_tuple(r) for r in parser.parse_cluster_folder("test_data/cluster1")])
+        print(f"{'✓' if same_resources else '✗'} 快照加载 {count} 个资源，与重新解析结果一致")
+        print(f"{'✓' if lazy else '✗'} 加载时未解码资源内容")
+        
+        comparator = YAMLComparator()
+        from_folder = comparator.compare_clusters("test_data/cluster1", "test_data/cluster2", compare_keys)
+        from_snapshot = comparator.compare_clusters(snapshot_path, "test_data/cluster2", compare_keys)
+        same_compare = ([r.differences for r in from_folder] == [r.differences for r in from_snapshot])
+        print(f"{'✓' if same_compare else '✗'} 使用快照比较结果一致")
+        
+        extractor = InfoExtractor()
+        same_extract = ([r.extracted_values for r in extractor.extract_from_path(snapshot_path, extract_configs)]
+                        == [r.extracted_values for r in extractor.extract_from_path("test_data/cluster1", extract_configs)])
+        print(f"{'✓' if same_extract else '✗'} 使用快照提取结果一致")
+        
+        # 快照可能来自他人：只还原内置类型和日期，其他类型拒绝解码，不执行任何代码
+        class Payload:
+            def __reduce__(self):
+                return (os.getcwd, ())
+        
+        def app(name, spec):
+            return Resource(kind="Application", name=name, namespace="ns", cluster="", file_path="",
+                            yaml_content={'metadata': {'name': name}, 'spec': spec})
+        
+        unsafe_path = os.path.join(tmp_dir, "unsafe.ysnap")
+        write_snapshot([app("dated", {'since': datetime.date(2024, 1, 2)}),
+                        app("payload", {'value': Payload()})], unsafe_path)
+        unsafe = ClusterSnapshot(unsafe_path)
+        dated, payload = unsafe.resources
+        safe_ok = (dated.yaml_content['spec']['since'] == datetime.date(2024, 1, 2)
+                   and payload.yaml_content == {} and len(unsafe.take_decode_errors()) == 1)
+        print(f"{'✓' if safe_ok else '✗'} 日期正常还原，包含其他类型的资源拒绝解码")
+        
+        # 资源内容损坏时记录错误，比较继续进行
+        with open(snapshot_path, 'r+b') as f:
+            f.seek(len(b"YTSNAP01") + 2)
+            f.write(b"\xff" * 8)
+        comparator.clear_errors()
+        corrupt_results = comparator.compare_clusters(snapshot_path, "test_data/cluster2", compare_keys)
+        corrupt_errors = comparator.get_errors()
+        corrupt_ok = (len(corrupt_results) > 0
+                      and any(error.startswith("解码快照资源失败") for error in corrupt_errors))
+        print(f"{'✓' if corrupt_ok else '✗'} 资源内容损坏时记录错误: {corrupt_errors[:1]}")
+        comparator.clear_errors()
+        
+        # 索引结构损坏时统一报ValueError，调用方按加载失败处理
+        def write_index(name, index):
+            path = os.path.join(tmp_dir, name)
+            blob = zlib.compress(pickle.dumps(index))
+            with open(path, 'wb') as f:
+                f.write(SNAPSHOT_MAGIC + blob + struct.pack("<QQ", len(SNAPSHOT_MAGIC), len(blob))
+                        + SNAPSHOT_MAGIC)
+            return path
+        
+        index_ok = True
+        good_index = {'version': SNAPSHOT_FORMAT_VERSION, 'cluster_name': "", 'source_path': "",
+                      'created_at': 0.0, 'errors': [], 'fingerprints': {}, 'resources': []}
+        bad_indexes = {
+            "list.ysnap": [1, 2, 3],
+            "missing.ysnap": {'version': SNAPSHOT_FORMAT_VERSION},
+            "short_entry.ysnap": dict(good_index, resources=[("Deployment", "web")]),
+            "not_list.ysnap": dict(good_index, resources=7),
+        }
+        for name, index in bad_indexes.items():
+            try:
+                ClusterSnapshot(write_index(name, index), use_mmap=True)
+                index_ok = False
+            except ValueError as e:
+                index_ok = index_ok and str(e).startswith("集群快照索引损坏")
+            except Exception:
+                index_ok = False
+        index_ok = index_ok and ClusterSnapshot(write_index("empty.ysnap", good_index)).resources == []
+        print(f"{'✓' if index_ok else '✗'} 索引结构损坏时报告\"集群快照索引损坏\"")
+    
+    return (same_resources and lazy and same_compare and same_extract and safe_ok and corrupt_ok
+            and index_ok)
+
+def test_resource_catalog():
+    """测试4b: SQLite资源目录"""
+    print_section("测试4b: 资源目录")
+    
+    extract_configs = [
+        {'key_path': 'spec.replicas', 'alias': '', 'is_configmap_file': False},
+        {'key_path': 'metadata.name', 'alias': '名称', 'is_configmap_file': False},
+    ]
+    extractor = InfoExtractor()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        catalog = ResourceCatalog(os.path.join(tmp_dir, "catalog.sqlite"))
+        first = [catalog.ingest_cluster(f"test_data/{c}") for c in ("cluster1", "cluster2")]
+        again = catalog.ingest_cluster("test_data/cluster1")
+        incremental = again['parsed'] == 0 and again['skipped'] == first[0]['parsed']
+        print(f"{'✓' if incremental else '✗'} 重新导入时跳过未修改的文件: {again}")
+        
+        from_catalog = extractor.extract_from_catalog(catalog, extract_configs, clusters=["cluster1"])
+        from_files = extractor.extract_from_path("test_data/cluster1", extract_configs)
+        key = lambda r: (r.resource.namespace, r.resource.kind, r.resource.name)
+        same_values = (sorted((key(r), r.extracted_values) for r in from_catalog)
+                       == sorted((key(r), r.extracted_values) for r in from_files))
+        print(f"{'✓' if same_values else '✗'} 从目录提取结果与解析文件一致 ({len(from_catalog)} 个资源)")
+        
+        expected = sorted(
+            (r.resource.cluster, r.resource.name)
+            for c in ("cluster1", "cluster2")
+            for r in extractor.extract_from_path(f"test_data/{c}", extract_configs)
+            if r.resource.kind == "Application" and (r.extracted_values['spec.replicas'] or 0) > 2
+        )
+        records = catalog.query(kinds=["Application"], conditions=[("spec.replicas", ">", 2)])
+        same_query = sorted((r['cluster'], r['name']) for r in records) == expected
+        print(f"{'✓' if same_query else '✗'} 跨集群查询 replicas > 2 的Application: {len(records)} 个")
+        
+        # 不同路径下的同名集群文件夹不能互相覆盖
+        app = {'apiVersion': 'v1', 'kind': 'Application',
+               'metadata': {'name': 'web', 'namespace': 'prod-namespace'},
+               'spec': {'containers': [{'name': 'web', 'image': 'nginx:1.21'},
+                                       {'name': 'sidecar', 'image': 'envoy:1.0'}]}}
+        write_resources(os.path.join(tmp_dir, "r1", "prod"), [app])
+        write_resources(os.path.join(tmp_dir, "r2", "prod"), [app])
+        catalog.ingest_cluster(os.path.join(tmp_dir, "r1", "prod"))
+        catalog.clear_errors()
+        conflict = catalog.ingest_cluster(os.path.join(tmp_dir, "r2", "prod"))
+        conflict_errors = catalog.get_errors()
+        catalog.clear_errors()
+        renamed = catalog.ingest_cluster(os.path.join(tmp_dir, "r2", "prod"), cluster_name="prod-r2")
+        prod_clusters = {c['cluster']: c['resources'] for c in catalog.list_clusters() if c['cluster'].startswith("prod")}
+        name_ok = (conflict['parsed'] == 0 and conflict_errors and renamed['parsed'] == 1
+                   and prod_clusters == {'prod': 1, 'prod-r2': 1})
+        print(f"{'✓' if name_ok else '✗'} 同名集群文件夹报告冲突，可指定集群名导入: {prod_clusters}")
+        
+        wildcard = catalog.query(clusters=["prod"], conditions=[("spec.containers[*].image", "=", "envoy:1.0")],
+                                 paths=["spec.containers[*].image"])
+        wildcard_ok = (len(wildcard) == 1 and wildcard[0]['values'] == {
+            'spec.containers[0].image': 'nginx:1.21', 'spec.containers[1].image': 'envoy:1.0'})
+        print(f"{'✓' if wildcard_ok else '✗'} 含通配的键路径条件匹配任一元素: {len(wildcard)} 个资源")
+        catalog.close()
+    
+    return incremental and same_values and same_query and name_ok and wildcard_ok
+
+def test_embedded_file_cache():
+    """测试4c: ConfigMap内嵌文件只解析一次"""
+    print_section("测试4c: 内嵌文件解析缓存")
+    
+    file_keys = [
+        {'key_path': '', 'is_configmap_file': True, 'file_key': 'application.yaml',
+         'file_type': 'yaml', 'compare_key': key, 'extract_key': key, 'alias': ''}
+        for key in ('server.port', 'server.host', 'logging.level')
+    ]
+    
+    extractor = InfoExtractor()
+    results = extractor.extract_from_path("test_data/cluster1", file_keys)
+    stats = extractor.get_stats()
+    configmaps = sum(1 for r in results if r.resource.kind == "ConfigMap")
+    # 非ConfigMap资源的文件内容为空，同样只解析一次
+    extract_ok = stats['embedded_misses'] <= configmaps + 1 and stats['embedded_hits'] > 0
+    print(f"{'✓' if extract_ok else '✗'} 提取: 命中 {stats['embedded_hits']} 次，未命中 {stats['embedded_misses']} 次")
+    
+    comparator = YAMLComparator()
+    comparator.compare_clusters("test_data/cluster1", "test_data/cluster2", file_keys)
+    stats = comparator.get_stats()
+    # 比较计划按文件分组，同一文件的多个比较key每侧只读取一次
+    pairs = len(results)
+    compare_ok = 0 < stats['embedded_hits'] + stats['embedded_misses'] <= 2 * pairs
+    print(f"{'✓' if compare_ok else '✗'} 比较: 命中 {stats['embedded_hits']} 次，未命中 {stats['embedded_misses']} 次")
+    
+    return extract_ok and compare_ok
+
 def test_excel_export():
     """测试5: Excel导出"""
     print_section("测试5: Excel导出")
@@ -223,7 +1263,33 @@ def test_excel_export():
         for error in exporter.get_errors():
             print(f"  {error}")
     
-    return success
+    # 资源迭代器和提取结果迭代器都逐行写出，读回验证内容
+    table_ok = False
+    if success:
+        rows = list(load_workbook(output_file).active.values)
+        table_ok = len(rows) == len(resources) + 1 and rows[1][3] == resources[0].name
+    print(f"{'✓' if table_ok else '✗'} 资源表读回 {len(resources)} 行数据")
+    
+    extract_configs = [
+        {'key_path': 'metadata.name', 'alias': ''},
+        {'key_path': 'metadata.labels.*', 'alias': ''},
+    ]
+    extract_dir = f"{output_dir}/提取结果"
+    extracted = InfoExtractor().extract_from_path("test_data/cluster1", extract_configs)
+    stream_ok = exporter.export_extraction_result(
+        InfoExtractor().iter_extract_from_path("test_data/cluster1", extract_configs), extract_dir)
+    kind = extracted[0].resource.kind
+    expected_columns = []
+    for result in extracted:
+        if result.resource.kind == kind:
+            expected_columns.extend(k for k in result.extracted_values if k not in expected_columns)
+    if stream_ok:
+        rows = list(load_workbook(os.path.join(extract_dir, f"{kind}_提取结果.xlsx")).active.values)
+        stream_ok = (list(rows[0]) == ["集群名", "命名空间", "资源名"] + expected_columns
+                     and len(rows) == 1 + sum(r.resource.kind == kind for r in extracted))
+    print(f"{'✓' if stream_ok else '✗'} 提取结果流式导出，{kind} 的列为全部结果的并集")
+    
+    return success and table_ok and stream_ok
 
 def main():
     """主测试函数"""
@@ -242,9 +1308,32 @@ def main():
     # 运行测试
     try:
         results.append(("YAML解析器", test_yaml_parser()))
+        results.append(("并行解析", test_parallel_parse()))
+        results.append(("加载器一致性", test_loader_parity()))
+        results.append(("解析缓存", test_parse_cache()))
+        results.append(("流式解析", test_streaming_parse()))
+        results.append(("大文件并行解析", test_large_file_parse()))
+        results.append(("通配键路径", test_wildcard_paths()))
+        results.append(("目录扫描过滤", test_scan_filter()))
+        results.append(("文档去重", test_document_store()))
+        results.append(("Merkle哈希", test_merkle_hash()))
+        results.append(("键路径前缀树", test_key_path_trie()))
         results.append(("命令生成器", test_command_generator()))
+        results.append(("资源索引", test_resource_index()))
         results.append(("YAML比较器", test_yaml_comparator()))
+        results.append(("全量比较", test_deep_diff()))
+        results.append(("多集群比较", test_compare_many()))
+        results.append(("并行比较引擎", test_compare_engine()))
+        results.append(("流式归并比较", test_streaming_compare()))
+        results.append(("比较计划", test_compare_plan()))
+        results.append(("增量比较", test_incremental_compare()))
+        results.append(("列表按元素匹配", test_list_matching()))
+        results.append(("文本按行比较", test_text_diff()))
+        results.append(("重命名检测", test_rename_detection()))
         results.append(("信息提取器", test_info_extractor()))
+        results.append(("集群快照", test_cluster_snapshot()))
+        results.append(("资源目录", test_resource_catalog()))
+        results.append(("内嵌文件缓存", test_embedded_file_cache()))
         results.append(("Excel导出", test_excel_export()))
     except Exception as e:
         print(f"\n✗ 测试过程中出错: {e}")
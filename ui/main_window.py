@@ -10,8 +10,12 @@ from ui.tab_command_gen import CommandGeneratorTab
 from ui.tab_comparator import ComparatorTab
 from ui.tab_extractor import ExtractorTab
 from ui.tab_variable_replacer import VariableReplacerTab
-from config import APP_NAME, APP_VERSION, WINDOW_WIDTH, WINDOW_HEIGHT
+from config import (APP_NAME, APP_VERSION, WINDOW_WIDTH, WINDOW_HEIGHT, PARSE_CACHE_ENABLED,
+                    SNAPSHOT_EXTENSION)
 from core.key_config_store import KeyConfigStore
+from core.parse_cache import ParseCache
+from core.cluster_snapshot import create_snapshot
+from core.yaml_parser import YAMLParser, get_yaml_backend
 import os
 
 
@@ -23,6 +27,7 @@ class MainWindow(QMainWindow):
         self.settings = QSettings("YAMLTools", APP_NAME)
         self.config_store = KeyConfigStore()
         self.config_path = ""
+        self.parse_cache = ParseCache() if PARSE_CACHE_ENABLED else None
         self.init_ui()
     
     def init_ui(self):
@@ -44,9 +49,9 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.tabs)
         
         # 添加三个功能标签页
-        self.command_gen_tab = CommandGeneratorTab()
-        self.comparator_tab = ComparatorTab()
-        self.extractor_tab = ExtractorTab()
+        self.command_gen_tab = CommandGeneratorTab(self.parse_cache)
+        self.comparator_tab = ComparatorTab(self.parse_cache)
+        self.extractor_tab = ExtractorTab(self.parse_cache)
         self.variable_replacer_tab = VariableReplacerTab()
         
         self.tabs.addTab(self.command_gen_tab, "命令生成器")
@@ -95,6 +100,26 @@ class MainWindow(QMainWindow):
         exit_action.triggered.connect(self.close)
         file_menu.addAction(exit_action)
         
+        # 工具菜单
+        tools_menu = menubar.addMenu("工具(&T)")
+        
+        cache_stats_action = QAction("解析缓存统计(&C)", self)
+        cache_stats_action.setStatusTip("查看解析缓存的使用情况")
+        cache_stats_action.triggered.connect(self.show_cache_stats)
+        tools_menu.addAction(cache_stats_action)
+        
+        clear_cache_action = QAction("清除解析缓存(&R)", self)
+        clear_cache_action.setStatusTip("删除所有解析缓存条目")
+        clear_cache_action.triggered.connect(self.clear_parse_cache)
+        tools_menu.addAction(clear_cache_action)
+        
+        tools_menu.addSeparator()
+        
+        snapshot_action = QAction("创建集群快照(&S)...", self)
+        snapshot_action.setStatusTip("解析集群文件夹并保存为快照，比较和提取时可直接加载")
+        snapshot_action.triggered.connect(self.create_cluster_snapshot)
+        tools_menu.addAction(snapshot_action)
+        
         # 帮助菜单
         help_menu = menubar.addMenu("帮助(&H)")
         
@@ -113,6 +138,7 @@ class MainWindow(QMainWindow):
         about_text = f"""
         <h2>{APP_NAME}</h2>
         <p>版本: {APP_VERSION}</p>
+        <p>YAML解析后端: {get_yaml_backend()}</p>
         <p>这是一个Kubernetes YAML管理工具，提供以下功能：</p>
         <ul>
             <li>YAML命令生成器：生成部署和删除命令</li>
@@ -123,6 +149,58 @@ class MainWindow(QMainWindow):
         """
         QMessageBox.about(self, "关于", about_text)
     
+    def show_cache_stats(self):
+        """显示解析缓存统计"""
+        if self.parse_cache is None:
+            QMessageBox.information(self, "解析缓存", "解析缓存未启用")
+            return
+        
+        stats = self.parse_cache.get_stats()
+        total_lookups = stats['hits'] + stats['misses']
+        hit_rate = stats['hits'] / total_lookups * 100 if total_lookups else 0.0
+        stats_text = (
+            f"缓存目录: {stats['cache_dir']}\n"
+            f"缓存条目: {stats['entries']}\n"
+            f"占用空间: {stats['total_bytes'] / 1024 / 1024:.1f} MB / "
+            f"{stats['max_bytes'] / 1024 / 1024:.0f} MB\n"
+            f"本次运行命中: {stats['hits']}，未命中: {stats['misses']}（命中率 {hit_rate:.1f}%）"
+        )
+        QMessageBox.information(self, "解析缓存", stats_text)
+    
+    def clear_parse_cache(self):
+        """清除解析缓存"""
+        if self.parse_cache is None:
+            QMessageBox.information(self, "解析缓存", "解析缓存未启用")
+            return
+        
+        removed = self.parse_cache.clear()
+        self.statusBar().showMessage(f"已清除 {removed} 个解析缓存条目")
+    
+    def create_cluster_snapshot(self):
+        """解析集群文件夹并保存为快照"""
+        folder = QFileDialog.getExistingDirectory(self, "选择集群文件夹")
+        if not folder:
+            return
+        
+        default_name = os.path.basename(folder) + SNAPSHOT_EXTENSION
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "保存集群快照", default_name, f"集群快照 (*{SNAPSHOT_EXTENSION})"
+        )
+        if not file_path:
+            return
+        
+        parser = YAMLParser(cache=self.parse_cache)
+        try:
+            count = create_snapshot(parser, folder, file_path)
+        except Exception as e:
+            QMessageBox.critical(self, "错误", f"创建集群快照失败:\n{str(e)}")
+            return
+        
+        message = f"已保存 {count} 个资源到快照: {file_path}"
+        if parser.get_errors():
+            message += f"\n解析过程中出现 {len(parser.get_errors())} 个错误，已一并保存到快照"
+        QMessageBox.information(self, "集群快照", message)
+    
     def show_usage(self):
         """显示使用说明"""
         usage_text = """
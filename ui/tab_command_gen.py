@@ -9,6 +9,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt5.QtCore import Qt
 from core.yaml_parser import YAMLParser
 from core.command_generator import CommandGenerator
+from core.resource_index import ResourceIndex
 from utils.excel_exporter import ExcelExporter
 from config import SUPPORTED_RESOURCE_TYPES
 
@@ -16,12 +17,13 @@ from config import SUPPORTED_RESOURCE_TYPES
 class CommandGeneratorTab(QWidget):
     """命令生成器标签页"""
     
-    def __init__(self):
+    def __init__(self, parse_cache=None):
         super().__init__()
-        self.parser = YAMLParser()
+        self.parser = YAMLParser(cache=parse_cache)
         self.cmd_gen = CommandGenerator()
         self.excel_exporter = ExcelExporter()
         self.resources = []
+        self.resource_index = ResourceIndex()
         self.cluster_path = ""
         
         self.init_ui()
@@ -101,6 +103,11 @@ class CommandGeneratorTab(QWidget):
         
         # 解析集群
         self.resources = self.parser.parse_cluster_folder(self.cluster_path)
+        self.resource_index = ResourceIndex(self.resources)
+        
+        for (namespace, kind, name), duplicates in self.resource_index.get_duplicates().items():
+            files = ", ".join(r.file_path for r in duplicates)
+            self.parser.errors.append(f"存在重复资源 {namespace}/{kind}/{name}: {files}")
         
         if self.parser.get_errors():
             error_msg = "\n".join(self.parser.get_errors())
@@ -141,7 +148,7 @@ class CommandGeneratorTab(QWidget):
         else:
             # 没有选中，返回按资源类型过滤的资源
             selected_types = [t for t, cb in self.type_checkboxes.items() if cb.isChecked()]
-            return self.cmd_gen.filter_resources_by_types(self.resources, selected_types)
+            return self.cmd_gen.filter_resources_by_types(self.resource_index, selected_types)
     
     def export_to_excel(self):
         """导出资源表到Excel"""
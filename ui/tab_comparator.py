@@ -8,16 +8,21 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
                              QLineEdit, QComboBox, QCheckBox, QHeaderView)
 from PyQt5.QtCore import Qt
 from core.yaml_comparator import YAMLComparator
+from core.compare_state import CompareStateStore
 from utils.excel_exporter import ExcelExporter
+from config import SNAPSHOT_EXTENSION, COMPARE_STATE_ENABLED
 import os
 
 
 class ComparatorTab(QWidget):
     """YAML比较器标签页"""
     
-    def __init__(self):
+    def __init__(self, parse_cache=None):
         super().__init__()
-        self.comparator = YAMLComparator()
+        self.comparator = YAMLComparator(
+            cache=parse_cache,
+            state_store=CompareStateStore() if COMPARE_STATE_ENABLED else None
+        )
         self.excel_exporter = ExcelExporter()
         self.comparison_results = []
         
@@ -50,16 +55,22 @@ class ComparatorTab(QWidget):
         self.cluster1_label = QLabel("集群1: 未选择")
         self.select_cluster1_btn = QPushButton("选择集群1")
         self.select_cluster1_btn.clicked.connect(lambda: self.select_cluster(1))
+        self.select_snapshot1_btn = QPushButton("选择快照1")
+        self.select_snapshot1_btn.clicked.connect(lambda: self.select_snapshot(1))
         cluster1_layout.addWidget(self.cluster1_label)
         cluster1_layout.addWidget(self.select_cluster1_btn)
+        cluster1_layout.addWidget(self.select_snapshot1_btn)
         cluster1_layout.addStretch()
         
         cluster2_layout = QHBoxLayout()
         self.cluster2_label = QLabel("集群2: 未选择")
         self.select_cluster2_btn = QPushButton("选择集群2")
         self.select_cluster2_btn.clicked.connect(lambda: self.select_cluster(2))
+        self.select_snapshot2_btn = QPushButton("选择快照2")
+        self.select_snapshot2_btn.clicked.connect(lambda: self.select_snapshot(2))
         cluster2_layout.addWidget(self.cluster2_label)
         cluster2_layout.addWidget(self.select_cluster2_btn)
+        cluster2_layout.addWidget(self.select_snapshot2_btn)
         cluster2_layout.addStretch()
         
         cluster_layout.addLayout(cluster1_layout)
@@ -117,6 +128,34 @@ class ComparatorTab(QWidget):
         key_btn_layout.addStretch()
         
         key_layout.addLayout(key_btn_layout)
+        
+        # 全量比较：不按Key配置，报告所有变化的路径
+        deep_layout = QHBoxLayout()
+        self.deep_diff_check = QCheckBox("全量比较（忽略Key配置）")
+        self.ignore_paths_edit = QLineEdit(", ".join(self.comparator.ignore_paths))
+        self.ignore_paths_edit.setToolTip("全量比较时忽略的路径，逗号分隔，支持 [*] 和 * 通配")
+        deep_layout.addWidget(self.deep_diff_check)
+        deep_layout.addWidget(QLabel("忽略路径:"))
+        deep_layout.addWidget(self.ignore_paths_edit)
+        key_layout.addLayout(deep_layout)
+        
+        self.streaming_check = QCheckBox("流式比较（超大集群，内存占用不随集群规模增长）")
+        key_layout.addWidget(self.streaming_check)
+        
+        self.list_matching_check = QCheckBox("列表按元素匹配（containers/env按name，ports按containerPort，其余按内容对齐）")
+        key_layout.addWidget(self.list_matching_check)
+        
+        self.text_diff_check = QCheckBox("text类型文件按行比较（只导出差异行及上下文）")
+        key_layout.addWidget(self.text_diff_check)
+        
+        self.detect_renames_check = QCheckBox("检测重命名/移动的资源（仅一侧存在且内容相似的资源配对比较，不支持流式比较）")
+        key_layout.addWidget(self.detect_renames_check)
+        
+        # 默认只重新比较上次比较后内容有变化的资源
+        self.full_compare_check = QCheckBox("完整比较（不复用上次的比较结果）")
+        self.full_compare_check.setEnabled(self.comparator.state_store is not None)
+        key_layout.addWidget(self.full_compare_check)
+        
         key_group.setLayout(key_layout)
         layout.addWidget(key_group)
         
@@ -167,6 +206,20 @@ class ComparatorTab(QWidget):
                 self.cluster2_path = folder
                 self.cluster2_label.setText(f"集群2: {cluster_name}")
     
+    def select_snapshot(self, cluster_num):
+        """选择集群快照文件，代替集群文件夹"""
+        file_path, _ = QFileDialog.getOpenFileName(
+            self, f"选择集群{cluster_num}快照", "", f"集群快照 (*{SNAPSHOT_EXTENSION})"
+        )
+        if file_path:
+            snapshot_name = os.path.basename(file_path)
+            if cluster_num == 1:
+                self.cluster1_path = file_path
+                self.cluster1_label.setText(f"集群1: {snapshot_name}（快照）")
+            else:
+                self.cluster2_path = file_path
+                self.cluster2_label.setText(f"集群2: {snapshot_name}（快照）")
+    
     def select_file(self, file_num):
         """选择YAML文件"""
         file_path, _ = QFileDialog.getOpenFileName(
@@ -188,7 +241,7 @@ class ComparatorTab(QWidget):
         
         # Key路径输入框
         key_input = QLineEdit()
-        key_input.setPlaceholderText("如: spec.replicas")
+        key_input.setPlaceholderText("如: spec.replicas 或 containers[*].image")
         self.key_table.setCellWidget(row, 0, key_input)
         
         # ConfigMap文件复选框
@@ -326,8 +379,17 @@ class ComparatorTab(QWidget):
     def execute_comparison(self):
         """执行比较"""
         compare_keys = self.get_compare_keys()
-        
-        if not compare_keys:
+        self.comparator.deep_diff = self.deep_diff_check.isChecked()
+        self.comparator.streaming = self.streaming_check.isChecked()
+        self.comparator.force_full = self.full_compare_check.isChecked()
+        self.comparator.list_matching = self.list_matching_check.isChecked()
+        self.comparator.text_diff = self.text_diff_check.isChecked()
+        self.comparator.detect_renames = self.detect_renames_check.isChecked()
+        self.comparator.ignore_paths = [
+            path.strip() for path in self.ignore_paths_edit.text().split(",") if path.strip()
+        ]
+        
+        if not compare_keys and not self.comparator.deep_diff:
             QMessageBox.warning(self, "警告", "请至少配置一个比较Key")
             return
         
@@ -358,7 +420,14 @@ class ComparatorTab(QWidget):
             self.comparator.clear_errors()
         
         diff_count = len(self.comparison_results)
-        self.status_label.setText(f"比较完成，发现 {diff_count} 个差异项")
+        stats = self.comparator.get_stats()
+        self.status_label.setText(
+            f"比较完成，发现 {diff_count} 个差异项"
+            f"（文档去重率 {stats.get('dedup_ratio', 0.0) * 100:.1f}%，"
+            f"{stats['identical_pairs']} 个资源内容完全一致，"
+            f"{stats['reused_pairs']} 个资源沿用上次结果，"
+            f"{stats['renames']} 个资源疑似重命名）"
+        )
         
         if diff_count == 0:
             QMessageBox.information(self, "结果", "两个对象完全相同，没有发现差异")
@@ -9,15 +9,16 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton,
 from PyQt5.QtCore import Qt
 from core.info_extractor import InfoExtractor
 from utils.excel_exporter import ExcelExporter
+from config import SNAPSHOT_EXTENSION
 import os
 
 
 class ExtractorTab(QWidget):
     """信息提取器标签页"""
     
-    def __init__(self):
+    def __init__(self, parse_cache=None):
         super().__init__()
-        self.extractor = InfoExtractor()
+        self.extractor = InfoExtractor(cache=parse_cache)
         self.excel_exporter = ExcelExporter()
         self.extraction_results = []
         self.selected_path = ""
@@ -109,7 +110,7 @@ class ExtractorTab(QWidget):
     def select_file(self):
         """选择文件"""
         file_path, _ = QFileDialog.getOpenFileName(
-            self, "选择YAML文件", "", "YAML文件 (*.yaml *.yml)"
+            self, "选择YAML文件", "", f"YAML文件 (*.yaml *.yml);;集群快照 (*{SNAPSHOT_EXTENSION})"
         )
         if file_path:
             self.selected_path = file_path
@@ -123,7 +124,7 @@ class ExtractorTab(QWidget):
         
         # Key路径输入框
         key_input = QLineEdit()
-        key_input.setPlaceholderText("如: spec.replicas")
+        key_input.setPlaceholderText("如: spec.replicas 或 containers[*].image")
         self.key_table.setCellWidget(row, 0, key_input)
         
         # 别名输入框
@@ -281,8 +282,9 @@ class ExtractorTab(QWidget):
             return
         
         self.status_label.setText("正在提取信息...")
+        # 结果只用于展示和导出，不保留YAML内容以降低内存占用
         self.extraction_results = self.extractor.extract_from_path(
-            self.selected_path, extract_configs
+            self.selected_path, extract_configs, keep_content=False
         )
         
         if self.extractor.get_errors():
@@ -4,50 +4,68 @@ Excel导出工具
 """
 
 import os
-from typing import List, Dict, Any
+import pickle
+import tempfile
+from typing import List, Dict, Any, Iterable, Optional
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Font, PatternFill, Alignment
 from openpyxl.utils import get_column_letter
-from models.resource import Resource, ComparisonResult, ExtractionResult
+from models.resource import (Resource, ComparisonResult, ExtractionResult,
+                             MultiComparisonResult, DIFF_CHANGED, DIFF_ADDED, DIFF_REMOVED,
+                             DIFF_TEXT, DIFF_RENAMED)
 from config import MAX_SHEETS_PER_FILE
 
 
+# 差异类型 -> (差异标记, 行颜色)
+_DIFF_MARKS = {
+    DIFF_CHANGED: ("不同", "FFFFCC"),
+    DIFF_ADDED: ("新增", "CCFFCC"),
+    DIFF_REMOVED: ("删除", "FFCCCC"),
+    DIFF_TEXT: ("文本差异", "DDEBF7"),
+    DIFF_RENAMED: ("重命名", "E4DFEC"),
+}
+
+# 资源表各列宽度：只写模式下列宽须在写入数据前确定，无法按内容自动调整
+_RESOURCE_TABLE_WIDTHS = (20, 25, 25, 40, 50)
+
+# 列宽上限，与自动调整列宽一致
+_MAX_COLUMN_WIDTH = 50
+
+
 class ExcelExporter:
     """Excel导出器"""
     
     def __init__(self):
         self.errors = []
     
-    def export_resource_table(self, resources: List[Resource], output_path: str) -> bool:
+    def export_resource_table(self, resources: Iterable[Resource], output_path: str) -> bool:
         """
         导出资源表格
+        使用只写模式工作簿逐行追加，只读取资源的标识字段，
+        可直接传入YAMLParser.iter_cluster_resources的结果，边解析边写入，
+        不需要先构建完整的资源列表。只写模式下列宽为固定值，不按内容自动调整
         
         Args:
-            resources: 资源列表
+            resources: 资源列表或资源迭代器
             output_path: 输出文件路径
             
         Returns:
             是否成功
         """
         try:
-            wb = Workbook()
-            ws = wb.active
-            ws.title = "资源列表"
+            wb = Workbook(write_only=True)
+            ws = wb.create_sheet(title="资源列表")
+            self._set_column_widths(ws, _RESOURCE_TABLE_WIDTHS)
             
             # 设置表头
             headers = ["集群名", "命名空间", "资源类型", "资源名", "文件路径"]
-            self._write_header(ws, headers)
+            ws.append(self._header_cells(ws, headers))
             
             # 写入数据
-            for idx, resource in enumerate(resources, start=2):
-                ws.cell(row=idx, column=1, value=resource.cluster)
-                ws.cell(row=idx, column=2, value=resource.namespace)
-                ws.cell(row=idx, column=3, value=resource.kind)
-                ws.cell(row=idx, column=4, value=resource.name)
-                ws.cell(row=idx, column=5, value=resource.file_path)
-            
-            # 自动调整列宽
-            self._adjust_column_width(ws)
+            for resource in resources:
+                ws.append([resource.cluster, resource.namespace, resource.kind,
+                           resource.name, resource.file_path])
             
             # 保存文件
             wb.save(output_path)
@@ -79,7 +97,7 @@ class ExcelExporter:
             # 按资源类型分组
             grouped_by_kind = {}
             for result in comparison_results:
-                kind = result.resource_left.kind
+                kind = result.resource.kind
                 if kind not in grouped_by_kind:
                     grouped_by_kind[kind] = []
                 grouped_by_kind[kind].append(result)
@@ -102,7 +120,7 @@ class ExcelExporter:
         # 按资源名分组
         grouped_by_name = {}
         for result in results:
-            name = result.resource_left.name
+            name = result.resource.name
             if name not in grouped_by_name:
                 grouped_by_name[name] = []
             grouped_by_name[name].append(result)
@@ -129,7 +147,15 @@ class ExcelExporter:
                 # 写入差异数据
                 row_idx = 2
                 for result in results_for_name:
-                    if result.resource_right is None:
+                    if result.resource_left is None:
+                        # 左侧资源不存在
+                        ws.cell(row=row_idx, column=1, value="[整个资源]")
+                        ws.cell(row=row_idx, column=2, value="不存在")
+                        ws.cell(row=row_idx, column=3, value="存在")
+                        ws.cell(row=row_idx, column=4, value="新增")
+                        self._highlight_row(ws, row_idx, "CCFFCC")
+                        row_idx += 1
+                    elif result.resource_right is None:
                         # 右侧资源不存在
                         ws.cell(row=row_idx, column=1, value="[整个资源]")
                         ws.cell(row=row_idx, column=2, value="存在")
@@ -139,11 +165,12 @@ class ExcelExporter:
                         row_idx += 1
                     else:
                         for diff in result.differences:
+                            mark, color = _DIFF_MARKS.get(diff.change, _DIFF_MARKS[DIFF_CHANGED])
                             ws.cell(row=row_idx, column=1, value=diff['key_path'])
                             ws.cell(row=row_idx, column=2, value=str(diff['left_value']))
                             ws.cell(row=row_idx, column=3, value=str(diff['right_value']))
-                            ws.cell(row=row_idx, column=4, value="不同")
-                            self._highlight_row(ws, row_idx, "FFFFCC")
+                            ws.cell(row=row_idx, column=4, value=mark)
+                            self._highlight_row(ws, row_idx, color)
                             row_idx += 1
                 
                 self._adjust_column_width(ws)
@@ -160,15 +187,18 @@ class ExcelExporter:
             start_idx = end_idx
             file_count += 1
     
-    def export_extraction_result(self, extraction_results: List[ExtractionResult], 
-                                 output_dir: str) -> bool:
+    def export_multi_comparison_result(self, comparison_results: List[MultiComparisonResult],
+                                       output_dir: str, cluster_names: List[str],
+                                       baseline: Optional[int] = None) -> bool:
         """
-        导出信息提取结果
-        按资源类型分文件，每个文件为行式表格
+        导出多集群比较结果
+        按资源类型分文件，每个文件按资源名分Sheet，每个集群一列，偏离的单元格高亮
         
         Args:
-            extraction_results: 提取结果列表
+            comparison_results: YAMLComparator.compare_many的结果
             output_dir: 输出目录
+            cluster_names: 集群名称列表，顺序与比较时的集群列表一致
+            baseline: 基准集群下标，None表示以多数值为准
             
         Returns:
             是否成功
@@ -179,56 +209,192 @@ class ExcelExporter:
             
             # 按资源类型分组
             grouped_by_kind = {}
-            for result in extraction_results:
-                kind = result.resource.kind
-                if kind not in grouped_by_kind:
-                    grouped_by_kind[kind] = []
-                grouped_by_kind[kind].append(result)
+            for result in comparison_results:
+                grouped_by_kind.setdefault(result.kind, []).append(result)
             
-            # 为每个资源类型创建Excel文件
             for kind, results in grouped_by_kind.items():
-                self._export_extraction_by_kind(kind, results, output_dir)
+                self._export_multi_comparison_by_kind(kind, results, output_dir,
+                                                      cluster_names, baseline)
             
             return True
             
         except Exception as e:
-            self.errors.append(f"导出提取结果失败: {str(e)}")
+            self.errors.append(f"导出多集群比较结果失败: {str(e)}")
             return False
     
-    def _export_extraction_by_kind(self, kind: str, results: List[ExtractionResult], 
-                                   output_dir: str):
-        """导出单个资源类型的提取结果"""
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "提取结果"
-
-        # 收集所有key列
-        key_columns = []
+    def _export_multi_comparison_by_kind(self, kind: str, results: List[MultiComparisonResult],
+                                         output_dir: str, cluster_names: List[str],
+                                         baseline: Optional[int]):
+        """导出单个资源类型的多集群比较结果"""
+        grouped_by_name = {}
         for result in results:
-            for key in result.extracted_values.keys():
-                if key not in key_columns:
-                    key_columns.append(key)
+            grouped_by_name.setdefault(result.name, []).append(result)
+        
+        deviation_fill = PatternFill(start_color="FFFFCC", end_color="FFFFCC", fill_type="solid")
+        missing_fill = PatternFill(start_color="FFCCCC", end_color="FFCCCC", fill_type="solid")
+        
+        headers = ["命名空间", "比较Key路径"]
+        for position, cluster_name in enumerate(cluster_names):
+            headers.append(f"{cluster_name}值（基准）" if position == baseline else f"{cluster_name}值")
+        headers.append("偏离集群")
+        
+        resource_names = list(grouped_by_name.keys())
+        file_count = 1
+        start_idx = 0
+        
+        while start_idx < len(resource_names):
+            wb = Workbook()
+            wb.remove(wb.active)  # 删除默认sheet
+            
+            end_idx = min(start_idx + MAX_SHEETS_PER_FILE, len(resource_names))
+            
+            for name in resource_names[start_idx:end_idx]:
+                ws = wb.create_sheet(title=self._sanitize_sheet_name(name))
+                self._write_header(ws, headers)
+                
+                row_idx = 2
+                for result in grouped_by_name[name]:
+                    for row in result.rows:
+                        ws.cell(row=row_idx, column=1, value=result.namespace)
+                        if row.key_path:
+                            ws.cell(row=row_idx, column=2, value=row.key_path)
+                        else:
+                            ws.cell(row=row_idx, column=2, value="[整个资源]")
+                        for position, value in enumerate(row.values):
+                            if not row.key_path:
+                                text = "存在" if value else "不存在"
+                            elif result.resources[position] is None:
+                                text = ""
+                            else:
+                                text = str(value)
+                            cell = ws.cell(row=row_idx, column=3 + position, value=text)
+                            if result.resources[position] is None:
+                                cell.fill = missing_fill
+                            elif position in row.deviating:
+                                cell.fill = deviation_fill
+                        ws.cell(row=row_idx, column=3 + len(row.values),
+                                value=", ".join(cluster_names[i] for i in row.deviating))
+                        row_idx += 1
+                
+                self._adjust_column_width(ws)
+            
+            if len(resource_names) > MAX_SHEETS_PER_FILE:
+                filename = f"{kind}_多集群比较结果_{file_count}.xlsx"
+            else:
+                filename = f"{kind}_多集群比较结果.xlsx"
+            
+            wb.save(os.path.join(output_dir, filename))
+            
+            start_idx = end_idx
+            file_count += 1
+    
+    def export_extraction_result(self, extraction_results: Iterable[ExtractionResult], 
+                                 output_dir: str) -> bool:
+        """
+        导出信息提取结果
+        按资源类型分文件，每个文件为行式表格
+        通配key展开的列要到该类型的最后一个结果才能确定，因此分两遍：
+        第一遍边接收结果边把行写入每个资源类型的临时文件，同时收集列和列宽；
+        第二遍用只写模式工作簿逐行写出。内存中只保留各类型的列名和列宽
+        
+        Args:
+            extraction_results: 提取结果列表或迭代器（如InfoExtractor.iter_extract_from_path）
+            output_dir: 输出目录
+            
+        Returns:
+            是否成功
+        """
+        try:
+            if not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            
+            with tempfile.TemporaryDirectory(prefix="extract_export_") as spool_dir:
+                # 资源类型 -> [临时文件, key列, 各列最大长度]
+                spools = {}
+                try:
+                    for result in extraction_results:
+                        kind = result.resource.kind
+                        spool = spools.get(kind)
+                        if spool is None:
+                            spool_path = os.path.join(spool_dir, f"{len(spools)}.bin")
+                            spool = spools[kind] = [open(spool_path, 'w+b'), {},
+                                                    [len(h) for h in ("集群名", "命名空间", "资源名")]]
+                        self._spool_extraction_row(result, spool)
+                    
+                    # 为每个资源类型创建Excel文件
+                    for kind, (spool_file, key_columns, widths) in spools.items():
+                        spool_file.seek(0)
+                        self._export_extraction_by_kind(kind, spool_file, list(key_columns),
+                                                        widths, output_dir)
+                finally:
+                    for spool_file, _, _ in spools.values():
+                        spool_file.close()
+            
+            return True
+            
+        except Exception as e:
+            self.errors.append(f"导出提取结果失败: {str(e)}")
+            return False
+    
+    def _spool_extraction_row(self, result: ExtractionResult, spool: list):
+        """把一条提取结果写入所属资源类型的临时文件，并更新key列和列宽"""
+        spool_file, key_columns, widths = spool
+        values = {}
+        for key, value in result.extracted_values.items():
+            if key not in key_columns:
+                key_columns[key] = len(widths)
+                widths.append(len(str(key)))
+            text = str(value) if value is not None else ""
+            values[key] = text
+            column = key_columns[key]
+            widths[column] = max(widths[column], len(text))
+        
+        identity = (result.resource.cluster, result.resource.namespace, result.resource.name)
+        for column, text in enumerate(identity):
+            widths[column] = max(widths[column], len(str(text)) if text else 0)
+        pickle.dump((identity, values), spool_file, protocol=pickle.HIGHEST_PROTOCOL)
+    
+    def _export_extraction_by_kind(self, kind: str, spool_file, key_columns: List[str],
+                                   widths: List[int], output_dir: str):
+        """从临时文件逐行导出单个资源类型的提取结果"""
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet(title="提取结果")
+        self._set_column_widths(ws, [min(width + 2, _MAX_COLUMN_WIDTH) for width in widths])
 
         headers = ["集群名", "命名空间", "资源名"] + key_columns
-        self._write_header(ws, headers)
-
-        row_idx = 2
-        for result in results:
-            ws.cell(row=row_idx, column=1, value=result.resource.cluster)
-            ws.cell(row=row_idx, column=2, value=result.resource.namespace)
-            ws.cell(row=row_idx, column=3, value=result.resource.name)
+        ws.append(self._header_cells(ws, headers))
 
-            for col_offset, key in enumerate(key_columns, start=4):
-                value = result.extracted_values.get(key, "")
-                ws.cell(row=row_idx, column=col_offset, value=str(value) if value is not None else "")
-            row_idx += 1
-
-        self._adjust_column_width(ws)
+        while True:
+            try:
+                identity, values = pickle.load(spool_file)
+            except EOFError:
+                break
+            ws.append(list(identity) + [values.get(key, "") for key in key_columns])
 
         filename = f"{kind}_提取结果.xlsx"
         output_path = os.path.join(output_dir, filename)
         wb.save(output_path)
     
+    def _header_cells(self, ws, headers: List[str]) -> List[WriteOnlyCell]:
+        """生成只写模式工作表的带样式表头单元格"""
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+        header_alignment = Alignment(horizontal="center", vertical="center")
+        
+        cells = []
+        for header in headers:
+            cell = WriteOnlyCell(ws, value=header)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            cells.append(cell)
+        return cells
+    
+    def _set_column_widths(self, ws, widths: Iterable[int]):
+        """设置列宽，只写模式下须在写入第一行之前调用"""
+        for col_idx, width in enumerate(widths, start=1):
+            ws.column_dimensions[get_column_letter(col_idx)].width = width
+    
     def _write_header(self, ws, headers: List[str]):
         """写入表头并设置样式"""
         header_font = Font(bold=True, color="FFFFFF")
@@ -4,8 +4,77 @@
 """
 
 import os
-from typing import List
-from config import YAML_EXTENSIONS
+from fnmatch import fnmatch
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+from config import YAML_EXTENSIONS, SCAN_EXCLUDE_DIRS, SCAN_THREADS
+
+_YAML_SUFFIXES = tuple(YAML_EXTENSIONS)
+
+
+class FileEntry(NamedTuple):
+    """扫描到的文件，大小和修改时间来自目录项的stat结果"""
+    path: str
+    size: int
+    mtime_ns: int
+
+
+class ScanFilter:
+    """
+    目录扫描过滤条件
+    集群目录结构为 集群名/命名空间/资源类型/yaml文件，
+    命名空间和资源类型文件夹可分别用glob模式包含或排除，
+    被排除的文件夹不会被进入
+    """
+    
+    def __init__(self, include_namespaces: Optional[Sequence[str]] = None,
+                 exclude_namespaces: Optional[Sequence[str]] = None,
+                 include_types: Optional[Sequence[str]] = None,
+                 exclude_types: Optional[Sequence[str]] = None,
+                 exclude_dirs: Optional[Sequence[str]] = None):
+        """
+        Args:
+            include_namespaces: 命名空间文件夹包含模式，None或空表示全部包含
+            exclude_namespaces: 命名空间文件夹排除模式
+            include_types: 资源类型文件夹包含模式，None或空表示全部包含
+            exclude_types: 资源类型文件夹排除模式
+            exclude_dirs: 任意层级都排除的文件夹模式，None表示使用配置值（如.git）
+        """
+        self.include_namespaces = list(include_namespaces or [])
+        self.exclude_namespaces = list(exclude_namespaces or [])
+        self.include_types = list(include_types or [])
+        self.exclude_types = list(exclude_types or [])
+        self.exclude_dirs = list(SCAN_EXCLUDE_DIRS if exclude_dirs is None else exclude_dirs)
+    
+    def accept_dir(self, name: str, depth: int) -> bool:
+        """
+        判断是否进入子文件夹
+        
+        Args:
+            name: 文件夹名
+            depth: 文件夹所在层级，1为命名空间，2为资源类型
+            
+        Returns:
+            是否进入
+        """
+        if _match_any(name, self.exclude_dirs):
+            return False
+        
+        if depth == 1:
+            includes, excludes = self.include_namespaces, self.exclude_namespaces
+        elif depth == 2:
+            includes, excludes = self.include_types, self.exclude_types
+        else:
+            return True
+        
+        if includes and not _match_any(name, includes):
+            return False
+        return not _match_any(name, excludes)
+
+
+def _match_any(name: str, patterns: Sequence[str]) -> bool:
+    """判断名称是否匹配任一glob模式"""
+    return any(fnmatch(name, pattern) for pattern in patterns)
 
 
 def is_yaml_file(file_path: str) -> bool:
@@ -14,20 +83,92 @@ def is_yaml_file(file_path: str) -> bool:
     return ext.lower() in YAML_EXTENSIONS
 
 
-def scan_yaml_files(directory: str) -> List[str]:
+def scan_yaml_files(directory: str, scan_filter: Optional[ScanFilter] = None) -> List[str]:
     """递归扫描目录下的所有YAML文件"""
-    yaml_files = []
+    return [entry.path for entry in scan_yaml_entries(directory, scan_filter)]
+
+
+def scan_yaml_entries(directory: str, scan_filter: Optional[ScanFilter] = None,
+                      threads: Optional[int] = None) -> List[FileEntry]:
+    """
+    使用os.scandir递归扫描目录下的所有YAML文件
+    被过滤条件排除的文件夹直接跳过，不会进入；与os.walk一致，不进入符号链接指向的文件夹
     
+    Args:
+        directory: 根目录
+        scan_filter: 过滤条件，None表示使用默认条件（排除.git等文件夹）
+        threads: 并发扫描线程数，None表示使用配置值，1表示单线程；
+                 网络文件系统上目录读取延迟较高，多线程可明显加快扫描
+        
+    Returns:
+        按路径排序的FileEntry列表
+    """
     if not os.path.exists(directory):
         raise FileNotFoundError(f"目录不存在: {directory}")
     
-    for root, dirs, files in os.walk(directory):
-        for file in files:
-            if is_yaml_file(file):
-                full_path = os.path.join(root, file)
-                yaml_files.append(full_path)
+    if scan_filter is None:
+        scan_filter = ScanFilter()
+    threads = SCAN_THREADS if threads is None else threads
+    
+    entries = []
+    if threads > 1:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            pending = {executor.submit(_scan_one_dir, directory, 0, scan_filter)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    entries.extend(files)
+                    for subdir, depth in subdirs:
+                        pending.add(executor.submit(_scan_one_dir, subdir, depth, scan_filter))
+    else:
+        stack = [(directory, 0)]
+        while stack:
+            files, subdirs = _scan_one_dir(*stack.pop(), scan_filter)
+            entries.extend(files)
+            stack.extend(subdirs)
+    
+    entries.sort()
+    return entries
+
+
+def _scan_one_dir(path: str, depth: int,
+                  scan_filter: ScanFilter) -> Tuple[List[FileEntry], List[Tuple[str, int]]]:
+    """
+    扫描单个目录（不递归）
+    
+    Returns:
+        (YAML文件列表, [(待扫描子目录, 层级), ...])
+    """
+    files = []
+    subdirs = []
+    
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                
+                if is_dir:
+                    if not entry.is_symlink() and scan_filter.accept_dir(entry.name, depth + 1):
+                        subdirs.append((entry.path, depth + 1))
+                    continue
+                
+                if not entry.name.lower().endswith(_YAML_SUFFIXES):
+                    continue
+                try:
+                    stat = entry.stat()
+                    files.append(FileEntry(entry.path, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    # 失效的符号链接等，交给解析阶段报告错误
+                    files.append(FileEntry(entry.path, 0, 0))
+    except OSError:
+        # 与os.walk一致，无法读取的目录直接跳过
+        pass
     
-    return yaml_files
+    return files, subdirs
 
 
 def get_relative_path(full_path: str, base_path: str) -> str: